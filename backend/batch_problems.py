@@ -0,0 +1,113 @@
+"""
+batch_problems.py
+
+Vectorised SMD test problems (Sinha, Malo & Deb, 2014): each evaluates a
+whole population in one NumPy pass instead of one candidate at a time.
+
+Every function takes ``XU`` (n x (p + r)) and ``XL`` (n x (q + r), or
+q + s + r for SMD6) and returns ``(F, f)``, the upper- and lower-level
+objective vectors of length n. Columns are split as in the paper:
+``XU = [xu1 (p) | xu2 (r)]`` and ``XL = [xl1 (q [+ s]) | xl2 (r)]``.
+
+Only the unconstrained SMD1-SMD8 are here; the constrained SMD9-SMD12,
+SP1/SP2 and SA1 keep SACE's own per-candidate evaluation.
+"""
+
+from typing import Callable, Optional
+
+import numpy as np
+
+
+def _sq(x: np.ndarray) -> np.ndarray:
+    return np.sum(x * x, axis=1)
+
+
+def _rastrigin_part(x: np.ndarray) -> np.ndarray:
+    return x.shape[1] + np.sum(x * x - np.cos(2 * np.pi * x), axis=1)
+
+
+def _rosenbrock(x: np.ndarray) -> np.ndarray:
+    head, tail = x[:, :-1], x[:, 1:]
+    return np.sum((tail - head * head) ** 2 + (head - 1) ** 2, axis=1)
+
+
+def smd1(xu1, xu2, xl1, xl2, **_):
+    g = _sq(xu2 - np.tan(xl2))
+    return _sq(xu1) + _sq(xl1) + _sq(xu2) + g, _sq(xu1) + _sq(xl1) + g
+
+
+def smd2(xu1, xu2, xl1, xl2, **_):
+    g = _sq(xu2 - np.log(xl2))
+    return _sq(xu1) - _sq(xl1) + _sq(xu2) - g, _sq(xu1) + _sq(xl1) + g
+
+
+def smd3(xu1, xu2, xl1, xl2, **_):
+    g = _sq(xu2 * xu2 - np.tan(xl2))
+    return _sq(xu1) + _sq(xl1) + _sq(xu2) + g, _sq(xu1) + _rastrigin_part(xl1) + g
+
+
+def smd4(xu1, xu2, xl1, xl2, **_):
+    g = _sq(np.abs(xu2) - np.log1p(xl2))
+    return _sq(xu1) - _sq(xl1) + _sq(xu2) - g, _sq(xu1) + _rastrigin_part(xl1) + g
+
+
+def smd5(xu1, xu2, xl1, xl2, **_):
+    g = _sq(np.abs(xu2) - xl2 * xl2)
+    rosen = _rosenbrock(xl1)
+    return _sq(xu1) - rosen + _sq(xu2) - g, _sq(xu1) + rosen + g
+
+
+def smd6(xu1, xu2, xl1, xl2, q, **_):
+    head, extra = xl1[:, :q], xl1[:, q:]
+    g = _sq(xu2 - xl2)
+    pairs = _sq(extra[:, 1::2] - extra[:, 0:-1:2]) if extra.shape[1] > 1 else 0.0
+    upper = _sq(xu1) - _sq(head) + _sq(extra) + _sq(xu2) - g
+    return upper, _sq(xu1) + _sq(head) + pairs + g
+
+
+def smd7(xu1, xu2, xl1, xl2, **_):
+    i = np.arange(1, xu1.shape[1] + 1)
+    griewank = 1 + _sq(xu1) / 400 - np.prod(np.cos(xu1 / np.sqrt(i)), axis=1)
+    g = _sq(xu2 - np.log(xl2))
+    return griewank - _sq(xl1) + _sq(xu2) - g, np.sum(xu1 ** 3, axis=1) + _sq(xl1) + g
+
+
+def smd8(xu1, xu2, xl1, xl2, **_):
+    p = xu1.shape[1]
+    ackley = (
+        20 + np.e
+        - 20 * np.exp(-0.2 * np.sqrt(_sq(xu1) / p))
+        - np.exp(np.sum(np.cos(2 * np.pi * xu1), axis=1) / p)
+    )
+    g = _sq(xu2 - xl2 ** 3)
+    rosen = _rosenbrock(xl1)
+    return ackley - rosen + _sq(xu2) - g, np.sum(np.abs(xu1), axis=1) + rosen + g
+
+
+BATCH_PROBLEMS = {
+    "smd1": smd1, "smd2": smd2, "smd3": smd3, "smd4": smd4,
+    "smd5": smd5, "smd6": smd6, "smd7": smd7, "smd8": smd8,
+}
+
+
+def batch_function(problem: str, p: int, q: int, r: int, s: int = 0) -> Optional[Callable]:
+    """``evaluate(XU, XL) -> (F, f)`` for ``problem`` with this split, or None."""
+    fn = BATCH_PROBLEMS.get(problem.lower())
+    if fn is None:
+        return None
+    ll_cols = q + (s if problem.lower() == "smd6" else 0)
+
+    def evaluate(XU, XL):
+        XU = np.atleast_2d(np.asarray(XU, dtype=float))
+        XL = np.atleast_2d(np.asarray(XL, dtype=float))
+        if XU.shape[1] != p + r or XL.shape[1] != ll_cols + r:
+            raise ValueError(
+                f"{problem}: expected {p + r} UL and {ll_cols + r} LL columns, "
+                f"got {XU.shape[1]} and {XL.shape[1]}"
+            )
+        # Out-of-domain points (e.g. log of a negative) evaluate to nan, as
+        # they would one at a time
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return fn(XU[:, :p], XU[:, p:], XL[:, :ll_cols], XL[:, ll_cols:], q=q)
+
+    return evaluate
@@ -1,18 +1,43 @@
 import os
 import sys
 import re
+import resource
+import csv
+import io
 import json
 import hashlib
+import inspect
 import signal
 import logging
 import tempfile
 import sqlite3
+import statistics
+import time
+from contextlib import contextmanager, redirect_stdout
+from typing import Callable, List, Optional
 
+import numpy as np
 from celery import Celery
 from celery.exceptions import SoftTimeLimitExceeded
-from redis import Redis
+from celery.signals import before_task_publish, task_postrun, task_prerun, worker_ready
+from redis import Redis, RedisError
 
-from backend.config_validator import validate_config, ConfigValidationError
+from backend.config_validator import (
+    calibration_plan,
+    cost_units_per_generation,
+    set_sace_features,
+    validate_config,
+    verify_config_signature,
+    ConfigValidationError,
+)
+from backend.batch_problems import batch_function
+from backend.compression import precompress
+from backend.ll_cache import LowerLevelCache
+from backend.metrics import WorkerMetrics
+from backend.profiling import profile_call
+from backend import tracing
+from backend.shared_datasets import SharedDatasets, dataset_key
+from backend.surrogate_cache import SurrogateCache, problem_key
 
 sys.path.insert(0, os.path.abspath("SACEProject"))
 from SACEProject.main import main
@@ -20,6 +45,15 @@ from SACEProject.main import main
 REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
 DB_PATH = os.environ.get("DB_PATH", "submissions.db")
 
+# Regex for a per-generation progress line on SACE's stdout, its first group
+# the current best fitness. Racing counts these lines against a budget of
+# generations x problems x runs, so it must match exactly one line per
+# generation of every run. SACE as shipped prints no such line (its
+# per-generation history only reaches a CSV when a run ends), so this is
+# unset by default and configs asking for racing are rejected.
+RACE_PROGRESS_PATTERN = os.environ.get("RACE_PROGRESS_PATTERN", "")
+PROGRESS_PATTERN = re.compile(RACE_PROGRESS_PATTERN) if RACE_PROGRESS_PATTERN else None
+
 # Celery app with Redis as both broker and result backend
 celery_app = Celery(
     "sace_worker",
@@ -37,8 +71,15 @@ celery_app.conf.update(
     # Acknowledge tasks only after completion (prevents losing jobs on crash)
     task_acks_late=True,
     task_reject_on_worker_lost=True,
+    # Dry runs get their own queue so they never wait behind full jobs
+    task_routes={"calibrate_config": {"queue": "calibration"}},
 )
 
+# Workers consuming the default queue; used to turn worker-seconds into an ETA
+WORKER_SLOTS = int(os.environ.get("WORKER_SLOTS", 1))
+# Recent samples per pair that feed the admission-control cost weights
+CALIBRATION_WINDOW = 20
+
 redis_client = Redis.from_url(REDIS_URL, decode_responses=True)
 
 
@@ -59,6 +100,7 @@ def init_db():
             type TEXT NOT NULL,
             data TEXT NOT NULL,
             status TEXT DEFAULT 'pending',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
             result_data TEXT,
             result_hash TEXT,
             hash_algorithm TEXT,
@@ -77,11 +119,96 @@ def init_db():
         )
         """
     )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS result_blobs (
+            result_hash TEXT NOT NULL,
+            encoding TEXT NOT NULL,
+            body BLOB NOT NULL,
+            PRIMARY KEY (result_hash, encoding)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS work_units (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            submission_id INTEGER NOT NULL,
+            unit_index INTEGER NOT NULL,
+            point TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            result_data TEXT,
+            error TEXT,
+            best_fitness REAL,
+            stopped_at REAL,
+            race_status TEXT,
+            UNIQUE (submission_id, unit_index),
+            FOREIGN KEY (submission_id) REFERENCES submissions(id)
+        )
+        """
+    )
     cols = [r["name"] for r in conn.execute("PRAGMA table_info(submissions)").fetchall()]
     if "result_hash" not in cols:
         conn.execute("ALTER TABLE submissions ADD COLUMN result_hash TEXT")
     if "hash_algorithm" not in cols:
         conn.execute("ALTER TABLE submissions ADD COLUMN hash_algorithm TEXT")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS calibration_samples (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pair TEXT NOT NULL,
+            config TEXT NOT NULL,
+            generations INTEGER NOT NULL,
+            seconds REAL NOT NULL,
+            seconds_per_generation REAL NOT NULL,
+            ul_nfe_per_generation REAL,
+            ll_nfe_per_generation REAL,
+            cost_units_per_generation INTEGER NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_calibration_samples_pair ON calibration_samples(pair)"
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_metrics (
+            job_id INTEGER PRIMARY KEY,
+            tasks INTEGER NOT NULL DEFAULT 0,
+            queue_wait_seconds REAL,
+            wall_seconds REAL NOT NULL DEFAULT 0,
+            user_cpu_seconds REAL NOT NULL DEFAULT 0,
+            system_cpu_seconds REAL NOT NULL DEFAULT 0,
+            peak_rss_bytes INTEGER,
+            ul_nfe REAL,
+            ll_nfe REAL,
+            output_bytes INTEGER NOT NULL DEFAULT 0,
+            result_bytes INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (job_id) REFERENCES submissions(id)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_profiles (
+            job_id INTEGER NOT NULL,
+            unit_index INTEGER NOT NULL DEFAULT 0,
+            pstats BLOB NOT NULL,
+            collapsed TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (job_id, unit_index)
+        )
+        """
+    )
+    unit_cols = [r["name"] for r in conn.execute("PRAGMA table_info(work_units)").fetchall()]
+    if "best_fitness" not in unit_cols:
+        conn.execute("ALTER TABLE work_units ADD COLUMN best_fitness REAL")
+    if "stopped_at" not in unit_cols:
+        conn.execute("ALTER TABLE work_units ADD COLUMN stopped_at REAL")
+    if "race_status" not in unit_cols:
+        conn.execute("ALTER TABLE work_units ADD COLUMN race_status TEXT")
     conn.commit()
     conn.close()
 
@@ -89,22 +216,62 @@ def init_db():
 init_db()
 
 
+def render_result_body(result_data: str, result_hash: str, hash_algorithm: str) -> bytes:
+    """Serialise the /job_results payload exactly as the API sends it."""
+    return json.dumps(
+        {
+            "data": result_data,
+            "result_hash": result_hash,
+            "hash_algorithm": hash_algorithm,
+            "result_url": f"/results/by-hash/{result_hash}",
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def notify_jobs_changed(user_id: int) -> int:
+    """Bump the user's job-list version and wake any /my_jobs/changes pollers."""
+    version = redis_client.incr(f"jobs_version:{user_id}")
+    redis_client.publish(f"jobs_changed:{user_id}", version)
+    return version
+
+
+def get_job_owner(job_id: int) -> Optional[int]:
+    conn = get_db()
+    row = conn.execute("SELECT user_id FROM submissions WHERE id=?", (job_id,)).fetchone()
+    conn.close()
+    return row["user_id"] if row else None
+
+
 class RedisOutputCapture:
     """Captures stdout/stderr and streams to Redis in real-time."""
 
-    def __init__(self, job_id: int, redis: Redis, original_stream):
+    def __init__(
+        self,
+        job_id: int,
+        redis: Redis,
+        original_stream,
+        transcript: Optional[list] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+    ):
         self.job_id = job_id
         self.redis = redis
         self.key = f"job_output:{job_id}"
         self._original = original_stream
+        self._transcript = transcript
+        self._on_output = on_output
 
     def write(self, s: str):
         if not s:
             return 0
+        if self._transcript is not None:
+            self._transcript.append(s)
         self.redis.append(self.key, s)
         self.redis.publish(f"job_stream:{self.job_id}", s)
         self._original.write(s)
         self._original.flush()
+        if self._on_output is not None:
+            self._on_output(s)
         return len(s)
 
     def flush(self):
@@ -117,32 +284,1052 @@ class RedisOutputCapture:
 class RedisLoggingHandler(logging.Handler):
     """Sends Python logging output to Redis."""
 
-    def __init__(self, job_id: int, redis: Redis):
+    def __init__(self, job_id: int, redis: Redis, transcript: Optional[list] = None):
         super().__init__()
         self.job_id = job_id
         self.redis = redis
         self.key = f"job_output:{job_id}"
+        self._transcript = transcript
 
     def emit(self, record):
         try:
             msg = self.format(record) + "\n"
+            if self._transcript is not None:
+                self._transcript.append(msg)
             self.redis.append(self.key, msg)
             self.redis.publish(f"job_stream:{self.job_id}", msg)
         except Exception:
             self.handleError(record)
 
 
+@contextmanager
+def capture_job_output(job_id: int, on_output: Optional[Callable[[str], None]] = None):
+    """Redirect stdout, stderr and logging to the job's Redis log.
+
+    Yields this task's own transcript, which — unlike the shared Redis log —
+    is not interleaved with other work units of the same job. ``on_output``
+    sees every stdout/stderr write as it happens.
+    """
+    transcript: List[str] = []
+    old_stdout = sys.stdout
+    old_stderr = sys.stderr
+    sys.stdout = RedisOutputCapture(job_id, redis_client, old_stdout, transcript, on_output)
+    sys.stderr = RedisOutputCapture(job_id, redis_client, old_stderr, transcript, on_output)
+
+    log_handler = RedisLoggingHandler(job_id, redis_client, transcript)
+    log_handler.setFormatter(logging.Formatter("%(message)s"))
+    root_logger = logging.getLogger()
+    root_logger.addHandler(log_handler)
+    try:
+        yield transcript
+    finally:
+        sys.stdout = old_stdout
+        sys.stderr = old_stderr
+        root_logger.removeHandler(log_handler)
+
+
+def find_result_file(output_str: str) -> Optional[str]:
+    """Locate the results CSV that SACE reported in its output."""
+    filepath_matches = re.findall(
+        r"All results have been saved to:\s*(.+)", output_str
+    )
+    if not filepath_matches:
+        return None
+
+    raw_filepath = filepath_matches[-1].strip()
+    timestamp_match = re.search(r"(\d{8}-\d{6})", raw_filepath)
+    if timestamp_match:
+        timestamp = timestamp_match.group(1)
+        history_dirs = [
+            "results/history",
+            os.path.join("SACEProject", "results/history"),
+        ]
+        for history_dir in history_dirs:
+            if os.path.exists(history_dir):
+                for filename in os.listdir(history_dir):
+                    if timestamp in filename and filename.endswith(".csv"):
+                        return os.path.join(history_dir, filename)
+
+    candidate_paths = [
+        raw_filepath,
+        os.path.join("SACEProject", raw_filepath),
+    ]
+    for path in candidate_paths:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def add_csv_columns(result_content: str, fields: List[str], values: Callable[[dict], dict]) -> str:
+    """Append ``fields`` to a results CSV, filled per row by ``values(row)``."""
+    reader = csv.DictReader(io.StringIO(result_content))
+    if not reader.fieldnames:
+        return result_content
+    out = io.StringIO()
+    writer = csv.DictWriter(
+        out, fieldnames=[*reader.fieldnames, *fields], lineterminator="\n"
+    )
+    writer.writeheader()
+    for row in reader:
+        writer.writerow({**row, **values(row)})
+    return out.getvalue()
+
+
+def run_sace(
+    batch_config: dict, transcript: List[str], profile_as: Optional[tuple] = None
+) -> str:
+    """Run SACE on ``batch_config`` and return the results CSV it wrote.
+
+    With ``profile`` set in the config, the SACE call is profiled and the
+    profile stored under ``profile_as`` (``(job_id, unit_index)``).
+
+    Optional SACE hooks (early stopping, warm start, surrogate and LL solve
+    caches, batch evaluation, shared datasets) are passed to ``main`` as
+    keyword arguments; each one annotates the results CSV or reports
+    afterwards.
+    """
+    hooks = {}
+    monitor = convergence_monitor(batch_config)
+    if monitor is not None:
+        hooks["on_generation"] = monitor
+    seeds = warm_start_seeds(batch_config)
+    if seeds is not None:
+        hooks["initial_population"] = seeds
+    archive = surrogate_archive(batch_config)
+    if archive is not None:
+        hooks["surrogate_cache"] = archive
+    memo = ll_solve_cache(batch_config)
+    if memo is not None:
+        hooks["ll_solve_cache"] = memo
+    batch = batch_evaluator()
+    if batch is not None:
+        hooks["batch_evaluator"] = batch
+    datasets = shared_dataset(batch_config)
+    if datasets is not None:
+        hooks["shared_dataset"] = datasets
+
+    tmp = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".json", delete=False
+        ) as tmp:
+            json.dump(batch_config, tmp)
+            tmp.flush()
+            with tracing.span("sace_main"):
+                if batch_config.get("profile") and profile_as is not None:
+                    profiled_main(profile_as, tmp.name, **hooks)
+                else:
+                    main(tmp.name, **hooks)
+    finally:
+        try:
+            if tmp:
+                os.unlink(tmp.name)
+        except OSError:
+            pass
+
+    with tracing.span("find_result_file"):
+        actual_filepath = find_result_file("".join(transcript))
+    if not actual_filepath:
+        return ""
+    with tracing.span("read_result"):
+        with open(actual_filepath, "r") as f:
+            result_content = f.read()
+    with tracing.span("annotate_result"):
+        if monitor is not None:
+            result_content = monitor.annotate(result_content)
+            monitor.report()
+        if seeds is not None:
+            result_content = seeds.annotate(result_content)
+            seeds.report()
+        if archive is not None:
+            result_content = archive.annotate(result_content)
+            archive.report()
+        if memo is not None:
+            result_content = memo.annotate(result_content)
+            memo.report()
+        if batch is not None:
+            batch.report()
+        if datasets is not None:
+            datasets.report()
+    return result_content
+
+
+def store_job_result(job_id: int, result_content: str):
+    """Hash, precompress and persist a finished job's results; mark it complete."""
+    result_hash = hashlib.sha256(result_content.encode("utf-8")).hexdigest()
+    hash_algorithm = "sha256"
+
+    # Compress the /job_results body once here instead of on every request
+    blobs = precompress(render_result_body(result_content, result_hash, hash_algorithm))
+
+    conn = get_db()
+    conn.execute(
+        "UPDATE submissions SET status='complete', result_data=?, result_hash=?, hash_algorithm=? WHERE id=?",
+        (result_content, result_hash, hash_algorithm, job_id),
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO result_blobs (result_hash, encoding, body) VALUES (?, ?, ?)",
+        [(result_hash, enc, body) for enc, body in blobs.items()],
+    )
+    conn.commit()
+    conn.close()
+
+
+# ── Task metrics ─────────────────────────────────────────────────────────────
+
+worker_metrics = WorkerMetrics(redis_client)
+
+
+def nfe_totals(result_content: str) -> tuple:
+    """Summed ``(total_ul_nfe, total_ll_nfe)`` of a results CSV; None where unreported."""
+    ul = ll = None
+    for row in csv.DictReader(io.StringIO(result_content or "")):
+        value = _float_or_none(row.get("total_ul_nfe"))
+        if value is not None:
+            ul = (ul or 0) + value
+        value = _float_or_none(row.get("total_ll_nfe"))
+        if value is not None:
+            ll = (ll or 0) + value
+    return ul, ll
+
+
+def _cpu_times() -> tuple:
+    """(user, system) CPU seconds of this process and its reaped children."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + children.ru_utime, own.ru_stime + children.ru_stime
+
+
+def _reset_peak_rss() -> bool:
+    """Restart this process's VmHWM so the next reading covers one task only."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return max(int(line.split()[1]) * 1024, children)
+    except (OSError, ValueError):
+        pass
+    # ru_maxrss is KiB on Linux and the process's lifetime peak
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, children)
+
+
+class TaskMeter:
+    """
+    Resource accounting for one task.
+
+    ``record`` pushes the task's metrics to Redis for ``/metrics`` and adds
+    them to the job's ``job_metrics`` row. A sweep's units accumulate into
+    one row: wall and CPU time, NFE and bytes are summed, peak RSS is the
+    highest of any unit, and queue wait is the first unit's.
+    """
+
+    def __init__(self, task: str, job_id: int):
+        self.task = task
+        self.job_id = job_id
+        self.status = "failed"
+        self.transcript: List[str] = []
+        self.result_content = ""
+        conn = get_db()
+        row = conn.execute(
+            "SELECT (julianday('now') - julianday(created_at)) * 86400 AS waited "
+            "FROM submissions WHERE id=?",
+            (job_id,),
+        ).fetchone()
+        conn.close()
+        self.queue_wait = row["waited"] if row else None
+        _reset_peak_rss()
+        self._wall = time.perf_counter()
+        self._cpu = _cpu_times()
+
+    def record(self):
+        wall = time.perf_counter() - self._wall
+        user, system = (now - then for now, then in zip(_cpu_times(), self._cpu))
+        ul, ll = nfe_totals(self.result_content)
+        output_bytes = sum(len(s.encode("utf-8")) for s in self.transcript)
+        result_bytes = len(self.result_content.encode("utf-8")) if self.status == "complete" else 0
+        nfe = (ul or 0) + (ll or 0) if self.status == "complete" else None
+        try:
+            worker_metrics.record(self.task, self.status, wall, user + system, nfe, output_bytes)
+        except RedisError:
+            # Metrics are best-effort; never let them change a task's outcome
+            pass
+
+        try:
+            self._store(wall, user, system, ul, ll, output_bytes, result_bytes)
+        except sqlite3.Error as e:
+            print(f"[METRICS] could not record job {self.job_id}: {e}")
+
+    def _store(self, wall, user, system, ul, ll, output_bytes, result_bytes):
+        conn = get_db()
+        conn.execute(
+            """
+            INSERT INTO job_metrics (
+                job_id, tasks, queue_wait_seconds, wall_seconds, user_cpu_seconds,
+                system_cpu_seconds, peak_rss_bytes, ul_nfe, ll_nfe, output_bytes, result_bytes
+            ) VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(job_id) DO UPDATE SET
+                tasks = tasks + 1,
+                queue_wait_seconds = min(coalesce(queue_wait_seconds, excluded.queue_wait_seconds),
+                                         coalesce(excluded.queue_wait_seconds, queue_wait_seconds)),
+                wall_seconds = wall_seconds + excluded.wall_seconds,
+                user_cpu_seconds = user_cpu_seconds + excluded.user_cpu_seconds,
+                system_cpu_seconds = system_cpu_seconds + excluded.system_cpu_seconds,
+                peak_rss_bytes = max(coalesce(peak_rss_bytes, 0), coalesce(excluded.peak_rss_bytes, 0)),
+                ul_nfe = CASE WHEN ul_nfe IS NULL AND excluded.ul_nfe IS NULL THEN NULL
+                              ELSE coalesce(ul_nfe, 0) + coalesce(excluded.ul_nfe, 0) END,
+                ll_nfe = CASE WHEN ll_nfe IS NULL AND excluded.ll_nfe IS NULL THEN NULL
+                              ELSE coalesce(ll_nfe, 0) + coalesce(excluded.ll_nfe, 0) END,
+                output_bytes = output_bytes + excluded.output_bytes,
+                result_bytes = result_bytes + excluded.result_bytes
+            """,
+            (
+                self.job_id, self.queue_wait, wall, user, system, _peak_rss_bytes(),
+                ul, ll, output_bytes, result_bytes,
+            ),
+        )
+        conn.commit()
+        conn.close()
+
+
+# ── Tracing ──────────────────────────────────────────────────────────────────
+
+# Position of the job id in each task's arguments, for tagging its span
+TRACED_JOB_ARG = {"run_sace_job": 1, "run_sace_unit": 1, "collect_sweep_results": 1}
+_task_spans = {}
+
+
+@before_task_publish.connect
+def inject_trace_context(headers=None, **_):
+    """Carry the publisher's current span to the task (API -> worker, and a
+    sweep's last unit -> its chord callback)."""
+    current = tracing.current_span()
+    if current is not None and headers is not None:
+        headers["traceparent"] = current.traceparent
+        headers["trace_sent_at"] = time.time()
+
+
+def _request_header(task, name: str):
+    # Eagerly applied tasks keep custom headers nested under "headers"
+    return task.request.get(name) or (task.request.get("headers") or {}).get(name)
+
+
+@task_prerun.connect
+def start_task_span(task_id=None, task=None, args=(), kwargs=None, **_):
+    if not tracing.TRACE_FILE:
+        return
+    traceparent = _request_header(task, "traceparent")
+    attributes = {"task_id": task_id}
+    position = TRACED_JOB_ARG.get(task.name)
+    if position is not None and len(args) > position:
+        attributes["job_id"] = args[position]
+    if len(args) > 2 and task.name == "run_sace_unit":
+        attributes["unit_index"] = args[2]
+
+    span = tracing.start_span(f"task {task.name}", traceparent, **attributes)
+    sent_at = _request_header(task, "trace_sent_at")
+    if sent_at:
+        # Queue time, from publish until this worker picked the task up
+        wait = tracing.Span("broker_wait", span.trace_id, span.parent_span_id, float(sent_at))
+        wait.set(**attributes)
+        wait.end(span.start)
+    _task_spans[task_id] = (span, tracing.activate(span))
+
+
+@task_postrun.connect
+def end_task_span(task_id=None, state=None, **_):
+    entry = _task_spans.pop(task_id, None)
+    if entry is None:
+        return
+    span, token = entry
+    tracing.deactivate(token)
+    if state not in (None, "SUCCESS"):
+        span.status = state.lower()
+    span.end()
+
+
+# ── Profiling ────────────────────────────────────────────────────────────────
+
+
+def profiled_main(profile_as: tuple, *args, **kwargs):
+    """Call SACE's ``main`` under the profiler and store the profile."""
+    job_id, unit_index = profile_as
+    pstats_data, collapsed, summary = profile_call(main, *args, **kwargs)
+    conn = get_db()
+    conn.execute(
+        "INSERT OR REPLACE INTO job_profiles (job_id, unit_index, pstats, collapsed, summary) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (job_id, unit_index, pstats_data, collapsed, json.dumps(summary)),
+    )
+    conn.commit()
+    conn.close()
+    print(
+        f"[PROFILE] {summary['wall_seconds']:.1f}s wall, {summary['profiled_calls']:,} calls "
+        f"profiled, est. profiler overhead {summary['estimated_overhead_seconds']:.1f}s "
+        f"({summary['estimated_overhead_pct']:.0f}%), {summary['samples']:,} stack samples"
+    )
+
+
+# ── Early stopping ───────────────────────────────────────────────────────────
+
+EARLY_STOP_FIELDS = [
+    "early_stop_generation",
+    "early_stop_reason",
+    "saved_generations",
+    "saved_ul_nfe",
+    "saved_ll_nfe",
+]
+
+
+def sace_supports(hook: str) -> bool:
+    """True if this SACE build's ``main`` accepts the ``hook`` keyword."""
+    try:
+        params = inspect.signature(main).parameters
+    except (TypeError, ValueError):
+        return False
+    return hook in params or any(
+        p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values()
+    )
+
+
+# Every ``main()`` keyword the hooks below pass; validation rejects the
+# options whose hook this SACE build lacks
+SACE_HOOKS = (
+    "on_generation",
+    "initial_population",
+    "surrogate_cache",
+    "ll_solve_cache",
+    "batch_evaluator",
+    "shared_dataset",
+)
+
+set_sace_features(
+    [hook for hook in SACE_HOOKS if sace_supports(hook)]
+    + (["progress_lines"] if PROGRESS_PATTERN else [])
+)
+
+
+@worker_ready.connect
+def report_sace_hooks(**_):
+    """Say once which hooks are dormant: batch_evaluator and shared_dataset
+    have no user option to reject, so nothing else would show it."""
+    missing = [hook for hook in SACE_HOOKS if not sace_supports(hook)]
+    if missing:
+        logging.getLogger(__name__).warning(
+            "SACE main() lacks hooks %s; those features are off", ", ".join(missing)
+        )
+
+
+def problem_match_key(name) -> str:
+    """Config names are lowercase with underscores; SACE's CSVs and hook
+    calls use its own spelling ("Hyper_Representation", "HyperRepresentation")."""
+    return str(name or "").lower().replace("_", "")
+
+
+class RunCounter:
+    """
+    Numbers runs per (problem, algorithm) in the order they are seen.
+
+    SACE's own ``run_id`` can't tell runs apart (it is 1 for every run in
+    the results CSVs it writes), so hooks number the runs they are called
+    for and ``annotate`` numbers the CSV rows the same way to join on.
+    """
+
+    def __init__(self):
+        self.counts = {}
+
+    def next(self, problem, algorithm) -> tuple:
+        """``(problem, algorithm, n)`` for the n-th run of that pair, from 1."""
+        key = (problem_match_key(problem), str(algorithm).lower())
+        self.counts[key] = self.counts.get(key, 0) + 1
+        return key + (self.counts[key],)
+
+
+def _extrapolate(nfe: Optional[float], done: int, planned: Optional[int]) -> Optional[int]:
+    if nfe is None or not planned or planned <= done:
+        return None
+    return int(nfe / done * (planned - done))
+
+
+class ConvergenceMonitor:
+    """
+    ``on_generation`` callback enforcing ``settings.early_stopping``.
+
+    SACE calls it once per generation of every run with the keyword
+    arguments ``problem``, ``algorithm``, ``run_id``, ``generation`` and
+    ``best_fitness`` (plus ``ul_nfe`` / ``ll_nfe`` so far, where tracked);
+    returning True ends that run. Every run is remembered in order so
+    ``annotate`` can line stops up with the rows of the results CSV.
+    """
+
+    def __init__(self, criteria: dict, batch_config: dict):
+        self.patience = criteria.get("patience")
+        self.min_delta = criteria.get("min_delta") or 0.0
+        self.target = criteria.get("target_fitness")
+        self.sign = 1.0 if criteria.get("direction", "minimize") == "minimize" else -1.0
+        self.planned_generations = {
+            a["name"].lower(): (a.get("params") or {}).get("generations")
+            for a in batch_config["algorithms"]
+        }
+        self._active = {}
+        # (run_id, problem, algorithm) -> one record per run, in execution order
+        self.runs = {}
+
+    def __call__(
+        self, *, problem, algorithm, run_id, generation, best_fitness,
+        ul_nfe=None, ll_nfe=None, **_
+    ) -> bool:
+        key = (str(run_id), str(problem).lower(), str(algorithm).lower())
+        score = self.sign * best_fitness
+        state = self._active.get(key)
+        if state is None or generation < state["generation"]:
+            record = {}
+            self.runs.setdefault(key, []).append(record)
+            state = self._active[key] = {
+                "best": score, "since": generation, "generation": generation, "record": record,
+            }
+        state["generation"] = generation
+        if score < state["best"] - self.min_delta:
+            state["best"] = score
+            state["since"] = generation
+
+        if self.target is not None and score <= self.sign * self.target:
+            reason = "target"
+        elif self.patience and generation - state["since"] >= self.patience:
+            reason = "stagnation"
+        else:
+            return False
+
+        planned = self.planned_generations.get(key[2])
+        done = generation + 1
+        state["record"].update(
+            early_stop_generation=generation,
+            early_stop_reason=reason,
+            saved_generations=planned - done if planned and planned > done else None,
+            saved_ul_nfe=_extrapolate(ul_nfe, done, planned),
+            saved_ll_nfe=_extrapolate(ll_nfe, done, planned),
+        )
+        del self._active[key]
+        print(
+            f"[EARLY STOP] {problem} / {algorithm} run {run_id}: {reason} "
+            f"at generation {generation} (best {best_fitness:g})"
+        )
+        return True
+
+    def annotate(self, result_content: str) -> str:
+        """Append the EARLY_STOP_FIELDS columns to SACE's results CSV."""
+        pending = {key: list(records) for key, records in self.runs.items()}
+
+        def values(row: dict) -> dict:
+            key = (
+                row.get("run_id", ""),
+                (row.get("problem_name") or "").lower(),
+                (row.get("algorithm_name") or "").lower(),
+            )
+            records = pending.get(key)
+            return records.pop(0) if records else {}
+
+        return add_csv_columns(result_content, EARLY_STOP_FIELDS, values)
+
+    def report(self):
+        stopped = [r for records in self.runs.values() for r in records if r]
+        if not stopped:
+            return
+        total = sum(len(records) for records in self.runs.values())
+        saved_ll = sum(r["saved_ll_nfe"] or 0 for r in stopped)
+        saved_ul = sum(r["saved_ul_nfe"] or 0 for r in stopped)
+        print(
+            f"[EARLY STOP] {len(stopped)}/{total} runs stopped early; "
+            f"est. saved UL NFE {saved_ul:,}, LL NFE {saved_ll:,}"
+        )
+
+
+def convergence_monitor(batch_config: dict) -> Optional[ConvergenceMonitor]:
+    criteria = batch_config.get("settings", {}).get("early_stopping")
+    if not criteria:
+        return None
+    if not sace_supports("on_generation"):
+        print("[EARLY STOP] this SACE build has no on_generation hook; early_stopping is not enforced")
+        return None
+    return ConvergenceMonitor(criteria, batch_config)
+
+
+# ── Warm start ───────────────────────────────────────────────────────────────
+
+WARM_START_FIELDS = ["warm_start_job", "warm_start_seeds", "reused_ul_nfe", "reused_ll_nfe"]
+
+
+def parse_vector(text: str) -> Optional[List[float]]:
+    """Parse a solution vector as SACE writes it, e.g. ``"[ 0.06,-0.05, 0.05]"``."""
+    try:
+        return [float(v) for v in re.split(r"[\s,;]+", text.strip().strip("[]").strip()) if v]
+    except (AttributeError, ValueError):
+        return None
+
+
+def _mean(values: list) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+def _float_or_none(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def shared_problems(batch_config: dict, source_config: dict) -> set:
+    """Match keys of the problems configured identically (same name and
+    params, hence same dimensions) in both configs."""
+    source = {json.dumps(p, sort_keys=True) for p in source_config["problems"]}
+    return {
+        problem_match_key(p["name"]) for p in batch_config["problems"]
+        if json.dumps(p, sort_keys=True) in source
+    }
+
+
+class WarmStartSeeds:
+    """
+    ``initial_population`` hook: seeds from a previous job's final solutions.
+
+    SACE calls it when building a run's initial population with keyword
+    arguments ``problem``, ``level`` ("ul" or "ll") and ``dim``, and puts
+    the returned vectors (possibly none) into the population before filling
+    the rest at random. Only problems configured identically in both jobs
+    are seeded, and only with vectors of the requested dimension.
+    """
+
+    def __init__(self, source_job: int, include_ll: bool, result_content: str, problems: set):
+        self.source_job = source_job
+        self.include_ll = include_ll
+        self.seeds = {}
+        for row in csv.DictReader(io.StringIO(result_content)):
+            problem = problem_match_key(row.get("problem_name"))
+            ul = parse_vector(row.get("best_ul_solution") or "")
+            if problem not in problems or not ul or row.get("final_ul_fitness") == "ERROR":
+                continue
+            self.seeds.setdefault(problem, []).append({
+                "ul": ul,
+                "ll": parse_vector(row.get("corresponding_ll_solution") or ""),
+                "ul_nfe": _float_or_none(row.get("total_ul_nfe")),
+                "ll_nfe": _float_or_none(row.get("total_ll_nfe")),
+            })
+        # problem -> seeds actually handed to SACE
+        self.used = {}
+
+    def __call__(self, *, problem, level, dim, **_) -> list:
+        if level == "ll" and not self.include_ll:
+            return []
+        candidates = [
+            s for s in self.seeds.get(problem_match_key(problem), [])
+            if s[level] is not None and len(s[level]) == dim
+        ]
+        if candidates:
+            self.used[problem_match_key(problem)] = candidates
+        return [s[level] for s in candidates]
+
+    def annotate(self, result_content: str) -> str:
+        """Mark seeded rows with the NFE the source runs spent finding their seeds."""
+        def values(row: dict) -> dict:
+            used = self.used.get(problem_match_key(row.get("problem_name")))
+            if not used:
+                return {}
+            return {
+                "warm_start_job": self.source_job,
+                "warm_start_seeds": len(used),
+                "reused_ul_nfe": _mean([s["ul_nfe"] for s in used]),
+                "reused_ll_nfe": _mean([s["ll_nfe"] for s in used]),
+            }
+
+        return add_csv_columns(result_content, WARM_START_FIELDS, values)
+
+    def report(self):
+        if not self.used:
+            print(f"[WARM START] no seeds from job {self.source_job} matched; runs started cold")
+            return
+        for problem, used in sorted(self.used.items()):
+            print(f"[WARM START] {problem}: {len(used)} seeds from job {self.source_job}")
+
+
+def warm_start_seeds(batch_config: dict) -> Optional[WarmStartSeeds]:
+    options = batch_config.get("warm_start")
+    if not options:
+        return None
+    if not sace_supports("initial_population"):
+        print("[WARM START] this SACE build has no initial_population hook; starting cold")
+        return None
+    conn = get_db()
+    row = conn.execute(
+        "SELECT data, result_data FROM submissions WHERE id=? AND status='complete'",
+        (options["from_job"],),
+    ).fetchone()
+    conn.close()
+    if not row or not row["result_data"]:
+        print(f"[WARM START] job {options['from_job']} has no results any more; starting cold")
+        return None
+    problems = shared_problems(batch_config, json.loads(row["data"]))
+    seeds = WarmStartSeeds(options["from_job"], options["include_ll"], row["result_data"], problems)
+    if not seeds.seeds:
+        print(f"[WARM START] job {options['from_job']} has no usable results for these problems; starting cold")
+        return None
+    return seeds
+
+
+# ── Surrogate cache ──────────────────────────────────────────────────────────
+
+SURROGATE_ALGORITHMS = frozenset({"sace_es", "sace_es_mogp", "sace_es_heteroscedastic", "sace_pso"})
+SURROGATE_CACHE_FIELDS = ["surrogate_cache_points", "surrogate_cache_hyperparameters"]
+
+surrogate_cache = SurrogateCache()
+
+
+class SurrogateArchive:
+    """
+    ``surrogate_cache`` hook: surrogate training data persisted across runs.
+
+    Before fitting its first GP, each run of a surrogate algorithm calls
+    ``load(problem=, algorithm=, run_id=)`` once and gets None or a dict of
+    ``ul``, ``ll``, ``ul_fitness`` and ``ll_fitness`` arrays with that
+    algorithm's last tuned ``hyperparameters`` (or None) to start from. At
+    the end of a run it calls ``save(problem=, algorithm=, ul=, ll=,
+    ul_fitness=, ll_fitness=, hyperparameters=)`` with its archive. Loads
+    only return data when the job set ``settings.reuse_surrogates``; saves
+    always go through so later jobs can benefit.
+    """
+
+    def __init__(self, cache: SurrogateCache, problems: list, reuse: bool):
+        self.cache = cache
+        self.reuse = reuse
+        self.keys = {problem_match_key(p["name"]): problem_key(p) for p in problems}
+        # (problem, algorithm, n-th run) -> (archive points, had hyperparameters)
+        self.loaded = {}
+        self.runs = RunCounter()
+        self.lookups = 0
+        self.saved = 0
+
+    def _key(self, problem, algorithm) -> Optional[str]:
+        if str(algorithm).lower() not in SURROGATE_ALGORITHMS:
+            return None
+        return self.keys.get(problem_match_key(problem))
+
+    def load(self, *, problem, algorithm, run_id=None, **_) -> Optional[dict]:
+        key = self._key(problem, algorithm)
+        if not self.reuse or key is None:
+            return None
+        self.lookups += 1
+        run = self.runs.next(problem, algorithm)
+        entry = self.cache.load(key)
+        if entry is None:
+            return None
+        entry["hyperparameters"] = entry["hyperparameters"].get(str(algorithm).lower())
+        self.loaded[run] = (len(entry["ul"]), entry["hyperparameters"] is not None)
+        return entry
+
+    def save(self, *, problem, algorithm, ul, ll, ul_fitness, ll_fitness=None,
+             hyperparameters=None, **_):
+        key = self._key(problem, algorithm)
+        if key is None:
+            return
+        # A cache problem must never fail the run that is feeding it
+        try:
+            self.cache.store(
+                key, ul, ll, ul_fitness, ll_fitness,
+                algorithm=str(algorithm), hyperparameters=hyperparameters,
+            )
+            self.saved += 1
+        except (OSError, ValueError) as e:
+            print(f"[SURROGATE CACHE] could not save {problem}/{algorithm}: {e}")
+
+    def annotate(self, result_content: str) -> str:
+        if not self.reuse:
+            return result_content
+        rows = RunCounter()
+
+        def values(row: dict) -> dict:
+            algorithm = (row.get("algorithm_name") or "").lower()
+            if algorithm not in SURROGATE_ALGORITHMS:
+                return {}
+            loaded = self.loaded.get(rows.next(row.get("problem_name"), algorithm))
+            if loaded is None:
+                return {"surrogate_cache_points": 0}
+            return {
+                "surrogate_cache_points": loaded[0],
+                "surrogate_cache_hyperparameters": int(loaded[1]),
+            }
+
+        return add_csv_columns(result_content, SURROGATE_CACHE_FIELDS, values)
+
+    def report(self):
+        if self.reuse:
+            points = sum(n for n, _ in self.loaded.values())
+            print(
+                f"[SURROGATE CACHE] {len(self.loaded)}/{self.lookups} lookups hit; "
+                f"{points:,} archive points reused"
+            )
+        if self.saved:
+            print(f"[SURROGATE CACHE] {self.saved} run archives saved")
+
+
+def surrogate_archive(batch_config: dict) -> Optional[SurrogateArchive]:
+    if not surrogate_cache.enabled or not any(
+        a["name"].lower() in SURROGATE_ALGORITHMS for a in batch_config["algorithms"]
+    ):
+        return None
+    reuse = bool(batch_config.get("settings", {}).get("reuse_surrogates"))
+    if not sace_supports("surrogate_cache"):
+        if reuse:
+            print("[SURROGATE CACHE] this SACE build has no surrogate_cache hook; fitting from scratch")
+        return None
+    return SurrogateArchive(surrogate_cache, batch_config["problems"], reuse)
+
+
+# ── Lower-level solve cache ──────────────────────────────────────────────────
+
+NESTED_ALGORITHMS = frozenset({"nestedde", "biga_lazy", "biga_aggressive", "kktsolver"})
+LL_CACHE_FIELDS = ["ll_cache_hits", "ll_cache_misses", "est_ll_nfe_avoided"]
+
+
+class LowerLevelMemo:
+    """
+    ``ll_solve_cache`` hook: memoises a nested algorithm's LL solver.
+
+    At the start of a run SACE calls it with keyword arguments ``problem``,
+    ``algorithm``, ``run_id`` and ``solve`` (its function ``ul -> LL
+    result``) and uses the returned function instead. That function only
+    calls ``solve`` for UL vectors not seen before in this job, within the
+    same run unless ``share_across_runs`` is set. Any extra arguments are
+    passed through on a miss and are not part of the key. Runs are told
+    apart by counting these calls (see RunCounter), not by ``run_id``.
+    """
+
+    def __init__(self, settings: dict, problems: list):
+        self.cache = LowerLevelCache(settings["max_entries"], settings["tolerance"])
+        self.share = settings["share_across_runs"]
+        self.keys = {problem_match_key(p["name"]): problem_key(p) for p in problems}
+        # (problem, algorithm, n-th run) -> [hits, misses]
+        self.counts = {}
+        self.runs = RunCounter()
+
+    def __call__(self, *, problem, algorithm, run_id=None, solve, **_) -> Callable:
+        if str(algorithm).lower() not in NESTED_ALGORITHMS:
+            return solve
+        run = self.runs.next(problem, algorithm)
+        instance = self.keys.get(run[0], run[0])
+        scope = (instance,) if self.share else (instance,) + run[1:]
+        counts = self.counts.setdefault(run, [0, 0])
+        cache = self.cache
+
+        def cached_solve(ul, *args, **kwargs):
+            key = cache.key(scope, ul)
+            result = cache.get(key)
+            if result is not None:
+                counts[0] += 1
+                return result
+            counts[1] += 1
+            result = solve(ul, *args, **kwargs)
+            cache.put(key, result)
+            return result
+
+        return cached_solve
+
+    def annotate(self, result_content: str) -> str:
+        """Per-run hits/misses, plus the LL NFE the hits would have cost at
+        the average per actual solve of that (problem, algorithm)."""
+        spent = {}
+        rows = RunCounter()
+        for row in csv.DictReader(io.StringIO(result_content)):
+            run = rows.next(row.get("problem_name"), row.get("algorithm_name"))
+            counts = self.counts.get(run)
+            ll_nfe = _float_or_none(row.get("total_ll_nfe"))
+            if counts and ll_nfe is not None:
+                total = spent.setdefault(run[:2], [0.0, 0])
+                total[0] += ll_nfe
+                total[1] += counts[1]
+        rows = RunCounter()
+
+        def values(row: dict) -> dict:
+            run = rows.next(row.get("problem_name"), row.get("algorithm_name"))
+            counts = self.counts.get(run)
+            if counts is None:
+                return {}
+            hits, misses = counts
+            ll_nfe, solves = spent.get(run[:2], (0.0, 0))
+            avoided = int(ll_nfe / solves * hits) if solves else None
+            return {"ll_cache_hits": hits, "ll_cache_misses": misses, "est_ll_nfe_avoided": avoided}
+
+        return add_csv_columns(result_content, LL_CACHE_FIELDS, values)
+
+    def report(self):
+        lookups = self.cache.hits + self.cache.misses
+        if not lookups:
+            return
+        print(
+            f"[LL CACHE] {self.cache.hits:,}/{lookups:,} LL solves served from cache "
+            f"({self.cache.hits / lookups:.0%}); {len(self.cache):,} entries, "
+            f"{self.cache.evictions:,} evicted"
+        )
+
+
+def ll_solve_cache(batch_config: dict) -> Optional[LowerLevelMemo]:
+    settings = batch_config.get("settings", {}).get("ll_cache")
+    if not settings or not any(
+        a["name"].lower() in NESTED_ALGORITHMS for a in batch_config["algorithms"]
+    ):
+        return None
+    if not sace_supports("ll_solve_cache"):
+        print("[LL CACHE] this SACE build has no ll_solve_cache hook; LL solves are not memoised")
+        return None
+    return LowerLevelMemo(settings, batch_config["problems"])
+
+
+# ── Batch evaluation ─────────────────────────────────────────────────────────
+
+BATCH_CHECK_POINTS = 8
+
+
+class BatchEvaluator:
+    """
+    ``batch_evaluator`` hook: whole-population NumPy evaluation.
+
+    When a population-based algorithm (ES, PSO, DE) sets up a problem it
+    calls this with keyword arguments ``problem``, ``p``, ``q``, ``r``
+    (and ``s`` for SMD6) and ``reference``, its own per-candidate
+    ``(xu, xl) -> (F, f)``. It gets back None, meaning keep evaluating one
+    candidate at a time, or ``evaluate(XU, XL) -> (F, f)`` over population
+    matrices. Each batched function is checked against ``reference`` on a
+    few random points first and is withheld if they disagree.
+    """
+
+    def __init__(self):
+        # problem -> [populations, candidates]
+        self.counts = {}
+        self.rejected = set()
+
+    def __call__(self, *, problem, p, q, r, s=0, reference=None, **_) -> Optional[Callable]:
+        problem = str(problem).lower()
+        evaluate = batch_function(problem, p, q, r, s)
+        if evaluate is None or problem in self.rejected:
+            return None
+        ll_dim = q + (s if problem == "smd6" else 0) + r
+        if reference is not None and not self._agrees(evaluate, reference, p + r, ll_dim):
+            self.rejected.add(problem)
+            print(f"[BATCH EVAL] {problem}: batched and per-candidate values differ; not batching")
+            return None
+        counts = self.counts.setdefault(problem, [0, 0])
+
+        def counted(XU, XL):
+            F, f = evaluate(XU, XL)
+            counts[0] += 1
+            counts[1] += len(F)
+            return F, f
+
+        return counted
+
+    @staticmethod
+    def _agrees(evaluate, reference, ul_dim: int, ll_dim: int) -> bool:
+        rng = np.random.default_rng(0)
+        # Positive points keep log-based problems inside their domain
+        XU = rng.uniform(0.1, 1.0, (BATCH_CHECK_POINTS, ul_dim))
+        XL = rng.uniform(0.1, 1.0, (BATCH_CHECK_POINTS, ll_dim))
+        try:
+            F, f = evaluate(XU, XL)
+            expected = np.array([reference(xu, xl) for xu, xl in zip(XU, XL)], dtype=float)
+        except Exception:
+            return False
+        return bool(
+            np.allclose(F, expected[:, 0], rtol=1e-9, atol=1e-9, equal_nan=True)
+            and np.allclose(f, expected[:, 1], rtol=1e-9, atol=1e-9, equal_nan=True)
+        )
+
+    def report(self):
+        for problem, (populations, candidates) in sorted(self.counts.items()):
+            print(f"[BATCH EVAL] {problem}: {candidates:,} candidates in {populations:,} batched calls")
+
+
+def batch_evaluator() -> Optional[BatchEvaluator]:
+    if not sace_supports("batch_evaluator"):
+        return None
+    return BatchEvaluator()
+
+
+# ── Shared datasets ──────────────────────────────────────────────────────────
+
+DATASET_PROBLEMS = frozenset({"hyper_representation"})
+
+shared_datasets = SharedDatasets()
+
+
+class SharedDatasetHook:
+    """
+    ``shared_dataset`` hook: generate-once, memory-mapped problem data.
+
+    Where a hyper_representation problem would build its synthetic data it
+    instead calls this with keyword arguments ``problem``, ``n``, ``m``,
+    ``seed`` and ``generate`` (a function returning a dict of name ->
+    array) and uses the returned dict of read-only arrays. With no seed the
+    data isn't reproducible, so ``generate()`` is simply called.
+    """
+
+    def __init__(self, store: SharedDatasets):
+        self.store = store
+        # (problem, n, m, seed) -> [generated here, reused, bytes mapped]
+        self.usage = {}
+
+    def __call__(self, *, problem, n, m, seed=None, generate, **_) -> dict:
+        if seed is None:
+            return generate()
+        problem = str(problem).lower()
+        key = dataset_key(problem, n=int(n), m=int(m), seed=int(seed))
+        arrays, generated = self.store.get(key, generate)
+        usage = self.usage.setdefault((problem, n, m, seed), [0, 0, 0])
+        usage[0 if generated else 1] += 1
+        usage[2] = sum(a.nbytes for a in arrays.values())
+        return arrays
+
+    def report(self):
+        for (problem, n, m, seed), (generated, reused, nbytes) in sorted(self.usage.items()):
+            print(
+                f"[DATASET] {problem} n={n} m={m} seed={seed}: {nbytes / 2**20:.1f} MiB "
+                f"shared read-only; generated {generated}x, reused {reused}x"
+            )
+
+
+def shared_dataset(batch_config: dict) -> Optional[SharedDatasetHook]:
+    if not shared_datasets.enabled or not any(
+        p["name"].lower() in DATASET_PROBLEMS for p in batch_config["problems"]
+    ):
+        return None
+    if not sace_supports("shared_dataset"):
+        return None
+    return SharedDatasetHook(shared_datasets)
+
+
 @celery_app.task(bind=True, name="run_sace_job")
-def run_sace_job(self, batch_config: dict, job_id: int) -> dict:
+def run_sace_job(
+    self, batch_config: dict, job_id: int, config_signature: Optional[str] = None
+) -> dict:
     """Execute a SACE optimization job (cancellation-aware)."""
     output_key = f"job_output:{job_id}"
     cancel_key = f"job_cancel:{job_id}"
     cancelled = False
-    tmp = None
+    owner_id = get_job_owner(job_id)
 
-    # ── Defense-in-depth: re-validate before SACE ever sees this ──
+    # ── Defense-in-depth: re-validate before SACE ever sees this, unless the
+    # API's signature proves this exact payload already passed validation ──
     try:
-        batch_config = validate_config(batch_config)
+        with tracing.span("validate"):
+            if not verify_config_signature(batch_config, config_signature):
+                batch_config = validate_config(batch_config)
     except ConfigValidationError as e:
         conn = get_db()
         conn.execute(
@@ -151,6 +1338,8 @@ def run_sace_job(self, batch_config: dict, job_id: int) -> dict:
         )
         conn.commit()
         conn.close()
+        if owner_id is not None:
+            notify_jobs_changed(owner_id)
         return {"job_id": job_id, "status": "failed", "error": e.detail}
 
     # Handle SIGTERM from revoke(terminate=True) gracefully
@@ -166,93 +1355,40 @@ def run_sace_job(self, batch_config: dict, job_id: int) -> dict:
     redis_client.expire(output_key, 86400)
 
     # Mark as running
-    conn = get_db()
-    conn.execute("UPDATE submissions SET status='running' WHERE id=?", (job_id,))
-    conn.commit()
-    conn.close()
-
-    # Redirect stdout AND stderr to Redis
-    old_stdout = sys.stdout
-    old_stderr = sys.stderr
-    sys.stdout = RedisOutputCapture(job_id, redis_client, old_stdout)
-    sys.stderr = RedisOutputCapture(job_id, redis_client, old_stderr)
-
-    log_handler = RedisLoggingHandler(job_id, redis_client)
-    log_handler.setFormatter(logging.Formatter("%(message)s"))
-    root_logger = logging.getLogger()
-    root_logger.addHandler(log_handler)
+    with tracing.span("mark_running"):
+        conn = get_db()
+        conn.execute("UPDATE submissions SET status='running' WHERE id=?", (job_id,))
+        conn.commit()
+        conn.close()
+    if owner_id is not None:
+        notify_jobs_changed(owner_id)
 
     os.environ["PYTHONUNBUFFERED"] = "1"
+    meter = TaskMeter("run_sace_job", job_id)
 
     try:
-        # Check if already cancelled before starting
-        if redis_client.get(cancel_key):
-            cancelled = True
-            raise SystemExit("Job cancelled before start")
+        # Redirect stdout AND stderr to Redis
+        with capture_job_output(job_id) as transcript:
+            meter.transcript = transcript
+            # Check if already cancelled before starting
+            if redis_client.get(cancel_key):
+                cancelled = True
+                raise SystemExit("Job cancelled before start")
 
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".json", delete=False
-        ) as tmp:
-            json.dump(batch_config, tmp)
-            tmp.flush()
-            main(tmp.name)
-
-        # Parse captured output to find the results CSV filepath
-        output_str = redis_client.get(output_key) or ""
-        filepath_matches = re.findall(
-            r"All results have been saved to:\s*(.+)", output_str
-        )
-
-        result_content = ""
-        if filepath_matches:
-            raw_filepath = filepath_matches[-1].strip()
-            actual_filepath = None
-
-            timestamp_match = re.search(r"(\d{8}-\d{6})", raw_filepath)
-            if timestamp_match:
-                timestamp = timestamp_match.group(1)
-                history_dirs = [
-                    "results/history",
-                    os.path.join("SACEProject", "results/history"),
-                ]
-                for history_dir in history_dirs:
-                    if os.path.exists(history_dir):
-                        for filename in os.listdir(history_dir):
-                            if timestamp in filename and filename.endswith(".csv"):
-                                actual_filepath = os.path.join(history_dir, filename)
-                                break
-                    if actual_filepath:
-                        break
-
-            if not actual_filepath:
-                candidate_paths = [
-                    raw_filepath,
-                    os.path.join("SACEProject", raw_filepath),
-                ]
-                for path in candidate_paths:
-                    if os.path.exists(path):
-                        actual_filepath = path
-                        break
-
-            if actual_filepath:
-                with open(actual_filepath, "r") as f:
-                    result_content = f.read()
-
-        result_hash = hashlib.sha256(result_content.encode("utf-8")).hexdigest()
-        hash_algorithm = "sha256"
+            result_content = meter.result_content = run_sace(
+                batch_config, transcript, profile_as=(job_id, 0)
+            )
 
         # Mark complete and save result data
-        conn = get_db()
-        conn.execute(
-            "UPDATE submissions SET status='complete', result_data=?, result_hash=?, hash_algorithm=? WHERE id=?",
-            (result_content, result_hash, hash_algorithm, job_id),
-        )
-        conn.commit()
-        conn.close()
+        with tracing.span("store_result"):
+            store_job_result(job_id, result_content)
+        if owner_id is not None:
+            notify_jobs_changed(owner_id)
 
         redis_client.publish(f"job_stream:{job_id}", "\n[DONE]\n")
         redis_client.set(f"job_status:{job_id}", "complete")
 
+        meter.status = "complete"
         return {"job_id": job_id, "status": "complete"}
 
     except (SystemExit, KeyboardInterrupt):
@@ -268,7 +1404,10 @@ def run_sace_job(self, batch_config: dict, job_id: int) -> dict:
         )
         conn.commit()
         conn.close()
+        if owner_id is not None:
+            notify_jobs_changed(owner_id)
 
+        meter.status = "cancelled"
         return {"job_id": job_id, "status": "cancelled"}
 
     except Exception as e:
@@ -283,17 +1422,479 @@ def run_sace_job(self, batch_config: dict, job_id: int) -> dict:
         )
         conn.commit()
         conn.close()
+        if owner_id is not None:
+            notify_jobs_changed(owner_id)
 
         return {"job_id": job_id, "status": "failed", "error": str(e)}
 
     finally:
-        sys.stdout = old_stdout
-        sys.stderr = old_stderr
-        root_logger.removeHandler(log_handler)
         signal.signal(signal.SIGTERM, old_handler)
         redis_client.delete(cancel_key)
+        meter.record()
+
+
+# ── Parameter sweeps ─────────────────────────────────────────────────────────
+
+
+def set_unit_status(job_id: int, unit_index: int, status: str, **fields):
+    assignments = ", ".join(["status=?"] + [f"{k}=?" for k in fields])
+    conn = get_db()
+    conn.execute(
+        f"UPDATE work_units SET {assignments} WHERE submission_id=? AND unit_index=?",
+        (status, *fields.values(), job_id, unit_index),
+    )
+    conn.commit()
+    conn.close()
+
+
+def mark_job_running(job_id: int) -> bool:
+    """Flip a pending job to running; True if this call did it."""
+    conn = get_db()
+    cur = conn.execute(
+        "UPDATE submissions SET status='running' WHERE id=? AND status='pending'", (job_id,)
+    )
+    conn.commit()
+    conn.close()
+    return cur.rowcount > 0
+
+
+class UnitStopped(BaseException):
+    """Raised through SACE's output stream to stop a work unit that lost a race.
+
+    A BaseException so SACE's per-run ``except Exception`` can't record it as
+    an ordinary run error and carry on. It comes out of the ``print`` that
+    wrote the progress line, so SACE is abandoned mid-statement: the unit's
+    results CSV is never written and any files SACE had open are left to
+    the garbage collector. A stopped unit is reported from its output and
+    race record only.
+    """
+    def __init__(self, rung: int, fraction: float, value: float, rank: int, entrants: int, kept: int):
+        self.rung = rung
+        self.fraction = fraction
+        self.value = value
+        self.rank = rank
+        self.entrants = entrants
+        self.kept = kept
+        super().__init__(f"stopped at rung {rung}")
+
+
+class RaceMonitor:
+    """
+    Asynchronous successive halving for one work unit.
+
+    Counts SACE's per-generation progress lines (``PROGRESS_PATTERN``, which
+    must match one line per generation of every run). When the unit passes
+    a checkpoint (a fraction of ``total_steps``) its latest best fitness is
+    entered into that rung's Redis sorted set, shared by every unit of the
+    job; the unit carries on only if it ranks in the top 1/eta of the units
+    that have reached the rung so far (the first arrival always does).
+    """
+
+    def __init__(self, job_id: int, unit_index: int, plan: dict):
+        self.job_id = job_id
+        self.unit_index = unit_index
+        self.eta = plan["eta"]
+        self.sign = 1.0 if plan["direction"] == "minimize" else -1.0
+        self.checkpoints = [max(1, int(f * plan["total_steps"])) for f in plan["rungs"]]
+        self.steps = 0
+        self.latest: Optional[float] = None
+        self.total_steps = plan["total_steps"]
+        self._partial = ""
+        self._rung = 0
+
+    def feed(self, s: str):
+        lines = (self._partial + s).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            match = PROGRESS_PATTERN.search(line)
+            if match:
+                self._observe(float(match.group(1)))
+
+    def _observe(self, value: float):
+        self.steps += 1
+        self.latest = value
+        if self._rung < len(self.checkpoints) and self.steps >= self.checkpoints[self._rung]:
+            rung = self._rung
+            self._rung += 1
+            self._enter(rung, value)
+
+    def _enter(self, rung: int, value: float):
+        key = f"race:{self.job_id}:rung:{rung}"
+        pipe = redis_client.pipeline()
+        pipe.zadd(key, {str(self.unit_index): self.sign * value})
+        pipe.expire(key, 7 * 86400)
+        pipe.zrank(key, str(self.unit_index))
+        pipe.zcard(key)
+        _, _, rank, entrants = pipe.execute()
+        kept = max(entrants // self.eta, 1)
+        if rank >= kept:
+            raise UnitStopped(rung, self.steps / self.total_steps, value, rank + 1, entrants, kept)
+
+
+@celery_app.task(bind=True, name="run_sace_unit")
+def run_sace_unit(
+    self,
+    unit_config: dict,
+    job_id: int,
+    unit_index: int,
+    point: dict,
+    config_signature: Optional[str] = None,
+    race: Optional[dict] = None,
+) -> dict:
+    """Execute one work unit of a sweep; ``collect_sweep_results`` combines them.
+
+    With a ``race`` plan the unit may be stopped early by ``RaceMonitor``,
+    freeing its worker for the next queued unit. Never raises, so one failed
+    unit can't stop the chord from collecting the others.
+    """
+    output_key = f"job_output:{job_id}"
+
+    try:
+        with tracing.span("validate"):
+            if not verify_config_signature(unit_config, config_signature):
+                unit_config = validate_config(unit_config)
+    except ConfigValidationError as e:
+        set_unit_status(job_id, unit_index, "failed", error=f"Validation failed: {e.detail}")
+        return {"unit_index": unit_index, "status": "failed", "error": e.detail}
+
+    if redis_client.get(f"job_cancel:{job_id}"):
+        set_unit_status(job_id, unit_index, "cancelled")
+        return {"unit_index": unit_index, "status": "cancelled"}
+
+    def handle_sigterm(signum, frame):
+        raise SystemExit("Job cancelled by user")
+
+    old_handler = signal.signal(signal.SIGTERM, handle_sigterm)
+
+    # The first unit to start owns the job-level "running" transition
+    if mark_job_running(job_id):
+        redis_client.set(output_key, "", nx=True)
+        redis_client.expire(output_key, 86400)
+        owner_id = get_job_owner(job_id)
+        if owner_id is not None:
+            notify_jobs_changed(owner_id)
+    set_unit_status(job_id, unit_index, "running")
+
+    os.environ["PYTHONUNBUFFERED"] = "1"
+
+    # A race plan queued before RACE_PROGRESS_PATTERN was unset can't be followed
+    monitor = RaceMonitor(job_id, unit_index, race) if race and PROGRESS_PATTERN else None
+    meter = TaskMeter("run_sace_unit", job_id)
+
+    try:
+        with capture_job_output(job_id, monitor.feed if monitor else None) as transcript:
+            meter.transcript = transcript
+            print(f"\n[UNIT {unit_index}] starting {json.dumps(point)}")
+            result_content = meter.result_content = run_sace(
+                unit_config, transcript, profile_as=(job_id, unit_index)
+            )
+            print(f"[UNIT {unit_index}] complete")
+        race_status = None
+        if race:
+            race_status = "complete" if monitor and monitor.steps else "unraced"
+        if race_status == "unraced":
+            msg = (
+                f"\n[RACE] warning: unit {unit_index} {json.dumps(point)} printed no "
+                f"progress lines matching RACE_PROGRESS_PATTERN, so it was never raced "
+                f"and ran its full budget\n"
+            )
+            print(msg, end="")
+            redis_client.append(output_key, msg)
+            redis_client.publish(f"job_stream:{job_id}", msg)
+        with tracing.span("store_result"):
+            set_unit_status(
+                job_id, unit_index, "complete",
+                result_data=result_content, best_fitness=monitor.latest if monitor else None,
+                race_status=race_status,
+            )
+        meter.status = "complete"
+        return {"unit_index": unit_index, "status": "complete"}
+
+    except UnitStopped as stop:
+        msg = (
+            f"\n[RACE] unit {unit_index} {json.dumps(point)} stopped at "
+            f"{stop.fraction:.0%} of its budget (rung {stop.rung}): "
+            f"best_fitness={stop.value:g} ranked {stop.rank}/{stop.entrants}, "
+            f"top {stop.kept} continue\n"
+        )
+        redis_client.append(output_key, msg)
+        redis_client.publish(f"job_stream:{job_id}", msg)
+        set_unit_status(
+            job_id, unit_index, "stopped",
+            best_fitness=stop.value, stopped_at=stop.fraction, race_status="stopped",
+        )
+        meter.status = "stopped"
+        return {"unit_index": unit_index, "status": "stopped", "stopped_at": stop.fraction}
+
+    except (SystemExit, KeyboardInterrupt):
+        set_unit_status(job_id, unit_index, "cancelled")
+        meter.status = "cancelled"
+        return {"unit_index": unit_index, "status": "cancelled"}
+
+    except Exception as e:
+        error_msg = f"\n[UNIT {unit_index}] failed: {e}\n"
+        redis_client.append(output_key, error_msg)
+        redis_client.publish(f"job_stream:{job_id}", error_msg)
+        set_unit_status(job_id, unit_index, "failed", error=str(e))
+        return {"unit_index": unit_index, "status": "failed", "error": str(e)}
+
+    finally:
+        signal.signal(signal.SIGTERM, old_handler)
+        meter.record()
+
+
+def combine_unit_results(units: list) -> str:
+    """
+    Merge per-unit CSVs into one result set. Every row is prefixed with its
+    ``unit_index`` and the swept param values, so the combined CSV can be
+    filtered or grouped by any sweep axis. If the job was raced, race columns
+    are added for every unit, and each stopped unit gets one row recording
+    when it was stopped.
+    """
+    raced = any(unit["race_status"] for unit in units)
+    axis_labels: List[str] = []
+    result_fields: List[str] = []
+    rows = []
+    for unit in units:
+        point = json.loads(unit["point"])
+        for label in point:
+            if label not in axis_labels:
+                axis_labels.append(label)
+        prefix = {"unit_index": unit["unit_index"], **point}
+        if raced:
+            prefix.update(
+                race_status=unit["race_status"] or unit["status"],
+                race_stopped_at=unit["stopped_at"],
+                race_best_fitness=unit["best_fitness"],
+            )
+        if unit["status"] == "stopped":
+            rows.append(prefix)
+            continue
+        reader = csv.DictReader(io.StringIO(unit["result_data"] or ""))
+        for field in reader.fieldnames or []:
+            if field not in result_fields and field not in axis_labels:
+                result_fields.append(field)
+        for row in reader:
+            rows.append({**prefix, **row})
+
+    race_fields = ["race_status", "race_stopped_at", "race_best_fitness"] if raced else []
+    out = io.StringIO()
+    writer = csv.DictWriter(
+        out,
+        fieldnames=["unit_index", *axis_labels, *race_fields, *result_fields],
+        lineterminator="\n",
+    )
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue()
+
+
+@celery_app.task(bind=True, name="collect_sweep_results")
+def collect_sweep_results(self, unit_results: list, job_id: int) -> dict:
+    """Chord callback: combine finished work units into the job's result."""
+    output_key = f"job_output:{job_id}"
+    cancel_key = f"job_cancel:{job_id}"
+    owner_id = get_job_owner(job_id)
+
+    try:
+        conn = get_db()
+        job = conn.execute("SELECT status FROM submissions WHERE id=?", (job_id,)).fetchone()
+        units = conn.execute(
+            "SELECT unit_index, point, status, result_data, best_fitness, stopped_at, race_status "
+            "FROM work_units "
+            "WHERE submission_id=? ORDER BY unit_index",
+            (job_id,),
+        ).fetchall()
+        conn.close()
+
+        if job is None:
+            return {"job_id": job_id, "status": "deleted"}
+
+        counts = {}
+        for unit in units:
+            counts[unit["status"]] = counts.get(unit["status"], 0) + 1
+        summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+        redis_client.append(output_key, f"\n[SWEEP] {len(units)} units: {summary}\n")
+
+        if redis_client.get(cancel_key) or job["status"] == "cancelled":
+            status = "cancelled"
+            conn = get_db()
+            conn.execute("UPDATE submissions SET status='cancelled' WHERE id=?", (job_id,))
+            conn.commit()
+            conn.close()
+            redis_client.publish(f"job_stream:{job_id}", "\n[CANCELLED]\n")
+        elif counts.get("complete"):
+            # Partial sweeps still produce a result; the log records the failures
+            status = "complete"
+            with tracing.span("store_result"):
+                store_job_result(
+                    job_id,
+                    combine_unit_results([u for u in units if u["status"] in ("complete", "stopped")]),
+                )
+            redis_client.publish(f"job_stream:{job_id}", "\n[DONE]\n")
+        else:
+            status = "failed"
+            conn = get_db()
+            conn.execute("UPDATE submissions SET status='failed' WHERE id=?", (job_id,))
+            conn.commit()
+            conn.close()
+            redis_client.publish(f"job_stream:{job_id}", "\n[ERROR] Every sweep unit failed\n")
+
+        redis_client.set(f"job_status:{job_id}", status)
+        if owner_id is not None:
+            notify_jobs_changed(owner_id)
+        return {"job_id": job_id, "status": status, "units": counts}
+
+    finally:
+        redis_client.delete(cancel_key)
+
+
+# ── Dry-run calibration ──────────────────────────────────────────────────────
+
+
+class TranscriptWriter(io.TextIOBase):
+    """stdout replacement that only collects output, for runs with no job log."""
+
+    def __init__(self, transcript: List[str]):
+        self.transcript = transcript
+
+    def write(self, s: str) -> int:
+        self.transcript.append(s)
+        return len(s)
+
+
+def _per_generation(value, generations: int) -> Optional[float]:
+    try:
+        return float(value) / generations
+    except (TypeError, ValueError):
+        return None
+
+
+def measure_probe(probe: dict) -> dict:
+    """Run one short probe config and time it."""
+    config = probe["config"]
+    generations = config["algorithms"][0]["params"]["generations"]
+    transcript: List[str] = []
+    start = time.perf_counter()
+    with redirect_stdout(TranscriptWriter(transcript)):
+        result_content = run_sace(config, transcript)
+    seconds = time.perf_counter() - start
+
+    rows = list(csv.DictReader(io.StringIO(result_content)))
+    if not rows or rows[0].get("final_ul_fitness") == "ERROR":
+        error = rows[0].get("corresponding_ll_solution") if rows else "no results written"
+        return {"pair": probe["pair"], "error": error or "run failed"}
+    return {
+        "pair": probe["pair"],
+        "generations": generations,
+        "seconds": seconds,
+        "seconds_per_generation": seconds / generations,
+        "ul_nfe_per_generation": _per_generation(rows[0].get("total_ul_nfe"), generations),
+        "ll_nfe_per_generation": _per_generation(rows[0].get("total_ll_nfe"), generations),
+    }
+
+
+def refresh_cost_weights(conn) -> dict:
+    """
+    Recompute admission-control weights: each pair's median seconds per cost
+    unit over its recent samples, relative to the median across pairs and
+    clamped to [0.1, 10]. Published through Redis for the API to pick up.
+    """
+    per_unit = {}
+    for row in conn.execute(
+        "SELECT pair, seconds_per_generation / cost_units_per_generation AS s "
+        "FROM calibration_samples ORDER BY id DESC"
+    ):
+        samples = per_unit.setdefault(row["pair"], [])
+        if len(samples) < CALIBRATION_WINDOW:
+            samples.append(row["s"])
+    if not per_unit:
+        return {}
+    medians = {pair: statistics.median(v) for pair, v in per_unit.items()}
+    reference = statistics.median(medians.values()) or 1.0
+    weights = {pair: min(max(m / reference, 0.1), 10.0) for pair, m in medians.items()}
+
+    pipe = redis_client.pipeline()
+    pipe.set("cost_weights", json.dumps(weights))
+    pipe.incr("cost_weights_version")
+    pipe.execute()
+    return weights
+
+
+def extrapolate(plan: list, measured: list) -> dict:
+    """Scale probe measurements up to the full config (and each sweep unit)."""
+    units = {}
+    # NFE stays None unless SACE reported it for some pair
+    totals = {"worker_seconds": 0.0, "ul_nfe": None, "ll_nfe": None}
+    for probe, m in zip(plan, measured):
+        if "error" in m:
+            continue
+        for unit_index, generations, runs in probe["occurrences"]:
+            seconds = m["seconds_per_generation"] * generations * runs
+            unit = units.setdefault(unit_index, {"unit_index": unit_index, "worker_seconds": 0.0})
+            unit["worker_seconds"] += seconds
+            totals["worker_seconds"] += seconds
+            for nfe in ("ul_nfe", "ll_nfe"):
+                if m[f"{nfe}_per_generation"] is not None:
+                    totals[nfe] = (totals[nfe] or 0.0) + m[f"{nfe}_per_generation"] * generations * runs
+
+    longest = max((u["worker_seconds"] for u in units.values()), default=0.0)
+    estimate = {
+        **{k: None if v is None else round(v) for k, v in totals.items()},
+        # Units of a sweep run in parallel, a plain job on one worker
+        "eta_seconds": round(max(longest, totals["worker_seconds"] / max(WORKER_SLOTS, 1))),
+    }
+    if None not in units:
+        estimate["units"] = [
+            {"unit_index": u["unit_index"], "worker_seconds": round(u["worker_seconds"])}
+            for u in sorted(units.values(), key=lambda u: u["unit_index"])
+        ]
+    return estimate
+
+
+@celery_app.task(bind=True, name="calibrate_config")
+def calibrate_config(self, calibration_id: str, validated: dict, user_id: int) -> dict:
+    """
+    Dry run: time a few generations of every (problem, algorithm) pair,
+    extrapolate cost and ETA for the full config, and keep the samples as
+    calibration data for admission control.
+    """
+    key = f"calibration:{calibration_id}"
+    state = {"calibration_id": calibration_id, "user_id": user_id, "status": "running"}
+    redis_client.set(key, json.dumps(state), ex=86400)
+
+    try:
+        plan = calibration_plan(validated)
+        measured = []
+        conn = get_db()
         try:
-            if tmp:
-                os.unlink(tmp.name)
-        except OSError:
-            pass
\ No newline at end of file
+            for probe in plan:
+                m = measure_probe(probe)
+                measured.append(m)
+                if "error" not in m:
+                    conn.execute(
+                        "INSERT INTO calibration_samples (pair, config, generations, seconds, "
+                        "seconds_per_generation, ul_nfe_per_generation, ll_nfe_per_generation, "
+                        "cost_units_per_generation) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            probe["pair"], json.dumps(probe["config"]), m["generations"],
+                            m["seconds"], m["seconds_per_generation"],
+                            m["ul_nfe_per_generation"], m["ll_nfe_per_generation"],
+                            cost_units_per_generation(probe["config"]["algorithms"][0]),
+                        ),
+                    )
+            conn.commit()
+            refresh_cost_weights(conn)
+        finally:
+            conn.close()
+
+        state.update(
+            status="complete",
+            pairs=measured,
+            estimate=extrapolate(plan, measured),
+        )
+    except Exception as e:
+        state.update(status="failed", error=str(e))
+
+    redis_client.set(key, json.dumps(state), ex=86400)
+    return {"calibration_id": calibration_id, "status": state["status"]}
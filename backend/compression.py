@@ -0,0 +1,141 @@
+"""
+compression.py
+
+Content-Encoding negotiation for the API's large text payloads (job logs,
+result CSVs, job lists). Job results are compressed once by the worker at
+completion and stored in ``result_blobs``; everything else is compressed on
+the fly when it is worth it.
+
+zstd and brotli are optional — if their modules are missing the encoding is
+simply never offered, and gzip (stdlib) is always available.
+"""
+
+import gzip
+import os
+from typing import Dict, Optional
+
+from fastapi.responses import Response
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Bodies smaller than this are sent as-is; the framing overhead isn't worth it
+MIN_COMPRESS_BYTES = int(os.environ.get("MIN_COMPRESS_BYTES", 1024))
+
+# Levels tuned for on-the-fly use; precompressed results use the max levels
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+BROTLI_QUALITY = 5
+
+# Server preference when the client weights several encodings equally
+_PREFERENCE = ("zstd", "br", "gzip")
+
+AVAILABLE_ENCODINGS = tuple(
+    enc
+    for enc in _PREFERENCE
+    if enc == "gzip"
+    or (enc == "zstd" and zstandard is not None)
+    or (enc == "br" and brotli is not None)
+)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best encoding we support from an Accept-Encoding header.
+
+    Returns None when the client accepts none of them (identity).
+    """
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best, best_q = None, 0.0
+    for enc in AVAILABLE_ENCODINGS:
+        q = weights.get(enc, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+def compress(body: bytes, encoding: str, precompute: bool = False) -> bytes:
+    """Compress ``body``. ``precompute`` trades CPU for size (done once per result)."""
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9 if precompute else GZIP_LEVEL, mtime=0)
+    if encoding == "zstd":
+        level = 19 if precompute else ZSTD_LEVEL
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if precompute else BROTLI_QUALITY)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompress(body)
+    if encoding == "br":
+        return brotli.decompress(body)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """Compress ``body`` in every available encoding, for storage alongside it."""
+    if len(body) < MIN_COMPRESS_BYTES:
+        return {}
+    return {enc: compress(body, enc, precompute=True) for enc in AVAILABLE_ENCODINGS}
+
+
+def response_encoding(body: bytes, accept_encoding: Optional[str]) -> Optional[str]:
+    """The encoding ``encoded_response`` will apply to ``body``; None for identity."""
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding and len(body) >= MIN_COMPRESS_BYTES:
+        return encoding
+    return None
+
+
+def encoded_response(
+    body: bytes,
+    accept_encoding: Optional[str],
+    media_type: str = "application/json",
+    headers: Optional[dict] = None,
+) -> Response:
+    """Build a Response, compressing ``body`` if the client and size allow it."""
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    encoding = response_encoding(body, accept_encoding)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        body = compress(body, encoding)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def precompressed_response(
+    body: bytes, encoding: str, media_type: str = "application/json", headers: Optional[dict] = None
+) -> Response:
+    """Serve a body that was already compressed with ``encoding``."""
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
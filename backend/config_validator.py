@@ -3,8 +3,34 @@ config_validator.py
 
 Validation layer for user-submitted SACE optimization configs.
 Called in the FastAPI endpoint BEFORE anything is persisted or dispatched.
+
+Outcomes (valid and invalid) are memoised per process, keyed on the sha256 of
+the config's canonical JSON, so resubmitting the same file skips Pydantic.
+When CONFIG_SIGNING_KEY is set the API also signs that hash, and the worker
+can skip its defense-in-depth re-validation for a payload whose signature
+proves it is exactly what the API validated.
+
+A param given as ``{"sweep": [...]}`` or ``{"sweep": {"min", "max", "step"}}``
+makes the config a parameter sweep: ``expand_work_units`` turns it into one
+concrete config per grid point (or Latin-hypercube sample), each of which is
+validated on its own. The expanded total counts against both the run cap and
+the ``estimate_cost`` budget. With ``racing`` set, algorithms are split into
+separate units too, and each unit carries a successive-halving plan so the
+worker can stop losing configs at budget checkpoints.
+
+``estimate_cost`` weighs each (problem, algorithm) pair by its measured
+speed once a dry-run calibration (``calibration_plan``) has covered it.
 """
 
+import hashlib
+import hmac
+import itertools
+import json
+import os
+import random
+import threading
+from collections import OrderedDict
+
 from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Optional
 
@@ -35,6 +61,24 @@ MAX_ALGORITHMS = 5
 MAX_TOTAL_RUNS = 500
 MAX_CONFIG_SIZE_BYTES = 64 * 1024  # 64 KB
 
+# ── Sweeps / cost budget ────────────────────────────────────────────────
+MAX_SWEEP_VALUES = 32   # values per swept param
+MAX_SWEEP_UNITS = int(os.environ.get("MAX_SWEEP_UNITS", 64))
+# Budget in estimate_cost() units (~ UL gens x UL pop x LL pop, summed over runs)
+MAX_TOTAL_COST = int(os.environ.get("MAX_TOTAL_COST", 2_500_000_000))
+# Assumed for params left to SACE's defaults — only used for budgeting
+COST_DEFAULTS = {"generations": 100, "ul_pop_size": 50, "ll_pop_size": 50}
+# Generations per (problem, algorithm) pair in a dry-run calibration
+CALIBRATION_GENERATIONS = int(os.environ.get("CALIBRATION_GENERATIONS", 3))
+
+# Per-job bound on memoised lower-level optima (worker memory)
+MAX_LL_CACHE_ENTRIES = int(os.environ.get("MAX_LL_CACHE_ENTRIES", 100_000))
+
+# ── Memoisation / signing ───────────────────────────────────────────────
+VALIDATION_CACHE_SIZE = int(os.environ.get("VALIDATION_CACHE_SIZE", 512))
+# Shared by API and worker; unset means the worker always re-validates
+CONFIG_SIGNING_KEY = os.environ.get("CONFIG_SIGNING_KEY", "")
+
 
 # ── Param schemas (extra="allow" lets unknown keys pass through to SACE) ─
 class ProblemParams(BaseModel):
@@ -98,9 +142,103 @@ class AlgorithmConfig(BaseModel):
         return v
 
 
+class EarlyStopping(BaseModel):
+    """Per-run convergence criterion, enforced by the worker's on_generation hook."""
+    # Stop after this many generations without an improvement > min_delta
+    patience: Optional[int] = Field(None, ge=1, le=10_000)
+    min_delta: float = Field(0.0, ge=0)
+    # Stop as soon as best_fitness reaches this value
+    target_fitness: Optional[float] = None
+    direction: str = Field("minimize", pattern=r"^(minimize|maximize)$")
+
+    class Config:
+        extra = "forbid"
+
+    @model_validator(mode="after")
+    def needs_a_criterion(self):
+        if self.patience is None and self.target_fitness is None:
+            raise ValueError("early_stopping needs 'patience' and/or 'target_fitness'")
+        return self
+
+
+class LowerLevelCacheSettings(BaseModel):
+    """Memoised LL optima for nested algorithms, served by the worker's ll_solve_cache hook."""
+    # 0 reuses only exact UL vectors; otherwise UL coordinates are rounded to this grid
+    tolerance: float = Field(0.0, ge=0, le=1)
+    # Let every independent run of the job reuse the others' LL optima
+    share_across_runs: bool = False
+    max_entries: int = Field(10_000, ge=1, le=MAX_LL_CACHE_ENTRIES)
+
+    class Config:
+        extra = "forbid"
+
+
 class ExperimentSettings(BaseModel):
     independent_runs: int = Field(default=30, ge=1, le=MAX_INDEPENDENT_RUNS)
     seed: Optional[int] = Field(default=None, ge=0, le=2**32 - 1)
+    early_stopping: Optional[EarlyStopping] = None
+    # Start surrogate algorithms from the worker's cached archives for this problem
+    reuse_surrogates: Optional[bool] = None
+    ll_cache: Optional[LowerLevelCacheSettings] = None
+
+    class Config:
+        extra = "forbid"
+
+
+class SweepRange(BaseModel):
+    """Numeric range for a swept param; ``step`` is required for grid sweeps."""
+    min: float
+    max: float
+    step: Optional[float] = Field(None, gt=0)
+
+    class Config:
+        extra = "forbid"
+
+    @model_validator(mode="after")
+    def check_bounds(self):
+        if self.max < self.min:
+            raise ValueError("sweep range max must be >= min")
+        if self.step is not None and (self.max - self.min) / self.step + 1 > MAX_SWEEP_VALUES:
+            raise ValueError(f"sweep range yields more than {MAX_SWEEP_VALUES} values")
+        return self
+
+
+class SweepSettings(BaseModel):
+    mode: str = Field("grid", pattern=r"^(grid|lhs)$")
+    # Number of Latin-hypercube samples (lhs mode only)
+    samples: Optional[int] = Field(None, ge=1, le=MAX_SWEEP_UNITS)
+    # Fixed at validation time when omitted, so re-expansion is deterministic
+    seed: Optional[int] = Field(None, ge=0, le=2**32 - 1)
+
+    class Config:
+        extra = "forbid"
+
+    @model_validator(mode="after")
+    def samples_for_lhs(self):
+        if self.mode == "lhs" and self.samples is None:
+            raise ValueError("sweep mode 'lhs' requires 'samples'")
+        if self.mode == "grid" and self.samples is not None:
+            raise ValueError("'samples' only applies to sweep mode 'lhs'")
+        return self
+
+
+class RacingSettings(BaseModel):
+    """Successive halving across the work units of one submission."""
+    # Only the best 1/eta of the units reaching a checkpoint carry on
+    eta: int = Field(3, ge=2, le=8)
+    # First checkpoint as a fraction of a unit's generation budget; the
+    # rest follow at min_budget * eta**k
+    min_budget: float = Field(0.1, gt=0, lt=1)
+    direction: str = Field("minimize", pattern=r"^(minimize|maximize)$")
+
+    class Config:
+        extra = "forbid"
+
+
+class WarmStart(BaseModel):
+    """Seed initial populations from a previous job's final solutions."""
+    from_job: int = Field(ge=1)
+    include_ll: bool = False
 
     class Config:
         extra = "forbid"
@@ -112,6 +250,11 @@ class BatchConfig(BaseModel):
         pattern=r"^[a-zA-Z0-9_\- ]+$",
     )
     settings: ExperimentSettings = ExperimentSettings()
+    sweep: Optional[SweepSettings] = None
+    racing: Optional[RacingSettings] = None
+    warm_start: Optional[WarmStart] = None
+    # Run SACE under the profiler (admin-only; the API enforces who may set it)
+    profile: Optional[bool] = None
     problems: list[ProblemConfig] = Field(min_length=1, max_length=MAX_PROBLEMS)
     algorithms: list[AlgorithmConfig] = Field(min_length=1, max_length=MAX_ALGORITHMS)
 
@@ -141,6 +284,431 @@ class ConfigValidationError(Exception):
         super().__init__(detail)
 
 
+class _ValidationCache:
+    """LRU of ``config hash -> (ok, validated JSON text | error detail)``."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: tuple):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_cache = _ValidationCache(VALIDATION_CACHE_SIZE)
+
+
+def canonical_json(config: dict) -> str:
+    """Key-sorted, whitespace-free JSON — equal configs give equal text."""
+    return json.dumps(config, sort_keys=True, separators=(",", ":"))
+
+
+def config_hash(config: dict) -> str:
+    return hashlib.sha256(canonical_json(config).encode()).hexdigest()
+
+
+def sign_config(validated: dict) -> Optional[str]:
+    """HMAC over a validated config's hash, or None if signing is disabled."""
+    if not CONFIG_SIGNING_KEY:
+        return None
+    return hmac.new(
+        CONFIG_SIGNING_KEY.encode(), config_hash(validated).encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def verify_config_signature(config: dict, signature: Optional[str]) -> bool:
+    """True if ``signature`` proves ``config`` is exactly what the API validated."""
+    expected = sign_config(config)
+    return bool(expected and signature) and hmac.compare_digest(expected, signature)
+
+
+def validation_cache_stats() -> dict:
+    return _cache.stats()
+
+
+# ── Sweep expansion / cost budget ──────────────────────────────────────
+def _dump(config: BatchConfig) -> dict:
+    """model_dump() without the optional sections the config didn't use, so
+    configs that don't opt in look exactly as they did before those existed."""
+    dumped = config.model_dump()
+    for key in ("sweep", "racing", "warm_start", "profile"):
+        if dumped[key] is None:
+            del dumped[key]
+    for key in ("early_stopping", "reuse_surrogates", "ll_cache"):
+        if dumped["settings"][key] is None:
+            del dumped["settings"][key]
+    return dumped
+
+
+def _split_sweeps(raw: dict) -> tuple:
+    """Copy ``raw`` with every ``{"sweep": ...}`` param removed.
+
+    Returns ``(template, axes)`` where each axis is ``(section, index, key, spec)``.
+    """
+    template = json.loads(json.dumps(raw))
+    axes = []
+    if not isinstance(template, dict):
+        return template, axes
+    for section in ("problems", "algorithms"):
+        entries = template.get(section)
+        if not isinstance(entries, list):
+            continue
+        for i, entry in enumerate(entries):
+            params = entry.get("params") if isinstance(entry, dict) else None
+            if not isinstance(params, dict):
+                continue
+            for key in list(params):
+                value = params[key]
+                if isinstance(value, dict) and set(value) == {"sweep"}:
+                    axes.append((section, i, key, params.pop(key)["sweep"]))
+    return template, axes
+
+
+def _axis_label(section: str, index: int, key: str) -> str:
+    return f"{section}[{index}].{key}"
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _axis_domain(label: str, spec, mode: str) -> dict:
+    """Resolve a sweep spec to ``{"values": [...]}`` or a continuous ``{"range": ...}``."""
+    if isinstance(spec, list):
+        if not 1 <= len(spec) <= MAX_SWEEP_VALUES:
+            raise ConfigValidationError(
+                f"Sweep for {label} must list between 1 and {MAX_SWEEP_VALUES} values."
+            )
+        if not all(isinstance(v, (str, int, float, bool)) for v in spec):
+            raise ConfigValidationError(f"Sweep values for {label} must be scalars.")
+        return {"values": spec}
+
+    if not isinstance(spec, dict):
+        raise ConfigValidationError(
+            f"Sweep for {label} must be a list of values or a {{min, max, step}} range."
+        )
+    try:
+        rng = SweepRange.model_validate(spec)
+    except Exception as e:
+        raise ConfigValidationError(f"Invalid sweep range for {label}: {e}") from e
+
+    integer = _is_int(spec["min"]) and _is_int(spec["max"]) and _is_int(spec.get("step", 1))
+    cast = int if integer else float
+    if rng.step is not None:
+        count = int((rng.max - rng.min) / rng.step + 1e-9) + 1
+        return {"values": [cast(rng.min + i * rng.step) for i in range(count)]}
+    if mode == "grid":
+        raise ConfigValidationError(f"Grid sweep range for {label} needs a 'step'.")
+    return {"range": (rng.min, rng.max), "integer": integer}
+
+
+def _sweep_points(labels: list, domains: list, settings: dict) -> list:
+    """Grid: cartesian product. LHS: one sample per stratum of every axis."""
+    if settings["mode"] == "grid":
+        total = 1
+        for d in domains:
+            total *= len(d["values"])
+        if total > MAX_SWEEP_UNITS:
+            raise ConfigValidationError(
+                f"Sweep expands to {total} work units; the limit is {MAX_SWEEP_UNITS}."
+            )
+        return [dict(zip(labels, combo)) for combo in itertools.product(*(d["values"] for d in domains))]
+
+    n = settings["samples"]
+    rng = random.Random(settings["seed"])
+    columns = []
+    for d in domains:
+        column = []
+        for stratum in rng.sample(range(n), n):
+            u = (stratum + rng.random()) / n
+            if "values" in d:
+                values = d["values"]
+                column.append(values[min(int(u * len(values)), len(values) - 1)])
+            else:
+                lo, hi = d["range"]
+                v = lo + u * (hi - lo)
+                column.append(int(round(v)) if d["integer"] else round(v, 6))
+        columns.append(column)
+
+    # Rounding / categorical axes can collide; duplicates would just rerun a unit
+    points, seen = [], set()
+    for row in zip(*columns):
+        point = dict(zip(labels, row))
+        key = canonical_json(point)
+        if key not in seen:
+            seen.add(key)
+            points.append(point)
+    return points
+
+
+def expand_work_units(validated: dict) -> list:
+    """
+    Expand a validated sweep config into concrete, individually validated
+    configs: ``[{"index", "point", "config"}]`` where ``point`` maps axis
+    labels such as ``algorithms[0].ul_pop_size`` to this unit's value.
+
+    With racing, each algorithm becomes its own unit (``point["algorithm"]``)
+    and every unit gets a ``"race"`` plan, see ``race_plan``.
+
+    Returns ``[]`` for a config without a sweep or racing (it runs as a
+    single job).
+    """
+    settings = validated.get("sweep")
+    racing = validated.get("racing")
+    if not settings and not racing:
+        return []
+    template, axes = _split_sweeps(validated)
+    template.pop("sweep", None)
+    template.pop("racing", None)
+    if settings:
+        labels = [_axis_label(section, i, key) for section, i, key, _ in axes]
+        domains = [
+            _axis_domain(label, spec, settings["mode"])
+            for label, (_, _, _, spec) in zip(labels, axes)
+        ]
+        points = _sweep_points(labels, domains, settings)
+    else:
+        points = [{}]
+
+    units, seen = [], set()
+    for point in points:
+        unit = json.loads(json.dumps(template))
+        for (section, i, key, _), value in zip(axes, point.values()):
+            entry = unit[section][i]
+            entry["params"] = dict(entry.get("params") or {}, **{key: value})
+
+        variants = [(point, unit)]
+        if racing:
+            # Race algorithms against each other, not just param values;
+            # an algorithm's unit only keeps the axes that belong to it
+            variants = []
+            for i, algorithm in enumerate(unit["algorithms"]):
+                own = {
+                    label: value for label, value in point.items()
+                    if not label.startswith("algorithms[") or label.startswith(f"algorithms[{i}].")
+                }
+                variants.append(({"algorithm": algorithm["name"], **own}, dict(unit, algorithms=[algorithm])))
+
+        for unit_point, unit_config in variants:
+            try:
+                config = _dump(BatchConfig.model_validate(unit_config))
+            except Exception as e:
+                raise ConfigValidationError(f"Sweep unit {unit_point} is invalid: {e}") from e
+            key = canonical_json(config)
+            if key in seen:
+                continue
+            seen.add(key)
+            entry = {"index": len(units), "point": unit_point, "config": config}
+            if racing:
+                entry["race"] = race_plan(config, racing)
+            units.append(entry)
+    return units
+
+
+def race_plan(config: dict, racing: dict) -> dict:
+    """
+    Checkpoints for one raced unit. ``total_steps`` is the number of
+    per-generation progress lines SACE will print for it, assuming one line
+    per generation of every run, so the worker can turn "lines seen" into a
+    fraction of the unit's budget.
+    """
+    generations = 0
+    for algorithm in config["algorithms"]:
+        gens = (algorithm.get("params") or {}).get("generations")
+        if not gens:
+            raise ConfigValidationError(
+                f"Racing needs 'generations' set for algorithm '{algorithm['name']}' "
+                "so budget checkpoints can be placed."
+            )
+        generations += gens
+
+    rungs, fraction = [], racing["min_budget"]
+    while fraction < 1:
+        rungs.append(round(fraction, 6))
+        fraction *= racing["eta"]
+    return {
+        "eta": racing["eta"],
+        "direction": racing["direction"],
+        "rungs": rungs,
+        "total_steps": generations * len(config["problems"]) * config["settings"]["independent_runs"],
+    }
+
+
+# Relative cost per (problem, algorithm) pair, from dry-run calibrations;
+# pairs without one weigh 1.0
+_cost_weights: dict = {}
+
+
+def pair_key(problem: str, algorithm: str) -> str:
+    return f"{problem.lower()}/{algorithm.lower()}"
+
+
+def set_cost_weights(weights: dict):
+    """Install new calibration weights; memoised verdicts used the old ones."""
+    global _cost_weights
+    _cost_weights = dict(weights)
+    _cache.clear()
+
+
+# ── SACE capabilities ───────────────────────────────────────────────────
+# Options that only work through a SACE ``main()`` hook (or, for racing,
+# through progress lines the worker can parse), keyed by where they sit in
+# the config; the worker reports which of these the installed SACE has
+HOOK_OPTIONS = {
+    ("settings", "early_stopping"): "on_generation",
+    ("", "warm_start"): "initial_population",
+    ("settings", "reuse_surrogates"): "surrogate_cache",
+    ("settings", "ll_cache"): "ll_solve_cache",
+    ("", "racing"): "progress_lines",
+}
+
+_sace_features: frozenset = frozenset()
+
+
+def set_sace_features(features):
+    """Record the hooks SACE accepts; memoised verdicts assumed the old set."""
+    global _sace_features
+    _sace_features = frozenset(features)
+    _cache.clear()
+
+
+def _check_features(validated: dict):
+    """Reject options the installed SACE would silently ignore."""
+    for (section, key), feature in HOOK_OPTIONS.items():
+        value = (validated.get(section) or {}).get(key) if section else validated.get(key)
+        if value and feature not in _sace_features:
+            name = f"{section}.{key}" if section else key
+            raise ConfigValidationError(
+                f"'{name}' is not supported by this SACE build (missing: {feature})."
+            )
+
+
+def cost_units_per_generation(algorithm: dict) -> int:
+    params = algorithm.get("params") or {}
+    return (params.get("ul_pop_size") or COST_DEFAULTS["ul_pop_size"]) * (
+        params.get("ll_pop_size") or COST_DEFAULTS["ll_pop_size"]
+    )
+
+
+def estimate_cost(config: dict) -> int:
+    """
+    Rough work estimate for one concrete config: UL generations x UL pop x
+    LL pop per run, over every problem/algorithm pair, scaled by the pair's
+    calibration weight. Only meaningful relative to MAX_TOTAL_COST — it is
+    for admission control, not timing.
+    """
+    per_run = 0.0
+    for problem in config["problems"]:
+        for algorithm in config["algorithms"]:
+            gens = (algorithm.get("params") or {}).get("generations") or COST_DEFAULTS["generations"]
+            weight = _cost_weights.get(pair_key(problem["name"], algorithm["name"]), 1.0)
+            per_run += gens * cost_units_per_generation(algorithm) * weight
+    return int(per_run * config["settings"]["independent_runs"])
+
+
+def calibration_plan(validated: dict) -> list:
+    """
+    Probe configs for a dry run: one short single-run config per distinct
+    (problem, algorithm) pair across all work units. Each entry also lists
+    the full-size ``occurrences`` it stands in for, as ``(unit_index,
+    generations, runs)`` (``unit_index`` is None for a plain job), so the
+    measurements can be extrapolated.
+    """
+    units = expand_work_units(validated) or [{"index": None, "config": validated}]
+    probes = {}
+    for unit in units:
+        config = unit["config"]
+        for problem in config["problems"]:
+            for algorithm in config["algorithms"]:
+                params = dict(algorithm.get("params") or {})
+                generations = params.get("generations") or COST_DEFAULTS["generations"]
+                params["generations"] = min(CALIBRATION_GENERATIONS, generations)
+                probe_algorithm = {"name": algorithm["name"], "params": params}
+                key = canonical_json({"problem": problem, "algorithm": probe_algorithm})
+                if key not in probes:
+                    probes[key] = {
+                        "pair": pair_key(problem["name"], algorithm["name"]),
+                        "config": {
+                            "experiment_name": "Calibration",
+                            "settings": {
+                                "independent_runs": 1,
+                                "seed": config["settings"].get("seed"),
+                            },
+                            "problems": [problem],
+                            "algorithms": [probe_algorithm],
+                        },
+                        "occurrences": [],
+                    }
+                probes[key]["occurrences"].append(
+                    (unit["index"], generations, config["settings"]["independent_runs"])
+                )
+    return list(probes.values())
+
+
+def _check_budget(configs: list):
+    runs = sum(
+        len(c["problems"]) * len(c["algorithms"]) * c["settings"]["independent_runs"]
+        for c in configs
+    )
+    if runs > MAX_TOTAL_RUNS:
+        raise ConfigValidationError(
+            f"Total scheduled runs across the sweep ({runs}) exceeds the "
+            f"{MAX_TOTAL_RUNS}-run safety cap."
+        )
+    cost = sum(estimate_cost(c) for c in configs)
+    if cost > MAX_TOTAL_COST:
+        raise ConfigValidationError(
+            f"Estimated cost ({cost:,}) exceeds the budget of {MAX_TOTAL_COST:,}. "
+            "Reduce runs, population sizes, generations, or sweep points."
+        )
+
+
+def _attach_sweep(validated: dict, axes: list) -> bool:
+    """Put the (validated) sweep specs back and pin the sampling seed.
+
+    Returns True if the seed was drawn at random here.
+    """
+    if not axes:
+        raise ConfigValidationError(
+            "'sweep' settings given but no param uses {\"sweep\": ...}."
+        )
+    settings = validated.get("sweep") or SweepSettings().model_dump()
+    drawn = settings["seed"] is None
+    if drawn:
+        settings["seed"] = random.randrange(2**32)
+    validated["sweep"] = settings
+    for section, i, key, spec in axes:
+        entry = validated[section][i]
+        entry["params"] = dict(entry["params"] or {}, **{key: {"sweep": spec}})
+    return drawn
+
+
 def validate_config(raw_dict: dict) -> dict:
     """
     Validate a config dict and return a sanitised copy.
@@ -153,11 +721,9 @@ def validate_config(raw_dict: dict) -> dict:
 
     Raises ConfigValidationError with a user-friendly message on failure.
     """
-    import json
-
-    # 1. Size gate — serialise to check byte length before heavy validation
+    # 1. Size gate — the canonical form doubles as the memoisation key
     try:
-        raw_json = json.dumps(raw_dict)
+        raw_json = canonical_json(raw_dict)
     except (TypeError, ValueError) as e:
         raise ConfigValidationError(f"Payload is not valid JSON: {e}")
 
@@ -166,11 +732,47 @@ def validate_config(raw_dict: dict) -> dict:
             f"Config too large. Maximum is {MAX_CONFIG_SIZE_BYTES} bytes."
         )
 
-    # 2. Parse + validate via Pydantic
+    key = hashlib.sha256(raw_json.encode()).hexdigest()
+    cached = _cache.get(key)
+    if cached is not None:
+        ok, value = cached
+        if not ok:
+            raise ConfigValidationError(value)
+        # Fresh copy each time so callers can't mutate the cached result
+        return json.loads(value)
+
+    # 2. Parse + validate via Pydantic; sweep specs are taken out here and
+    # checked per expanded unit instead
+    template, axes = _split_sweeps(raw_dict)
     try:
-        config = BatchConfig.model_validate(raw_dict)
+        config = BatchConfig.model_validate(template)
     except Exception as e:
-        raise ConfigValidationError(f"Invalid config: {e}") from e
-
-    # 3. Return validated dict — only whitelisted fields survive
-    return config.model_dump()
\ No newline at end of file
+        detail = f"Invalid config: {e}"
+        _cache.put(key, (False, detail))
+        raise ConfigValidationError(detail) from e
+
+    # 3. Expand sweeps and enforce the run / cost budget over every unit.
+    # An unseeded LHS sweep samples with a seed drawn here; memoising it would
+    # give every later submission of the same config the same samples
+    validated = _dump(config)
+    memoise = True
+    try:
+        _check_features(validated)
+        if axes or "sweep" in validated:
+            drawn = _attach_sweep(validated, axes)
+            memoise = not (drawn and validated["sweep"]["mode"] == "lhs")
+        units = [u["config"] for u in expand_work_units(validated)] or [validated]
+        if "racing" in validated and len(units) < 2:
+            raise ConfigValidationError(
+                "Racing needs at least two work units (a sweep or several algorithms)."
+            )
+        _check_budget(units)
+    except ConfigValidationError as e:
+        if memoise:
+            _cache.put(key, (False, e.detail))
+        raise
+
+    # 4. Return validated dict — only whitelisted fields survive
+    if memoise:
+        _cache.put(key, (True, json.dumps(validated)))
+    return validated
@@ -0,0 +1,66 @@
+"""
+ll_cache.py
+
+Memo of lower-level optima for the nested algorithms, keyed on the
+upper-level vector. Nested solvers re-solve the lower level for UL points
+they have already seen (elites carried across generations, duplicates
+produced by crossover, and restarts in independent runs), and each solve
+costs thousands of LL evaluations.
+
+Keys are the UL vector's exact float64 bytes or, with a ``tolerance``, the
+vector rounded onto a grid of that spacing, so near-identical UL points
+share one LL optimum. That is an approximation the caller opts into. Memory
+is bounded by an LRU on entry count.
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+import numpy as np
+
+
+class LowerLevelCache:
+    """Thread-safe LRU of ``(scope, UL vector) -> LL solve result``."""
+
+    def __init__(self, max_entries: int = 10000, tolerance: float = 0.0):
+        self.max_entries = max_entries
+        self.tolerance = tolerance
+        self._entries: "OrderedDict[tuple, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, scope: Hashable, ul) -> tuple:
+        ul = np.asarray(ul, dtype=float).ravel()
+        if self.tolerance > 0:
+            return scope, np.round(ul / self.tolerance).astype(np.int64).tobytes()
+        # +0.0 folds -0.0 into 0.0 so equal vectors hash equally
+        return scope, (ul + 0.0).tobytes()
+
+    def get(self, key: tuple):
+        """The cached result for ``key`` (a private copy), or None on a miss."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = self._entries[key]
+        # Solvers may mutate what they get back; never hand out the stored one
+        return copy.deepcopy(value)
+
+    def put(self, key: tuple, value):
+        if value is None:
+            return
+        with self._lock:
+            self._entries[key] = copy.deepcopy(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,31 +1,155 @@
 from typing import Any, Dict, Optional
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, Header
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, Header, Query, Path, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, EmailStr
-import sys, os, asyncio, uuid
+import sys, os, asyncio, hmac, uuid
 
 import sqlite3
 import json
-import bcrypt
+from celery import chord, group
 from redis import Redis
-
-from backend.celery_worker import celery_app, run_sace_job
-from backend.config_validator import validate_config, ConfigValidationError
+from redis.asyncio import Redis as AsyncRedis
+
+from backend.celery_worker import (
+    celery_app,
+    run_sace_job,
+    run_sace_unit,
+    collect_sweep_results,
+    calibrate_config,
+    notify_jobs_changed,
+    render_result_body,
+    shared_problems,
+    WarmStartSeeds,
+)
+from backend.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    CallbackMetric,
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+    WorkerMetrics,
+    instrument_async_redis,
+    instrument_redis,
+    timed_sqlite,
+)
+from backend.compression import (
+    encoded_response,
+    negotiate_encoding,
+    precompressed_response,
+    response_encoding,
+)
+from backend.serialization import splice_json_array
+from backend.session_cache import SessionCache, REVOCATION_CHANNEL, start_revocation_listener
+from backend.signed_tokens import TokenSigner, RevocationList
+from backend import password_hashing, tracing
+from backend.password_hashing import PasswordHashingBusy, RateLimited
+from backend.config_validator import (
+    validate_config,
+    expand_work_units,
+    set_cost_weights,
+    sign_config,
+    validation_cache_stats,
+    ConfigValidationError,
+)
 
 DB_PATH = os.environ.get("DB_PATH", "submissions.db")
 REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
 redis_client = Redis.from_url(REDIS_URL, decode_responses=True)
+# Async client for long-poll endpoints so waiting never blocks the event loop
+async_redis_client = AsyncRedis.from_url(REDIS_URL, decode_responses=True)
 
 app = FastAPI()
 
 SESSION_TTL = 86400  # 24 hours
+MAX_BATCH_ITEMS = 100  # configs per /submit_batch request
+# Only honour X-Forwarded-For when the API is reachable solely via our proxies
+TRUST_FORWARDED_FOR = os.environ.get("TRUST_FORWARDED_FOR", "0") == "1"
+# "redis": random tokens with the session stored in Redis (default).
+# "signed": stateless HMAC tokens verified locally, see signed_tokens.py.
+SESSION_TOKEN_MODE = os.environ.get("SESSION_TOKEN_MODE", "redis")
+# Per-process cache of validated sessions; SESSION_CACHE_TTL=0 disables it
+session_cache = SessionCache(
+    maxsize=int(os.environ.get("SESSION_CACHE_SIZE", 1024)),
+    ttl=float(os.environ.get("SESSION_CACHE_TTL", 30)),
+)
+token_signer = (
+    TokenSigner(os.environ.get("SESSION_SECRET", ""))
+    if SESSION_TOKEN_MODE == "signed"
+    else None
+)
+revoked_tokens = RevocationList(redis_client)
+JOBS_POLL_MAX_TIMEOUT = 60  # seconds a /my_jobs/changes request may block
+# Comma-separated usernames allowed to profile jobs and read the profiles
+ADMIN_USERS = frozenset(u.strip() for u in os.environ.get("ADMIN_USERS", "").split(",") if u.strip())
+# Completed results never change, so clients and nginx may keep them forever
+RESULT_CACHE_CONTROL = "max-age=31536000, immutable"
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+metrics_registry = Registry()
+http_requests = metrics_registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"),
+))
+http_latency = metrics_registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"),
+))
+sqlite_latency = metrics_registry.register(Histogram(
+    "sqlite_query_duration_seconds", "SQLite statement time by statement type.", ("operation",),
+))
+redis_latency = metrics_registry.register(Histogram(
+    "redis_command_duration_seconds", "Redis round-trip time by command.", ("command",),
+))
+instrument_redis(redis_client, redis_latency)
+instrument_async_redis(async_redis_client, redis_latency)
+TimedConnection = timed_sqlite(sqlite_latency)
+app.add_middleware(MetricsMiddleware, requests=http_requests, latency=http_latency)
+
+for metric in WorkerMetrics(redis_client).all():
+    metrics_registry.register(metric)
+
+
+def celery_queue_lengths() -> list:
+    """Pending messages per queue (the Redis broker keeps each queue as a list)."""
+    queues = sorted({
+        celery_app.conf.task_default_queue,
+        *(route["queue"] for route in (celery_app.conf.task_routes or {}).values()),
+    })
+    pipe = redis_client.pipeline(transaction=False)
+    for queue in queues:
+        pipe.llen(queue)
+    return [({"queue": q}, n) for q, n in zip(queues, pipe.execute())]
+
+
+def _stats_metric(name: str, help: str, stats, field: str, kind: str = "counter"):
+    return metrics_registry.register(
+        CallbackMetric(name, help, lambda: [({}, stats()[field])], kind=kind)
+    )
+
+
+metrics_registry.register(CallbackMetric(
+    "celery_queue_length", "Tasks waiting in each Celery queue.", celery_queue_lengths,
+))
+_stats_metric("session_cache_hits_total", "Session cache hits.", lambda: session_cache.stats(), "hits")
+_stats_metric("session_cache_misses_total", "Session cache misses.", lambda: session_cache.stats(), "misses")
+_stats_metric("session_cache_size", "Sessions cached.", lambda: session_cache.stats(), "size", "gauge")
+_stats_metric("validation_cache_hits_total", "Config validation memo hits.", validation_cache_stats, "hits")
+_stats_metric("validation_cache_misses_total", "Config validation memo misses.", validation_cache_stats, "misses")
+_stats_metric(
+    "password_hashes_in_flight", "bcrypt jobs queued or running.",
+    password_hashing.pool_stats, "in_flight", "gauge",
+)
 
 
 # ── Database ──────────────────────────────────────────────────────────────────
 
 
 def get_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, factory=TimedConnection)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -70,6 +194,75 @@ def init_db():
         conn.execute("ALTER TABLE submissions ADD COLUMN result_hash TEXT")
     if "hash_algorithm" not in cols:
         conn.execute("ALTER TABLE submissions ADD COLUMN hash_algorithm TEXT")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_submissions_result_hash ON submissions(result_hash)"
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS result_blobs (
+            result_hash TEXT NOT NULL,
+            encoding TEXT NOT NULL,
+            body BLOB NOT NULL,
+            PRIMARY KEY (result_hash, encoding)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS work_units (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            submission_id INTEGER NOT NULL,
+            unit_index INTEGER NOT NULL,
+            point TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            result_data TEXT,
+            error TEXT,
+            best_fitness REAL,
+            stopped_at REAL,
+            race_status TEXT,
+            UNIQUE (submission_id, unit_index),
+            FOREIGN KEY (submission_id) REFERENCES submissions(id)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_metrics (
+            job_id INTEGER PRIMARY KEY,
+            tasks INTEGER NOT NULL DEFAULT 0,
+            queue_wait_seconds REAL,
+            wall_seconds REAL NOT NULL DEFAULT 0,
+            user_cpu_seconds REAL NOT NULL DEFAULT 0,
+            system_cpu_seconds REAL NOT NULL DEFAULT 0,
+            peak_rss_bytes INTEGER,
+            ul_nfe REAL,
+            ll_nfe REAL,
+            output_bytes INTEGER NOT NULL DEFAULT 0,
+            result_bytes INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (job_id) REFERENCES submissions(id)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_profiles (
+            job_id INTEGER NOT NULL,
+            unit_index INTEGER NOT NULL DEFAULT 0,
+            pstats BLOB NOT NULL,
+            collapsed TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (job_id, unit_index)
+        )
+        """
+    )
+    unit_cols = [r["name"] for r in conn.execute("PRAGMA table_info(work_units)").fetchall()]
+    if "best_fitness" not in unit_cols:
+        conn.execute("ALTER TABLE work_units ADD COLUMN best_fitness REAL")
+    if "stopped_at" not in unit_cols:
+        conn.execute("ALTER TABLE work_units ADD COLUMN stopped_at REAL")
+    if "race_status" not in unit_cols:
+        conn.execute("ALTER TABLE work_units ADD COLUMN race_status TEXT")
     conn.commit()
     conn.close()
 
@@ -78,17 +271,46 @@ def init_db():
 def on_startup():
     os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
     init_db()
+    if token_signer is not None:
+        start_revocation_listener(redis_client, _on_signed_revocation, revoked_tokens.load)
+    elif session_cache.enabled:
+        start_revocation_listener(redis_client, session_cache.invalidate, session_cache.clear)
+
+
+def _on_signed_revocation(message: str):
+    jti, _, exp = message.partition(":")
+    if exp:
+        revoked_tokens.add(jti, float(exp))
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    password_hashing.shutdown_pool()
 
 
 # ── Auth helpers ──────────────────────────────────────────────────────────────
 
 
-def hash_password(password: str) -> bytes:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+def client_ip(request: Request) -> str:
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limited_error(e: RateLimited) -> HTTPException:
+    return HTTPException(
+        status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+    )
 
 
-def verify_password(password: str, password_hash: bytes) -> bool:
-    return bcrypt.checkpw(password.encode("utf-8"), password_hash)
+def hashing_busy_error() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy, please retry shortly.",
+        headers={"Retry-After": "2"},
+    )
 
 
 def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
@@ -97,12 +319,135 @@ def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
         raise HTTPException(status_code=401, detail="Missing or invalid token")
 
     token = authorization.split(" ", 1)[1]
-    session_data = redis_client.get(f"session:{token}")
+    user = lookup_session(token)
 
-    if not session_data:
+    if not user:
         raise HTTPException(status_code=401, detail="Session expired or invalid")
 
-    return json.loads(session_data)
+    return user
+
+
+def get_admin_user(user: dict = Depends(get_current_user)) -> dict:
+    if user["username"] not in ADMIN_USERS:
+        raise HTTPException(status_code=403, detail="Administrators only")
+    return user
+
+
+def lookup_session(token: str) -> Optional[dict]:
+    """Resolve a session token, consulting the in-process cache before Redis."""
+    if token_signer is not None:
+        claims = token_signer.verify(token)
+        if not claims or revoked_tokens.is_revoked(claims["jti"]):
+            return None
+        return {"id": claims["uid"], "username": claims["usr"]}
+
+    user = session_cache.get(token)
+    if user is not None:
+        return user
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.get(f"session:{token}")
+    pipe.pttl(f"session:{token}")
+    session_data, ttl_ms = pipe.execute()
+    if not session_data:
+        return None
+
+    user = json.loads(session_data)
+    session_cache.put(token, user, max_ttl=ttl_ms / 1000 if ttl_ms > 0 else None)
+    return user
+
+
+def create_session(user_id: int, username: str) -> str:
+    if token_signer is not None:
+        return token_signer.issue(user_id, username, SESSION_TTL)
+    token = str(uuid.uuid4())
+    session_data = json.dumps({"id": user_id, "username": username})
+    redis_client.setex(f"session:{token}", SESSION_TTL, session_data)
+    return token
+
+
+def revoke_session(token: str):
+    """Delete a session everywhere: Redis, this process, and peer processes."""
+    if token_signer is not None:
+        claims = token_signer.verify(token)
+        if claims:
+            revoked_tokens.revoke(claims["jti"], claims["exp"])
+            redis_client.publish(REVOCATION_CHANNEL, f"{claims['jti']}:{claims['exp']}")
+        return
+
+    redis_client.delete(f"session:{token}")
+    session_cache.invalidate(token)
+    redis_client.publish(REVOCATION_CHANNEL, token)
+
+
+# register and login are async only to await the hashing pool; their SQLite
+# and Redis calls are blocking, so they go to the threadpool rather than
+# stalling the event loop (and every long-poll on it) during a login storm
+def create_user(username: str, email: Optional[str], pw_hash: bytes) -> bool:
+    """Insert a user; False if the username or email is taken."""
+    conn = get_db()
+    try:
+        conn.execute(
+            "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+            (username, email, pw_hash),
+        )
+        conn.commit()
+        return True
+    except sqlite3.IntegrityError:
+        return False
+    finally:
+        conn.close()
+
+
+def check_login(username: str, ip: str):
+    """Apply the login rate limits, then fetch the user's row (or None)."""
+    password_hashing.check_ip_rate(redis_client, ip)
+    password_hashing.check_user_rate(redis_client, username)
+    conn = get_db()
+    row = conn.execute(
+        "SELECT id, username, password_hash FROM users WHERE username = ?",
+        (username,),
+    ).fetchone()
+    conn.close()
+    return row
+
+
+def update_password_hash(user_id: int, pw_hash: bytes):
+    conn = get_db()
+    conn.execute("UPDATE users SET password_hash=? WHERE id=?", (pw_hash, user_id))
+    conn.commit()
+    conn.close()
+
+
+def result_etag(result_hash: str, encoding: Optional[str] = None) -> str:
+    if encoding:
+        return f'"{result_hash}-{encoding}"'
+    return f'"{result_hash}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Return True if an If-None-Match header value matches ``etag``."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    # Weak comparison is allowed for If-None-Match (RFC 9110 §13.1.2)
+    return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def matching_result_etag(
+    if_none_match: Optional[str], result_hash: str, encoding: Optional[str]
+) -> Optional[str]:
+    """The result ETag, for ``encoding`` or identity, that If-None-Match holds.
+
+    Whether a result goes out compressed is fixed by its hash and the
+    negotiated encoding, so a validator the client holds is still current.
+    """
+    for etag in (result_etag(result_hash, encoding), result_etag(result_hash)):
+        if etag_matches(if_none_match, etag):
+            return etag
+    return None
 
 
 # ── Models ────────────────────────────────────────────────────────────────────
@@ -127,41 +472,55 @@ class TextEntry(BaseModel):
 
 
 @app.post("/register")
-def register(req: RegisterRequest) -> dict:
+async def register(req: RegisterRequest, request: Request) -> dict:
     if len(req.password) < 8:
         raise HTTPException(
             status_code=400, detail="Password must be at least 8 characters."
         )
-    pw_hash = hash_password(req.password)
+    ip = client_ip(request)
     try:
-        conn = get_db()
-        conn.execute(
-            "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
-            (req.username.strip(), req.email, pw_hash),
-        )
-        conn.commit()
-        return {"message": "Account created"}
-    except sqlite3.IntegrityError:
+        await run_in_threadpool(password_hashing.check_ip_rate, redis_client, ip)
+        pw_hash = await password_hashing.hash_password(req.password)
+    except RateLimited as e:
+        raise rate_limited_error(e)
+    except PasswordHashingBusy:
+        raise hashing_busy_error()
+    if not await run_in_threadpool(create_user, req.username.strip(), req.email, pw_hash):
+        # Probing for taken usernames counts against the address
+        await run_in_threadpool(password_hashing.record_failure, redis_client, ip)
         raise HTTPException(status_code=409, detail="Username or email already exists.")
-    finally:
-        conn.close()
+    return {"message": "Account created"}
 
 
 @app.post("/login")
-def login(req: LoginRequest) -> dict:
-    conn = get_db()
-    row = conn.execute(
-        "SELECT id, username, password_hash FROM users WHERE username = ?",
-        (req.username.strip(),),
-    ).fetchone()
-    conn.close()
+async def login(req: LoginRequest, request: Request) -> dict:
+    username = req.username.strip()
+    ip = client_ip(request)
+    try:
+        row = await run_in_threadpool(check_login, username, ip)
+    except RateLimited as e:
+        raise rate_limited_error(e)
+
+    try:
+        ok = bool(row) and await password_hashing.verify_password(
+            req.password, row["password_hash"]
+        )
+    except PasswordHashingBusy:
+        raise hashing_busy_error()
 
-    if not row or not verify_password(req.password, row["password_hash"]):
+    if not ok:
+        await run_in_threadpool(password_hashing.record_failure, redis_client, ip, username)
         raise HTTPException(status_code=401, detail="Invalid username or password.")
 
-    token = str(uuid.uuid4())
-    session_data = json.dumps({"id": row["id"], "username": row["username"]})
-    redis_client.setex(f"session:{token}", SESSION_TTL, session_data)
+    # Upgrade hashes made under an older BCRYPT_ROUNDS while we have the password
+    if password_hashing.needs_rehash(row["password_hash"]):
+        try:
+            new_hash = await password_hashing.hash_password(req.password)
+            await run_in_threadpool(update_password_hash, row["id"], new_hash)
+        except PasswordHashingBusy:
+            pass
+
+    token = await run_in_threadpool(create_session, row["id"], row["username"])
 
     return {
         "message": "Login ok",
@@ -173,52 +532,307 @@ def login(req: LoginRequest) -> dict:
 @app.post("/logout")
 def logout(user: dict = Depends(get_current_user), authorization: Optional[str] = Header(None)):
     token = authorization.split(" ", 1)[1]
-    redis_client.delete(f"session:{token}")
+    revoke_session(token)
     return {"message": "Logged out"}
 
 
-@app.post("/submit_json")
-def submit_json(payload: dict, user: dict = Depends(get_current_user)) -> dict:
-    """Submit a SACE job — validates config, then enqueues on Celery."""
-    submission_data = payload.get("data")
-    if not submission_data or not isinstance(submission_data, dict):
-        raise HTTPException(status_code=422, detail="Missing or invalid 'data' field.")
+@app.get("/session_cache/stats")
+def session_cache_stats(user: dict = Depends(get_current_user)) -> dict:
+    """Hit/miss counters for this API process's session cache."""
+    return session_cache.stats()
 
-    email = submission_data.get("email", "unknown")
 
-    # ── Build the batch config from the submission ──
+@app.get("/metrics")
+def metrics(authorization: Optional[str] = Header(None)) -> Response:
+    """Prometheus scrape endpoint: this API process plus worker-pushed job metrics."""
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+def build_batch_json(submission_data: dict) -> dict:
+    """Pick the SACE batch config fields out of a user submission."""
+    email = submission_data.get("email", "unknown")
     batch_json = {
         "experiment_name": submission_data.get("experiment_name", f"SACE_User_{email}"),
         "problems": submission_data.get("problems", []),
         "algorithms": submission_data.get("algorithms", []),
         "settings": submission_data.get("settings", {}),
     }
+    for key in ("sweep", "racing"):
+        if key in submission_data:
+            batch_json[key] = submission_data[key]
+    if submission_data.get("warm_start_from_job") is not None:
+        batch_json["warm_start"] = {
+            "from_job": submission_data["warm_start_from_job"],
+            "include_ll": submission_data.get("warm_start_ll", False),
+        }
+    if submission_data.get("profile"):
+        batch_json["profile"] = True
+    return batch_json
+
+
+def check_profile_allowed(user: dict, validated_batch: dict):
+    if validated_batch.get("profile") and user["username"] not in ADMIN_USERS:
+        raise ConfigValidationError("profile: only administrators can profile jobs.")
+
+
+def check_warm_start_source(user_id: int, validated_batch: dict):
+    """A warm start must come from the user's own completed job with results
+    for a problem configured identically; raises ConfigValidationError otherwise."""
+    options = validated_batch.get("warm_start")
+    if not options:
+        return
+    conn = get_db()
+    row = conn.execute(
+        "SELECT status, data, result_data FROM submissions WHERE id=? AND user_id=?",
+        (options["from_job"], user_id),
+    ).fetchone()
+    conn.close()
+    if not row:
+        raise ConfigValidationError(f"warm_start_from_job: job {options['from_job']} not found.")
+    if row["status"] != "complete":
+        raise ConfigValidationError(
+            f"warm_start_from_job: job {options['from_job']} is {row['status']}, not complete."
+        )
+    problems = shared_problems(validated_batch, json.loads(row["data"]))
+    if not problems:
+        raise ConfigValidationError(
+            f"warm_start_from_job: job {options['from_job']} has no problem with the "
+            "same name and parameters as this config."
+        )
+    seeds = WarmStartSeeds(options["from_job"], False, row["result_data"] or "", problems)
+    if not seeds.seeds:
+        raise ConfigValidationError(
+            f"warm_start_from_job: job {options['from_job']} has no usable result rows "
+            "for the problems it shares with this config."
+        )
+
+
+_cost_weights_version = None
+
+
+def sync_cost_weights():
+    """Pick up admission-control weights republished by a calibration run."""
+    global _cost_weights_version
+    version = redis_client.get("cost_weights_version")
+    if version != _cost_weights_version:
+        set_cost_weights(json.loads(redis_client.get("cost_weights") or "{}"))
+        _cost_weights_version = version
+
+
+def insert_job(conn, user_id: int, validated_batch: dict, units: list) -> int:
+    """Insert a submission (and its sweep units) on ``conn``; returns the job id."""
+    cursor = conn.execute(
+        # Explicit: on a table first created by an older worker it has no default
+        "INSERT INTO submissions (user_id, type, data, status, created_at) "
+        "VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)",
+        (user_id, "json", json.dumps(validated_batch), "pending"),
+    )
+    job_id = cursor.lastrowid
+    conn.executemany(
+        "INSERT INTO work_units (submission_id, unit_index, point) VALUES (?, ?, ?)",
+        [(job_id, u["index"], json.dumps(u["point"])) for u in units],
+    )
+    return job_id
+
+
+def job_signature(validated_batch: dict, job_id: int, units: list) -> tuple:
+    """Celery signature for one job, plus the task ids it will run under.
+
+    A plain config is a single ``run_sace_job``. A sweep fans out as a chord:
+    one ``run_sace_unit`` per work unit, scheduled in parallel, then
+    ``collect_sweep_results`` to combine them. Raced units carry their
+    successive-halving plan. Task ids are assigned up front
+    so they can be recorded for cancellation before anything is sent.
+    """
+    if not units:
+        sig = run_sace_job.s(
+            validated_batch, job_id, config_signature=sign_config(validated_batch)
+        ).set(task_id=str(uuid.uuid4()))
+        return sig, [sig.id]
+
+    header = [
+        run_sace_unit.s(
+            u["config"], job_id, u["index"], u["point"],
+            config_signature=sign_config(u["config"]), race=u.get("race"),
+        ).set(task_id=str(uuid.uuid4()))
+        for u in units
+    ]
+    callback = collect_sweep_results.s(job_id).set(task_id=str(uuid.uuid4()))
+    return chord(header, callback), [callback.id] + [sig.id for sig in header]
+
+
+def record_task_ids(pipe, job_id: int, task_ids: list):
+    """``job_task_id`` is the job-level task; sweep unit tasks go in a set."""
+    pipe.set(f"job_task_id:{job_id}", task_ids[0])
+    if len(task_ids) > 1:
+        pipe.sadd(f"job_unit_task_ids:{job_id}", *task_ids[1:])
+
+
+@app.post("/submit_json")
+@tracing.traced("POST /submit_json")
+def submit_json(
+    payload: dict,
+    user: dict = Depends(get_current_user),
+    dry_run: bool = Query(False),
+):
+    """Submit a SACE job — validates config, then enqueues on Celery.
+
+    With ``dry_run=true`` nothing is persisted: every (problem, algorithm)
+    pair is timed for a few generations on the calibration queue instead,
+    and ``/calibrations/{id}`` returns the extrapolated cost and ETA.
+    """
+    submission_data = payload.get("data")
+    if not submission_data or not isinstance(submission_data, dict):
+        raise HTTPException(status_code=422, detail="Missing or invalid 'data' field.")
+
+    email = submission_data.get("email", "unknown")
+
+    # ── Build the batch config from the submission ──
+    batch_json = build_batch_json(submission_data)
 
     # ── VALIDATE before persisting or dispatching ──
+    sync_cost_weights()
     try:
-        validated_batch = validate_config(batch_json)
+        with tracing.span("validate"):
+            validated_batch = validate_config(batch_json)
+            check_warm_start_source(user["id"], validated_batch)
+            check_profile_allowed(user, validated_batch)
+            units = expand_work_units(validated_batch)
     except ConfigValidationError as e:
         raise HTTPException(status_code=422, detail=e.detail)
 
+    if dry_run:
+        calibration_id = uuid.uuid4().hex
+        redis_client.set(
+            f"calibration:{calibration_id}",
+            json.dumps({"calibration_id": calibration_id, "user_id": user["id"], "status": "pending"}),
+            ex=86400,
+        )
+        calibrate_config.delay(calibration_id, validated_batch, user["id"])
+        return JSONResponse(
+            status_code=202,
+            content={
+                "calibration_id": calibration_id,
+                "status": "pending",
+                "result_url": f"/calibrations/{calibration_id}",
+            },
+        )
+
     # ── Persist the validated config (not the raw payload) ──
-    conn = get_db()
-    cursor = conn.execute(
-        "INSERT INTO submissions (user_id, type, data, status) VALUES (?, ?, ?, ?)",
-        (user["id"], "json", json.dumps(validated_batch), "pending"),
-    )
-    job_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    with tracing.span("insert_job"):
+        conn = get_db()
+        try:
+            with conn:
+                job_id = insert_job(conn, user["id"], validated_batch, units)
+        finally:
+            conn.close()
+        notify_jobs_changed(user["id"])
+    request_span = tracing.current_span()
+    if request_span is not None:
+        request_span.set(job_id=job_id)
 
     # ── Dispatch the validated config to Celery ──
-    task = run_sace_job.delay(validated_batch, job_id)
-    redis_client.set(f"job_task_id:{job_id}", task.id)
-
-    return {
+    with tracing.span("dispatch", job_id=job_id):
+        signature, task_ids = job_signature(validated_batch, job_id, units)
+        pipe = redis_client.pipeline(transaction=False)
+        record_task_ids(pipe, job_id, task_ids)
+        pipe.execute()
+        signature.apply_async()
+
+    response = {
         "job_id": job_id,
         "email": email,
         "message": "Job submitted successfully and will be processed.",
     }
+    if units:
+        response["work_units"] = len(units)
+    return response
+
+
+@app.post("/submit_batch")
+@tracing.traced("POST /submit_batch")
+def submit_batch(payload: dict, user: dict = Depends(get_current_user)) -> dict:
+    """Submit many SACE jobs at once.
+
+    Expects ``{"data": [submission, ...]}``. Every item is validated up front;
+    valid ones are inserted in a single transaction and dispatched as one
+    Celery group. Invalid items don't block the rest — each gets an error
+    entry in the response instead of a job id.
+    """
+    items = payload.get("data")
+    if not items or not isinstance(items, list):
+        raise HTTPException(status_code=422, detail="Missing or invalid 'data' list.")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Too many configs in one batch (max {MAX_BATCH_ITEMS}).",
+        )
+
+    # ── VALIDATE everything before persisting anything ──
+    sync_cost_weights()
+    results = []
+    accepted = []  # (result index, validated config, sweep units)
+    with tracing.span("validate", items=len(items)):
+        for index, submission_data in enumerate(items):
+            if not isinstance(submission_data, dict):
+                results.append({"index": index, "error": "Item must be an object."})
+                continue
+            try:
+                validated_batch = validate_config(build_batch_json(submission_data))
+                check_warm_start_source(user["id"], validated_batch)
+                check_profile_allowed(user, validated_batch)
+                units = expand_work_units(validated_batch)
+            except ConfigValidationError as e:
+                results.append({"index": index, "error": e.detail})
+                continue
+            accepted.append((len(results), validated_batch, units))
+            results.append({"index": index, "email": submission_data.get("email", "unknown")})
+
+    if not accepted:
+        return {"submitted": 0, "failed": len(results), "jobs": results}
+
+    # ── Persist all valid configs in one transaction ──
+    with tracing.span("insert_job", jobs=len(accepted)):
+        conn = get_db()
+        try:
+            with conn:
+                for pos, validated_batch, units in accepted:
+                    results[pos]["job_id"] = insert_job(conn, user["id"], validated_batch, units)
+                    if units:
+                        results[pos]["work_units"] = len(units)
+        finally:
+            conn.close()
+        notify_jobs_changed(user["id"])
+
+    # ── Record task ids in one pipelined write, dispatch as one group ──
+    with tracing.span("dispatch", jobs=len(accepted)):
+        signatures = []
+        pipe = redis_client.pipeline(transaction=False)
+        for pos, validated_batch, units in accepted:
+            job_id = results[pos]["job_id"]
+            signature, task_ids = job_signature(validated_batch, job_id, units)
+            record_task_ids(pipe, job_id, task_ids)
+            signatures.append(signature)
+        pipe.execute()
+        group(signatures).apply_async()
+
+    return {
+        "submitted": len(accepted),
+        "failed": len(results) - len(accepted),
+        "jobs": results,
+    }
+
+
+@app.get("/calibrations/{calibration_id}")
+def get_calibration(calibration_id: str, user: dict = Depends(get_current_user)) -> dict:
+    """Status of a dry run and, once complete, its measurements and estimate."""
+    raw = redis_client.get(f"calibration:{calibration_id}")
+    state = json.loads(raw) if raw else None
+    if not state or state.pop("user_id") != user["id"]:
+        raise HTTPException(status_code=404, detail="Calibration not found")
+    return state
 
 
 @app.post("/cancel_job/{job_id}")
@@ -241,17 +855,26 @@ def cancel_job(job_id: int, user: dict = Depends(get_current_user)):
     # Set cancellation flag in Redis (worker checks this during cleanup)
     redis_client.set(f"job_cancel:{job_id}", "1", ex=3600)
 
-    # Revoke the Celery task
+    # Revoke the Celery task (and every unit task of a sweep)
+    task_ids = list(redis_client.smembers(f"job_unit_task_ids:{job_id}"))
     task_id = redis_client.get(f"job_task_id:{job_id}")
     if task_id:
-        celery_app.control.revoke(task_id, terminate=True, signal="SIGTERM")
+        task_ids.append(task_id)
+    if task_ids:
+        celery_app.control.revoke(task_ids, terminate=True, signal="SIGTERM")
 
     # Update DB status
     conn.execute(
         "UPDATE submissions SET status='cancelled' WHERE id=?", (job_id,)
     )
+    conn.execute(
+        "UPDATE work_units SET status='cancelled' "
+        "WHERE submission_id=? AND status IN ('pending', 'running')",
+        (job_id,),
+    )
     conn.commit()
     conn.close()
+    notify_jobs_changed(user["id"])
 
     # Notify any live listeners
     redis_client.publish(f"job_stream:{job_id}", "\n[CANCELLED]\n")
@@ -260,7 +883,11 @@ def cancel_job(job_id: int, user: dict = Depends(get_current_user)):
 
 
 @app.get("/job_output/{job_id}")
-def get_job_output(job_id: int, user: dict = Depends(get_current_user)):
+def get_job_output(
+    job_id: int,
+    user: dict = Depends(get_current_user),
+    accept_encoding: Optional[str] = Header(None),
+):
     """HTTP polling endpoint — returns current accumulated output for the user's job."""
     conn = get_db()
     row = conn.execute(
@@ -273,29 +900,176 @@ def get_job_output(job_id: int, user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=404, detail="Job not found")
 
     output = redis_client.get(f"job_output:{job_id}") or ""
-    return {"output": output, "status": row["status"]}
+    body = json.dumps({"output": output, "status": row["status"]}).encode("utf-8")
+    return encoded_response(body, accept_encoding)
 
 
 @app.get("/job_results/{job_id}")
-def get_job_results(job_id: int, user: dict = Depends(get_current_user)):
-    """Return parsed CSV result data for a completed job."""
+def get_job_results(
+    job_id: int,
+    user: dict = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """Return parsed CSV result data for a completed job.
+
+    Results are immutable once hashed, so the response carries a strong ETag
+    derived from ``result_hash`` and a revalidating client gets a 304 without
+    ``result_data`` ever being read from the database. Compressed bodies are
+    served straight from ``result_blobs`` when the worker precomputed them.
+    """
     conn = get_db()
     row = conn.execute(
-        "SELECT result_data, result_hash, hash_algorithm FROM submissions WHERE id=? AND user_id=?",
+        "SELECT result_hash, hash_algorithm FROM submissions WHERE id=? AND user_id=?",
         (job_id, user["id"]),
     ).fetchone()
-    conn.close()
 
     if not row:
+        conn.close()
         raise HTTPException(status_code=404, detail="Job not found")
 
-    if row["result_data"]:
-        return {
-            "data": row["result_data"],
-            "result_hash": row["result_hash"],
-            "hash_algorithm": row["hash_algorithm"],
-        }
-    return {"error": "No results found"}
+    if row["result_hash"]:
+        headers = {"Cache-Control": f"private, {RESULT_CACHE_CONTROL}"}
+        encoding = negotiate_encoding(accept_encoding)
+        matched = matching_result_etag(if_none_match, row["result_hash"], encoding)
+        if matched:
+            conn.close()
+            return Response(status_code=304, headers={**headers, "ETag": matched})
+        if encoding:
+            blob = conn.execute(
+                "SELECT body FROM result_blobs WHERE result_hash=? AND encoding=?",
+                (row["result_hash"], encoding),
+            ).fetchone()
+            if blob:
+                conn.close()
+                # Each representation needs its own strong validator
+                headers["ETag"] = result_etag(row["result_hash"], encoding)
+                return precompressed_response(blob["body"], encoding, headers=headers)
+
+    data_row = conn.execute(
+        "SELECT result_data FROM submissions WHERE id=?", (job_id,)
+    ).fetchone()
+    conn.close()
+
+    if data_row["result_data"] and row["result_hash"]:
+        body = render_result_body(
+            data_row["result_data"], row["result_hash"], row["hash_algorithm"]
+        )
+        # No stored blob: small bodies (and rows older than result_blobs) are
+        # compressed here, or not at all, and the ETag must say which
+        headers["ETag"] = result_etag(row["result_hash"], response_encoding(body, accept_encoding))
+        return encoded_response(body, accept_encoding, headers=headers)
+    # Anything but a hashed result body may still change
+    headers = {"Cache-Control": "no-store"}
+    if data_row["result_data"]:
+        return JSONResponse(
+            content={
+                "data": data_row["result_data"],
+                "result_hash": None,
+                "hash_algorithm": row["hash_algorithm"],
+                "result_url": None,
+            },
+            headers=headers,
+        )
+    return JSONResponse(content={"error": "No results found"}, headers=headers)
+
+
+@app.get("/job_units/{job_id}")
+def get_job_units(
+    job_id: int,
+    user: dict = Depends(get_current_user),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """Work units of a sweep job: index, swept param values, status, error.
+
+    Raced units also report their last best_fitness and, if a race stopped
+    them, the fraction of their budget they had used (``stopped_at``).
+    ``race_status`` is "complete" or "stopped" for a unit that raced, and
+    "unraced" for one that finished without a single progress line.
+    """
+    conn = get_db()
+    owned = conn.execute(
+        "SELECT 1 FROM submissions WHERE id=? AND user_id=?", (job_id, user["id"])
+    ).fetchone()
+    if not owned:
+        conn.close()
+        raise HTTPException(status_code=404, detail="Job not found")
+    rows = conn.execute(
+        "SELECT unit_index, status, error, best_fitness, stopped_at, race_status, point "
+        "FROM work_units "
+        "WHERE submission_id=? ORDER BY unit_index",
+        (job_id,),
+    ).fetchall()
+    conn.close()
+
+    units = splice_json_array(
+        rows,
+        ("unit_index", "status", "error", "best_fitness", "stopped_at", "race_status"),
+        ("point",),
+    )
+    body = f'{{"job_id":{job_id},"units":{units}}}'.encode("utf-8")
+    return encoded_response(body, accept_encoding)
+
+
+@app.get("/job_units/{job_id}/{unit_index}")
+def get_job_unit_result(
+    job_id: int,
+    unit_index: int,
+    user: dict = Depends(get_current_user),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """Raw results CSV of one sweep work unit."""
+    conn = get_db()
+    row = conn.execute(
+        "SELECT w.status, w.result_data FROM work_units w "
+        "JOIN submissions s ON s.id = w.submission_id "
+        "WHERE w.submission_id=? AND w.unit_index=? AND s.user_id=?",
+        (job_id, unit_index, user["id"]),
+    ).fetchone()
+    conn.close()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Work unit not found")
+    if row["result_data"] is None:
+        raise HTTPException(status_code=409, detail=f"Work unit is {row['status']}")
+
+    return encoded_response(
+        row["result_data"].encode("utf-8"), accept_encoding, media_type="text/csv"
+    )
+
+
+@app.get("/results/by-hash/{result_hash}")
+def get_result_by_hash(
+    result_hash: str = Path(..., pattern=r"^[0-9a-f]{64}$"),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """Content-addressed result CSV, cacheable by nginx at the edge.
+
+    The sha256 is only handed out to the job's owner (via ``/job_results`` and
+    ``/my_jobs``), so the URL itself acts as the capability. Unlike
+    ``/job_results`` the CSV isn't precompressed: nginx caches each encoding
+    of it for 30 days, so the origin only compresses on an edge miss, which
+    isn't worth a second set of stored blobs.
+    """
+    headers = {"Cache-Control": f"public, {RESULT_CACHE_CONTROL}"}
+    matched = matching_result_etag(if_none_match, result_hash, negotiate_encoding(accept_encoding))
+    if matched:
+        return Response(status_code=304, headers={**headers, "ETag": matched})
+
+    conn = get_db()
+    row = conn.execute(
+        "SELECT result_data FROM submissions WHERE result_hash=? AND hash_algorithm='sha256' LIMIT 1",
+        (result_hash,),
+    ).fetchone()
+    conn.close()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Result not found")
+
+    body = (row["result_data"] or "").encode("utf-8")
+    headers["ETag"] = result_etag(result_hash, response_encoding(body, accept_encoding))
+    return encoded_response(body, accept_encoding, media_type="text/csv", headers=headers)
 
 
 @app.get("/job_stream/{job_id}")
@@ -349,13 +1123,11 @@ async def websocket_job_output(websocket: WebSocket, job_id: int):
         await websocket.close(code=4001, reason="Missing token")
         return
 
-    session_data = redis_client.get(f"session:{token}")
-    if not session_data:
+    user = lookup_session(token)
+    if not user:
         await websocket.close(code=4001, reason="Invalid token")
         return
 
-    user = json.loads(session_data)
-
     conn = get_db()
     row = conn.execute(
         "SELECT id FROM submissions WHERE id=? AND user_id=?",
@@ -403,37 +1175,204 @@ async def websocket_job_output(websocket: WebSocket, job_id: int):
         pubsub.close()
 
 
+JOB_METRIC_COLUMNS = (
+    "queue_wait_seconds", "wall_seconds", "user_cpu_seconds", "system_cpu_seconds",
+    "peak_rss_bytes", "ul_nfe", "ll_nfe", "output_bytes", "result_bytes",
+)
+# Built in SQL so /my_jobs can splice it like ``data``; NULL until a task reports
+JOB_METRICS_JSON = (
+    "CASE WHEN m.job_id IS NULL THEN NULL ELSE json_object("
+    + ", ".join(f"'{c}', m.{c}" for c in JOB_METRIC_COLUMNS)
+    + ") END"
+)
+JOB_METRICS_GROUPS = {
+    "problem": "lower(json_extract(p.value, '$.name'))",
+    "algorithm": "lower(json_extract(a.value, '$.name'))",
+}
+# job_metrics rows are per job; only a single-pair job's belong to one pair
+JOB_METRICS_SINGLE_PAIR = (
+    "(json_array_length(s.data, '$.problems') = 1 "
+    "AND json_array_length(s.data, '$.algorithms') = 1)"
+)
+
+
 @app.get("/my_jobs")
-def get_my_jobs(user: dict = Depends(get_current_user)) -> dict:
+def get_my_jobs(
+    user: dict = Depends(get_current_user),
+    accept_encoding: Optional[str] = Header(None),
+):
     """Get all jobs for the authenticated user."""
+    # Read the version before the query so a change racing it is never missed
+    version = int(redis_client.get(f"jobs_version:{user['id']}") or 0)
     conn = get_db()
     rows = conn.execute(
-        "SELECT id, type, data, status, created_at, result_hash, hash_algorithm FROM submissions WHERE user_id=? ORDER BY id DESC",
+        f"""
+        SELECT s.id, s.type, s.data, s.status, s.created_at, s.result_hash, s.hash_algorithm,
+               {JOB_METRICS_JSON} AS metrics
+        FROM submissions s LEFT JOIN job_metrics m ON m.job_id = s.id
+        WHERE s.user_id=? ORDER BY s.id DESC
+        """,
         (user["id"],),
     ).fetchall()
     conn.close()
+    # Stored configs are spliced in verbatim rather than parsed and re-encoded
+    jobs = splice_json_array(
+        rows,
+        ("id", "type", "status", "created_at", "result_hash", "hash_algorithm"),
+        ("data", "metrics"),
+    )
+    body = f'{{"version":{version},"jobs":{jobs}}}'
+    return encoded_response(body.encode("utf-8"), accept_encoding)
+
+
+@app.get("/job_metrics/summary")
+def job_metrics_summary(
+    group_by: str = Query("problem,algorithm", pattern=r"^(problem|algorithm)(,(problem|algorithm))?$"),
+    user: dict = Depends(get_current_user),
+) -> dict:
+    """The user's job resource usage aggregated by problem and/or algorithm.
+
+    Metrics are recorded per job, not per (problem, algorithm) pair, so only
+    jobs with exactly one problem and one algorithm are broken down; the
+    rest are counted in ``excluded_multi_pair_jobs``.
+    """
+    keys = list(dict.fromkeys(group_by.split(",")))
+    columns = ", ".join(f"{JOB_METRICS_GROUPS[k]} AS {k}" for k in keys)
+    conn = get_db()
+    rows = conn.execute(
+        f"""
+        SELECT {", ".join(f"g.{k}" for k in keys)},
+               COUNT(*) AS jobs,
+               AVG(m.queue_wait_seconds) AS avg_queue_wait_seconds,
+               AVG(m.wall_seconds) AS avg_wall_seconds,
+               SUM(m.wall_seconds) AS total_wall_seconds,
+               AVG(m.user_cpu_seconds + m.system_cpu_seconds) AS avg_cpu_seconds,
+               MAX(m.peak_rss_bytes) AS max_peak_rss_bytes,
+               AVG(m.ul_nfe) AS avg_ul_nfe,
+               AVG(m.ll_nfe) AS avg_ll_nfe,
+               SUM(m.output_bytes) AS total_output_bytes,
+               SUM(m.result_bytes) AS total_result_bytes
+        FROM (
+            SELECT s.id AS job_id, {columns}
+            FROM submissions s,
+                 json_each(s.data, '$.problems') p,
+                 json_each(s.data, '$.algorithms') a
+            WHERE s.user_id = ? AND {JOB_METRICS_SINGLE_PAIR}
+        ) g
+        JOIN job_metrics m ON m.job_id = g.job_id
+        GROUP BY {", ".join(f"g.{k}" for k in keys)}
+        ORDER BY total_wall_seconds DESC
+        """,
+        (user["id"],),
+    ).fetchall()
+    excluded = conn.execute(
+        f"""
+        SELECT COUNT(*) FROM submissions s JOIN job_metrics m ON m.job_id = s.id
+        WHERE s.user_id = ? AND NOT {JOB_METRICS_SINGLE_PAIR}
+        """,
+        (user["id"],),
+    ).fetchone()[0]
+    conn.close()
     return {
-        "jobs": [
-            {
-                "id": r["id"],
-                "type": r["type"],
-                "data": json.loads(r["data"]),
-                "status": r["status"],
-                "created_at": r["created_at"],
-                "result_hash": r["result_hash"],
-                "hash_algorithm": r["hash_algorithm"],
-            }
-            for r in rows
-        ]
+        "group_by": keys,
+        "groups": [dict(r) for r in rows],
+        "excluded_multi_pair_jobs": excluded,
     }
 
 
+@app.get("/job_profile/{job_id}")
+def job_profile(
+    job_id: int,
+    format: str = Query("summary", pattern="^(summary|pstats|collapsed)$"),
+    unit: int = Query(0, ge=0),
+    user: dict = Depends(get_admin_user),
+):
+    """A profiled job's profile: the summary JSON, the raw pstats dump (load
+    with ``pstats.Stats``/snakeviz) or collapsed stacks for a flame graph.
+
+    Sweep and racing jobs are profiled per work unit; pick one with ``unit``.
+    """
+    conn = get_db()
+    row = conn.execute(
+        f"SELECT {format} AS body "
+        "FROM job_profiles WHERE job_id=? AND unit_index=?",
+        (job_id, unit),
+    ).fetchone()
+    conn.close()
+    if not row:
+        raise HTTPException(status_code=404, detail="No profile for this job")
+    if format == "pstats":
+        return Response(
+            row["body"],
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="job_{job_id}.pstats"'},
+        )
+    if format == "collapsed":
+        return Response(
+            row["body"],
+            media_type="text/plain",
+            headers={"Content-Disposition": f'attachment; filename="job_{job_id}.folded"'},
+        )
+    return {"job_id": job_id, "unit_index": unit, **json.loads(row["body"])}
+
+
+@app.get("/job_trace/{job_id}")
+def job_trace(job_id: int, user: dict = Depends(get_admin_user)) -> dict:
+    """Every traced span of a job, from the submit request through the broker
+    and worker phases, with the share of the job's wall time in each phase."""
+    if not tracing.TRACE_FILE:
+        raise HTTPException(status_code=404, detail="Tracing is not enabled")
+    spans = tracing.job_trace(job_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="No trace for this job")
+    return {"job_id": job_id, **tracing.breakdown(spans), "spans": spans}
+
+
+@app.get("/my_jobs/changes")
+async def my_jobs_changes(
+    since: int = Query(0, ge=0),
+    timeout: float = Query(25.0, ge=0, le=JOBS_POLL_MAX_TIMEOUT),
+    user: dict = Depends(get_current_user),
+) -> dict:
+    """Long-poll until the user's job-list version moves past ``since``.
+
+    Returns immediately if it already has, otherwise blocks (without holding
+    a worker thread) until a change is published or ``timeout`` expires.
+    """
+    version_key = f"jobs_version:{user['id']}"
+    version = int(await async_redis_client.get(version_key) or 0)
+    if version > since or timeout == 0:
+        return {"version": version, "changed": version > since}
+
+    pubsub = async_redis_client.pubsub()
+    await pubsub.subscribe(f"jobs_changed:{user['id']}")
+    try:
+        # Re-check after subscribing to close the read/subscribe race
+        version = int(await async_redis_client.get(version_key) or 0)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while version <= since:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            msg = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=remaining
+            )
+            if msg and msg["type"] == "message":
+                version = max(version, int(msg["data"]))
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
+
+    return {"version": version, "changed": version > since}
+
+
 @app.delete("/my_jobs/{job_id}")
 def delete_my_job(job_id: int, user: dict = Depends(get_current_user)) -> dict:
     """Delete one specific job for the authenticated user."""
     conn = get_db()
     row = conn.execute(
-        "SELECT status FROM submissions WHERE id=? AND user_id=?",
+        "SELECT status, result_hash FROM submissions WHERE id=? AND user_id=?",
         (job_id, user["id"]),
     ).fetchone()
 
@@ -452,32 +1391,36 @@ def delete_my_job(job_id: int, user: dict = Depends(get_current_user)) -> dict:
         "DELETE FROM submissions WHERE id=? AND user_id=?",
         (job_id, user["id"]),
     )
+    conn.execute("DELETE FROM work_units WHERE submission_id=?", (job_id,))
+    conn.execute("DELETE FROM job_metrics WHERE job_id=?", (job_id,))
+    conn.execute("DELETE FROM job_profiles WHERE job_id=?", (job_id,))
+    # Precompressed bodies are shared by hash; drop them with the last owner
+    if row["result_hash"]:
+        conn.execute(
+            "DELETE FROM result_blobs WHERE result_hash=? AND NOT EXISTS "
+            "(SELECT 1 FROM submissions WHERE result_hash=?)",
+            (row["result_hash"], row["result_hash"]),
+        )
     conn.commit()
     conn.close()
+    notify_jobs_changed(user["id"])
 
     # Clean up related Redis keys for this job id.
     redis_client.delete(
         f"job_output:{job_id}",
         f"job_task_id:{job_id}",
+        f"job_unit_task_ids:{job_id}",
         f"job_cancel:{job_id}",
     )
     return {"message": "Job deleted", "job_id": job_id}
 
 
 @app.get("/get_submissions")
-def get_submissions() -> dict:
+def get_submissions(accept_encoding: Optional[str] = Header(None)):
     """Admin-style endpoint — consider removing or protecting in production."""
     conn = get_db()
-    rows = conn.execute("SELECT * FROM submissions").fetchall()
+    rows = conn.execute("SELECT id, type, data, status FROM submissions").fetchall()
     conn.close()
-    return {
-        "submissions": [
-            {
-                "id": r["id"],
-                "type": r["type"],
-                "data": json.loads(r["data"]),
-                "status": r["status"],
-            }
-            for r in rows
-        ]
-    }
\ No newline at end of file
+    submissions = splice_json_array(rows, ("id", "type", "status"), ("data",))
+    body = f'{{"submissions":{submissions}}}'
+    return encoded_response(body.encode("utf-8"), accept_encoding)
@@ -0,0 +1,369 @@
+"""
+metrics.py
+
+Prometheus text-format metrics, without a client library.
+
+The API process keeps its own metrics (request latency per route, SQLite
+and Redis call timings) in an in-process ``Registry``. Celery workers run
+in separate prefork children, so their job metrics are pushed into Redis
+hashes instead. This is a stand-in for a push gateway that every process
+updates atomically with HINCRBYFLOAT. ``/metrics`` renders both, plus broker
+queue depths read at scrape time.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from redis import Redis
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_SECONDS_BUCKETS = (1, 5, 15, 60, 300, 900, 3600, 4 * 3600, 12 * 3600, 48 * 3600)
+NFE_RATE_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[tuple]:
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, _label_str(self.labelnames, key), value) for key, value in items]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self) -> List[tuple]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        out = []
+        for key, state in items:
+            cumulative = 0
+            # Observations above the last bound only show up in +Inf
+            for bound, n in zip((*self.buckets, math.inf), (*state[:-2], None)):
+                cumulative = state[-1] if n is None else cumulative + n
+                out.append((
+                    f"{self.name}_bucket",
+                    _label_str((*self.labelnames, "le"), (*key, _number(bound))),
+                    cumulative,
+                ))
+            labels = _label_str(self.labelnames, key)
+            out.append((f"{self.name}_sum", labels, state[-2]))
+            out.append((f"{self.name}_count", labels, state[-1]))
+        return out
+
+
+class CallbackMetric:
+    """Values computed at scrape time: ``fn()`` returns ``[(labels dict, value)]``."""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], list], kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self) -> List[tuple]:
+        return [
+            (self.name, _label_str(labels.keys(), labels.values()), value)
+            for labels, value in self.fn()
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = metric.samples()
+            except Exception:
+                # One broken source (e.g. Redis down) mustn't blank the scrape
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {_number(value)}" for name, labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+# ── Redis-pushed metrics (workers) ────────────────────────────────────────────
+
+
+class RedisHistogram:
+    """A histogram any process can observe into; state lives in one Redis hash."""
+
+    kind = "histogram"
+
+    def __init__(self, redis: Redis, name: str, help: str, labelnames: Tuple[str, ...], buckets):
+        self.redis = redis
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self.key = f"metrics:{name}"
+
+    def observe(self, pipe, value: float, **labels):
+        """Queue the observation on ``pipe`` (a Redis pipeline)."""
+        labelstr = _label_str(self.labelnames, (labels[n] for n in self.labelnames))
+        bound = next((b for b in self.buckets if value <= b), math.inf)
+        pipe.hincrbyfloat(self.key, f"{labelstr}|{_number(bound)}", 1)
+        pipe.hincrbyfloat(self.key, f"{labelstr}|sum", value)
+        pipe.hincrbyfloat(self.key, f"{labelstr}|count", 1)
+
+    def samples(self) -> List[tuple]:
+        fields = self.redis.hgetall(self.key)
+        series = {}
+        for field, value in fields.items():
+            labelstr, _, part = field.rpartition("|")
+            series.setdefault(labelstr, {})[part] = float(value)
+        out = []
+        for labelstr, parts in sorted(series.items()):
+            cumulative = 0.0
+            for bound in (*self.buckets, math.inf):
+                cumulative += parts.get(_number(bound), 0.0)
+                le = f'le="{_number(bound)}"'
+                labels = "{" + (labelstr[1:-1] + "," if labelstr else "") + le + "}"
+                out.append((f"{self.name}_bucket", labels, cumulative))
+            out.append((f"{self.name}_sum", labelstr, parts.get("sum", 0.0)))
+            out.append((f"{self.name}_count", labelstr, parts.get("count", 0.0)))
+        return out
+
+
+class RedisCounter:
+    kind = "counter"
+
+    def __init__(self, redis: Redis, name: str, help: str, labelnames: Tuple[str, ...]):
+        self.redis = redis
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.key = f"metrics:{name}"
+
+    def inc(self, pipe, amount: float = 1.0, **labels):
+        labelstr = _label_str(self.labelnames, (labels[n] for n in self.labelnames))
+        pipe.hincrbyfloat(self.key, labelstr, amount)
+
+    def samples(self) -> List[tuple]:
+        return [(self.name, k, float(v)) for k, v in sorted(self.redis.hgetall(self.key).items())]
+
+
+class WorkerMetrics:
+    """Job-level metrics pushed by Celery workers and rendered by the API."""
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+        self.jobs = RedisCounter(
+            redis, "sace_jobs_total", "Finished SACE tasks by outcome.", ("task", "status")
+        )
+        self.wall_seconds = RedisHistogram(
+            redis, "sace_job_wall_seconds", "Wall-clock time of a SACE task.",
+            ("task", "status"), JOB_SECONDS_BUCKETS,
+        )
+        self.cpu_seconds = RedisHistogram(
+            redis, "sace_job_cpu_seconds", "CPU time (user + system) of a SACE task.",
+            ("task", "status"), JOB_SECONDS_BUCKETS,
+        )
+        self.nfe_rate = RedisHistogram(
+            redis, "sace_job_nfe_per_second",
+            "UL + LL function evaluations per wall-clock second of a completed task.",
+            ("task",), NFE_RATE_BUCKETS,
+        )
+        self.output_bytes = RedisCounter(
+            redis, "sace_job_output_bytes_total",
+            "Bytes of job output captured and streamed through Redis.", ("task",),
+        )
+
+    def all(self) -> list:
+        return [self.jobs, self.wall_seconds, self.cpu_seconds, self.nfe_rate, self.output_bytes]
+
+    def record(
+        self,
+        task: str,
+        status: str,
+        wall: float,
+        cpu: float,
+        nfe: Optional[float],
+        output_bytes: int,
+    ):
+        pipe = self.redis.pipeline(transaction=False)
+        self.jobs.inc(pipe, task=task, status=status)
+        self.wall_seconds.observe(pipe, wall, task=task, status=status)
+        self.cpu_seconds.observe(pipe, cpu, task=task, status=status)
+        if nfe and wall > 0:
+            self.nfe_rate.observe(pipe, nfe / wall, task=task)
+        self.output_bytes.inc(pipe, output_bytes, task=task)
+        pipe.execute()
+
+
+# ── Instrumentation ───────────────────────────────────────────────────────────
+
+
+def _operation(sql: str) -> str:
+    word = sql.lstrip().split(None, 1)
+    return word[0].upper() if word else "EMPTY"
+
+
+def timed_sqlite(histogram: Histogram) -> type:
+    """A ``sqlite3.Connection`` subclass (pass as ``factory=``) that times
+    ``execute``/``executemany`` by statement type. For SELECTs this covers
+    preparing and stepping to the first row, not later fetches."""
+
+    class TimedConnection(sqlite3.Connection):
+        def execute(self, sql, *args):
+            start = time.perf_counter()
+            try:
+                return super().execute(sql, *args)
+            finally:
+                histogram.observe(time.perf_counter() - start, operation=_operation(sql))
+
+        def executemany(self, sql, *args):
+            start = time.perf_counter()
+            try:
+                return super().executemany(sql, *args)
+            finally:
+                histogram.observe(time.perf_counter() - start, operation=_operation(sql))
+
+    return TimedConnection
+
+
+def instrument_redis(client, histogram: Histogram):
+    """Time every command (and pipeline flush) a sync Redis client sends."""
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    def timed_execute(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return execute_command(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start, command=str(args[0]).upper())
+
+    def timed_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        def timed_pipe_execute(*a, **k):
+            start = time.perf_counter()
+            try:
+                return execute(*a, **k)
+            finally:
+                histogram.observe(time.perf_counter() - start, command="PIPELINE")
+
+        pipe.execute = timed_pipe_execute
+        return pipe
+
+    client.execute_command = timed_execute
+    client.pipeline = timed_pipeline
+    return client
+
+
+def instrument_async_redis(client, histogram: Histogram):
+    execute_command = client.execute_command
+
+    async def timed_execute(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await execute_command(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start, command=str(args[0]).upper())
+
+    client.execute_command = timed_execute
+    return client
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count and latency per route template."""
+
+    def __init__(self, app, requests: Counter, latency: Histogram):
+        self.app = app
+        self.requests = requests
+        self.latency = latency
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners can't blow up cardinality
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            self.latency.observe(time.perf_counter() - start, method=method, route=path)
+            self.requests.inc(method=method, route=path, status=str(status))
@@ -0,0 +1,151 @@
+"""
+password_hashing.py
+
+bcrypt hashing off the request path. Each hash costs ~250 ms of CPU at the
+default work factor; run inside uvicorn's threadpool, a burst of logins
+starves every other sync endpoint. Here hashing runs in a small dedicated
+process pool with a bounded backlog — when the backlog is full callers get
+``PasswordHashingBusy`` (HTTP 503) instead of queueing without limit.
+
+Also holds the Redis-backed login rate limiter, so attempts are rejected
+before they cost any hashing at all.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import bcrypt
+from redis import Redis
+
+
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", 2))
+# Requests allowed to wait for a worker before we start refusing
+HASH_QUEUE_LIMIT = int(os.environ.get("HASH_QUEUE_LIMIT", 32))
+
+# Fixed-window limits on failed attempts, per LOGIN_RATE_WINDOW seconds
+LOGIN_RATE_WINDOW = int(os.environ.get("LOGIN_RATE_WINDOW", 60))
+LOGIN_RATE_LIMIT_IP = int(os.environ.get("LOGIN_RATE_LIMIT_IP", 120))
+LOGIN_RATE_LIMIT_USER = int(os.environ.get("LOGIN_RATE_LIMIT_USER", 10))
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing backlog is full."""
+
+
+class RateLimited(Exception):
+    """Raised when a client exceeds the login rate limit."""
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(f"Too many attempts. Retry in {retry_after}s.")
+
+
+# ── Hashing pool ──────────────────────────────────────────────────────────────
+
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def _checkpw(password: bytes, password_hash: bytes) -> bool:
+    return bcrypt.checkpw(password, password_hash)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_in_flight = 0
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: the API process has threads (e.g. session revocations) that
+        # must not be forked mid-lock
+        _pool = ProcessPoolExecutor(
+            max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _run(fn, *args):
+    global _in_flight
+    if _in_flight >= HASH_WORKERS + HASH_QUEUE_LIMIT:
+        raise PasswordHashingBusy("Password hashing backlog is full.")
+    _in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_pool(), fn, *args)
+    finally:
+        _in_flight -= 1
+
+
+async def hash_password(password: str) -> bytes:
+    return await _run(_hashpw, password.encode("utf-8"), BCRYPT_ROUNDS)
+
+
+async def verify_password(password: str, password_hash: bytes) -> bool:
+    return await _run(_checkpw, password.encode("utf-8"), password_hash)
+
+
+def needs_rehash(password_hash: bytes) -> bool:
+    """True if the hash was made with a different work factor than configured."""
+    try:
+        return int(password_hash.split(b"$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+def pool_stats() -> dict:
+    return {
+        "workers": HASH_WORKERS,
+        "queue_limit": HASH_QUEUE_LIMIT,
+        "in_flight": _in_flight,
+        "rounds": BCRYPT_ROUNDS,
+    }
+
+
+# ── Rate limiting ─────────────────────────────────────────────────────────────
+
+
+def _check_failures(redis: Redis, key: str, limit: int):
+    pipe = redis.pipeline()
+    pipe.get(key)
+    pipe.ttl(key)
+    count, ttl = pipe.execute()
+    if count and int(count) >= limit:
+        raise RateLimited(max(ttl, 1))
+
+
+def check_ip_rate(redis: Redis, ip: str):
+    """Reject ``ip`` after too many recent failed attempts from it.
+
+    Successes don't count: a lab or classroom behind one NAT address logs
+    in all the time, and only guessing should lock it out.
+    """
+    _check_failures(redis, f"auth_failures:ip:{ip}", LOGIN_RATE_LIMIT_IP)
+
+
+def check_user_rate(redis: Redis, username: str):
+    """Reject further attempts on a username with too many recent failures."""
+    _check_failures(redis, f"auth_failures:user:{username.lower()}", LOGIN_RATE_LIMIT_USER)
+
+
+def record_failure(redis: Redis, ip: str, username: Optional[str] = None):
+    """Count a failed attempt against ``ip`` and, if given, ``username``."""
+    keys = [f"auth_failures:ip:{ip}"]
+    if username is not None:
+        keys.append(f"auth_failures:user:{username.lower()}")
+    pipe = redis.pipeline()
+    for key in keys:
+        pipe.incr(key)
+        pipe.expire(key, LOGIN_RATE_WINDOW, nx=True)
+    pipe.execute()
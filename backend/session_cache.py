@@ -0,0 +1,131 @@
+"""
+session_cache.py
+
+Small TTL-bounded LRU of validated sessions kept in each API process, so
+authenticated polling doesn't cost a Redis round trip per request.
+
+Logout semantics are preserved by a Redis pub/sub revocation channel: every
+``/logout`` publishes the token and each process's listener thread evicts it.
+Whenever the listener (re)subscribes it clears the whole cache (revocations
+may have been missed), and the TTL bounds staleness in any case.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from redis import Redis
+
+
+REVOCATION_CHANNEL = "session_revoked"
+
+
+class SessionCache:
+    """Thread-safe LRU of ``token -> user dict`` with per-entry expiry."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Recently revoked tokens, so a lookup racing a logout can't re-cache one
+        self._revoked: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revocations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, token: str) -> Optional[dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, user: dict, max_ttl: Optional[float] = None):
+        """Cache ``user``; ``max_ttl`` caps expiry at the session's remaining life."""
+        if not self.enabled:
+            return
+        ttl = self.ttl if max_ttl is None else min(self.ttl, max_ttl)
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            revoked_until = self._revoked.get(token)
+            if revoked_until is not None and revoked_until > now:
+                return
+            self._entries[token] = (user, now + ttl)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str):
+        now = time.monotonic()
+        with self._lock:
+            if self._entries.pop(token, None) is not None:
+                self.revocations += 1
+            self._revoked[token] = now + self.ttl
+            self._revoked.move_to_end(token)
+            while self._revoked and (
+                len(self._revoked) > self.maxsize or next(iter(self._revoked.values())) <= now
+            ):
+                self._revoked.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "revocations": self.revocations,
+        }
+
+
+def start_revocation_listener(
+    redis: Redis, on_revoke: Callable[[str], None], on_resync: Callable[[], None]
+) -> threading.Thread:
+    """Call ``on_revoke`` for every message on ``REVOCATION_CHANNEL``.
+
+    ``on_resync`` runs after each (re)subscribe, since anything published
+    while we were disconnected was lost.
+    """
+
+    def listen():
+        while True:
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(REVOCATION_CHANNEL)
+                on_resync()
+                for msg in pubsub.listen():
+                    if msg["type"] == "message":
+                        on_revoke(msg["data"])
+            except Exception:
+                time.sleep(1.0)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+    thread = threading.Thread(target=listen, name="session-revocations", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,146 @@
+"""
+shared_datasets.py
+
+Generate-once store for the synthetic training data of hyper_representation
+problems. A dataset is a set of named arrays fixed by (problem, n, m, seed).
+The first process to need it generates it into the shared data volume as
+``.npy`` files; every run and worker process after that maps those files
+read-only, so the data is neither regenerated nor held once per process
+(the pages live in the OS page cache, shared by all mappings).
+
+Generation is serialised per key with an ``flock`` on a lock file, and a
+dataset directory only appears, by atomic rename, once all of its arrays
+are written. The store is bounded by total bytes, evicting the least
+recently used datasets first, each under its lock so a generator is never
+cut short. Readers map an existing dataset under a shared lock on the same
+file, so eviction skips it rather than deleting files mid-load; a reader
+that finds it already evicted falls back to the locked path and
+regenerates. Unlinking a mapped file is safe: existing mappings keep their
+pages.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Callable, Dict
+
+import numpy as np
+
+
+DATASET_DIR = os.environ.get(
+    "SHARED_DATASET_DIR",
+    os.path.join(
+        os.path.dirname(os.path.abspath(os.environ.get("DB_PATH", "submissions.db"))),
+        "datasets",
+    ),
+)
+# 0 disables the store (every run generates its own data, as before)
+MAX_BYTES = int(os.environ.get("SHARED_DATASET_MAX_BYTES", 2 * 2**30))
+
+
+def dataset_key(problem: str, **params) -> str:
+    canonical = json.dumps({"problem": problem.lower(), **params}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+class SharedDatasets:
+    def __init__(self, directory: str = DATASET_DIR, max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _load(self, path: str) -> Dict[str, np.ndarray]:
+        arrays = {
+            name[:-4]: np.load(os.path.join(path, name), mmap_mode="r", allow_pickle=False)
+            for name in sorted(os.listdir(path)) if name.endswith(".npy")
+        }
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return arrays
+
+    def get(self, key: str, generate: Callable[[], Dict[str, np.ndarray]]) -> tuple:
+        """``(arrays, generated)``: read-only mapped arrays for ``key``, from
+        ``generate()`` (a dict of name -> array) if no process has stored it yet."""
+        path = os.path.join(self.directory, key)
+        lock_path = os.path.join(self.directory, f"{key}.lock")
+        if os.path.isdir(path):
+            with open(lock_path, "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_SH)
+                try:
+                    # Re-checked under the lock: it may have been evicted since
+                    if os.path.isdir(path):
+                        return self._load(path), False
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # Someone else may have generated it while we waited. Eviction
+                # takes this lock too, so the directory can't vanish under us
+                if os.path.isdir(path):
+                    return self._load(path), False
+                staging = tempfile.mkdtemp(dir=self.directory, prefix=f".{key}.")
+                try:
+                    for name, array in generate().items():
+                        if not name.isidentifier():
+                            raise ValueError(f"dataset array name {name!r} is not a valid identifier")
+                        np.save(os.path.join(staging, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+                    os.rename(staging, path)
+                except BaseException:
+                    shutil.rmtree(staging, ignore_errors=True)
+                    raise
+                # Map it before unlocking; the mappings outlive any later eviction
+                arrays = self._load(path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        self.evict(keep=key)
+        return arrays, True
+
+    def evict(self, keep: str = "") -> int:
+        """Remove least recently used datasets until under ``max_bytes``."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or name == keep or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(e.stat().st_size for e in os.scandir(path))
+                entries.append((os.stat(path).st_mtime, size, name))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        if keep and os.path.isdir(os.path.join(self.directory, keep)):
+            total += sum(e.stat().st_size for e in os.scandir(os.path.join(self.directory, keep)))
+        removed = 0
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            # Lock files stay: unlinking one could let two generators race
+            with open(os.path.join(self.directory, f"{name}.lock"), "w") as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Being generated or loaded under the lock; leave it this time
+                    continue
+                try:
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+            total -= size
+            removed += 1
+        return removed
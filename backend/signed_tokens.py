@@ -0,0 +1,116 @@
+"""
+signed_tokens.py
+
+Optional stateless session tokens (SESSION_TOKEN_MODE=signed).
+
+A token is ``v1.<claims>.<signature>``: base64url JSON claims (user id,
+username, expiry, token id) plus an HMAC-SHA256 over them with SESSION_SECRET.
+``get_current_user`` verifies it locally — no Redis round trip and no Redis
+memory per active session.
+
+Logout can't delete a stateless token, so its ``jti`` goes into a small Redis
+sorted set scored by expiry (``revoked_jtis``, pruned as entries expire).
+Each API process mirrors that set in memory, kept current by the session
+revocation channel and reloaded whenever the listener resubscribes.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from typing import Optional
+
+from redis import Redis
+
+
+TOKEN_VERSION = "v1"
+REVOKED_KEY = "revoked_jtis"
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class TokenSigner:
+    def __init__(self, secret: str):
+        if not secret:
+            raise RuntimeError("SESSION_SECRET must be set when SESSION_TOKEN_MODE=signed")
+        self._key = secret.encode("utf-8")
+
+    def _sign(self, signing_input: str) -> str:
+        return _b64encode(hmac.new(self._key, signing_input.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self, user_id: int, username: str, ttl: int) -> str:
+        claims = {
+            "uid": user_id,
+            "usr": username,
+            "exp": int(time.time()) + ttl,
+            "jti": uuid.uuid4().hex,
+        }
+        signing_input = f"{TOKEN_VERSION}.{_b64encode(json.dumps(claims, separators=(',', ':')).encode())}"
+        return f"{signing_input}.{self._sign(signing_input)}"
+
+    def verify(self, token: str) -> Optional[dict]:
+        """Return the claims of a well-signed, unexpired token, else None."""
+        # Headers can carry any latin-1; signing and compare_digest need ASCII
+        if not token.isascii():
+            return None
+        try:
+            version, payload, signature = token.split(".")
+        except ValueError:
+            return None
+        if version != TOKEN_VERSION:
+            return None
+        if not hmac.compare_digest(signature, self._sign(f"{version}.{payload}")):
+            return None
+        try:
+            claims = json.loads(_b64decode(payload))
+        except ValueError:
+            return None
+        if claims.get("exp", 0) <= time.time():
+            return None
+        return claims
+
+
+class RevocationList:
+    """In-memory mirror of the Redis ``revoked_jtis`` set."""
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+        self._jtis: dict = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        now = time.time()
+        entries = self.redis.zrangebyscore(REVOKED_KEY, now, "+inf", withscores=True)
+        with self._lock:
+            self._jtis = {jti: exp for jti, exp in entries}
+
+    def revoke(self, jti: str, exp: float):
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.zadd(REVOKED_KEY, {jti: exp})
+        pipe.zremrangebyscore(REVOKED_KEY, "-inf", now)
+        pipe.execute()
+        self.add(jti, exp)
+
+    def add(self, jti: str, exp: float):
+        now = time.time()
+        with self._lock:
+            self._jtis[jti] = exp
+            if len(self._jtis) % 256 == 0:
+                self._jtis = {j: e for j, e in self._jtis.items() if e > now}
+
+    def is_revoked(self, jti: str) -> bool:
+        with self._lock:
+            return jti in self._jtis
+
+    def __len__(self) -> int:
+        return len(self._jtis)
@@ -0,0 +1,180 @@
+"""
+surrogate_cache.py
+
+Disk-backed cache of surrogate training data, shared by every worker process
+through the data volume. An entry holds the evaluated archive of one problem
+configuration (upper-level points, the lower-level optima found for them and
+their fitnesses) plus the GP hyperparameters each surrogate algorithm last
+trained on it. Keys hash the problem name together with its params, so only
+runs of an identically dimensioned problem share an entry.
+
+Entries are ``.npz`` files replaced atomically. Concurrent writers of one key
+are last-writer-wins, which can drop archive points but never corrupts an
+entry. The directory is bounded by total bytes, evicting the least recently
+used entries first (a load touches the file's mtime).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Optional
+
+import numpy as np
+
+
+CACHE_DIR = os.environ.get(
+    "SURROGATE_CACHE_DIR",
+    os.path.join(
+        os.path.dirname(os.path.abspath(os.environ.get("DB_PATH", "submissions.db"))),
+        "surrogate_cache",
+    ),
+)
+# 0 disables the cache entirely
+MAX_BYTES = int(os.environ.get("SURROGATE_CACHE_MAX_BYTES", 256 * 2**20))
+# Archive points kept per entry; the most recently added survive
+MAX_ARCHIVE_POINTS = int(os.environ.get("SURROGATE_CACHE_MAX_POINTS", 5000))
+
+ARRAYS = ("ul", "ll", "ul_fitness", "ll_fitness")
+
+
+def problem_key(problem: dict) -> str:
+    """Cache key for a validated problem entry (name + params)."""
+    canonical = json.dumps(
+        {"name": problem["name"].lower(), "params": problem.get("params") or {}},
+        sort_keys=True,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SurrogateCache:
+    """Size-bounded LRU of surrogate archives, one ``.npz`` file per key."""
+
+    def __init__(
+        self,
+        directory: str = CACHE_DIR,
+        max_bytes: int = MAX_BYTES,
+        max_points: int = MAX_ARCHIVE_POINTS,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_points = max_points
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.max_points > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, key: str) -> Optional[dict]:
+        """The entry for ``key`` (arrays plus a ``hyperparameters`` dict), or None."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                entry = {name: data[name] for name in ARRAYS}
+                entry["hyperparameters"] = json.loads(str(data["hyperparameters"]))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError):
+            # Truncated or from an older layout: drop it rather than fail a run
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def store(
+        self,
+        key: str,
+        ul,
+        ll,
+        ul_fitness,
+        ll_fitness=None,
+        algorithm: Optional[str] = None,
+        hyperparameters: Optional[dict] = None,
+    ) -> int:
+        """Merge an archive (and ``algorithm``'s hyperparameters) into ``key``.
+
+        Returns the number of archive points the entry holds afterwards.
+        """
+        ul = np.atleast_2d(np.asarray(ul, dtype=float))
+        ll = np.atleast_2d(np.asarray(ll, dtype=float))
+        ul_fitness = np.asarray(ul_fitness, dtype=float).reshape(-1)
+        if ll_fitness is None:
+            ll_fitness = np.full(len(ul), np.nan)
+        ll_fitness = np.asarray(ll_fitness, dtype=float).reshape(-1)
+        if not (len(ul) == len(ll) == len(ul_fitness) == len(ll_fitness)):
+            raise ValueError("archive arrays must have one row per evaluated point")
+
+        with self._lock:
+            existing = self.load(key)
+            tuned = {}
+            if existing is not None:
+                tuned = existing["hyperparameters"]
+                # Same key means same dimensions; a mismatch means stale data
+                if existing["ul"].shape[1:] == ul.shape[1:] and existing["ll"].shape[1:] == ll.shape[1:]:
+                    ul = np.concatenate([existing["ul"], ul])
+                    ll = np.concatenate([existing["ll"], ll])
+                    ul_fitness = np.concatenate([existing["ul_fitness"], ul_fitness])
+                    ll_fitness = np.concatenate([existing["ll_fitness"], ll_fitness])
+            if algorithm and hyperparameters is not None:
+                tuned[algorithm.lower()] = hyperparameters
+
+            # Keep the newest evaluation of each UL point, then the newest points
+            _, first = np.unique(ul[::-1], axis=0, return_index=True)
+            keep = np.sort(len(ul) - 1 - first)[-self.max_points:]
+
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(
+                        f,
+                        ul=ul[keep], ll=ll[keep],
+                        ul_fitness=ul_fitness[keep], ll_fitness=ll_fitness[keep],
+                        hyperparameters=np.array(json.dumps(tuned)),
+                    )
+                os.replace(tmp, self._path(key))
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+            self.evict()
+        return len(keep)
+
+    def evict(self) -> int:
+        """Remove least recently used entries until under ``max_bytes``."""
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith(".npz")]
+        except FileNotFoundError:
+            return 0
+        entries = []
+        for name in names:
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,242 @@
+"""
+tracing.py
+
+Lightweight distributed tracing for a job's path from the submit request,
+through the broker, to the worker phases around the SACE run.
+
+A span is a named, timed operation. Spans nest through a context variable,
+and they cross process boundaries as a W3C ``traceparent`` string
+(``00-<trace id>-<span id>-01``), which the API adds to the Celery message
+headers. Finished spans are appended as JSON lines to ``TRACE_FILE``. Every
+process appends to the same file on the shared data volume with O_APPEND,
+so no collector is needed. When the file grows past ``TRACE_MAX_BYTES`` it
+is rotated to ``<file>.1``. The line format (trace_id, span_id,
+parent_span_id, name, start/end times, attributes) maps directly onto
+OTLP, should the spans ever need to go to a real collector.
+
+With ``TRACE_FILE`` unset, tracing is off and ``span`` costs one check.
+"""
+
+import json
+import os
+import secrets
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Iterable, Optional
+
+TRACE_FILE = os.environ.get("TRACE_FILE", "")
+TRACE_MAX_BYTES = int(os.environ.get("TRACE_MAX_BYTES", 64 * 2**20))
+
+_current: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+_host = socket.gethostname()
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "start", "attributes", "status")
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_span_id: Optional[str] = None,
+        start: Optional[float] = None,
+        attributes: Optional[dict] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.start = time.time() if start is None else start
+        self.attributes = attributes or {}
+        self.status = "ok"
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, end: Optional[float] = None):
+        end = time.time() if end is None else end
+        _exporter.write({
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start": self.start,
+            "end": end,
+            "duration": end - self.start,
+            "status": self.status,
+            "host": _host,
+            "pid": os.getpid(),
+            "attributes": self.attributes,
+        })
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[tuple]:
+    """``(trace_id, span_id)`` from a W3C traceparent, or None if malformed."""
+    parts = (value or "").split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def start_span(
+    name: str,
+    traceparent: Optional[str] = None,
+    start: Optional[float] = None,
+    **attributes,
+) -> Optional[Span]:
+    """A span under ``traceparent`` (a remote parent), else under the current
+    span, else the root of a new trace. The caller must ``end()`` it. None
+    while tracing is off."""
+    if not TRACE_FILE:
+        return None
+    remote = parse_traceparent(traceparent)
+    parent = _current.get()
+    if remote:
+        trace_id, parent_id = remote
+    elif parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+    return Span(name, trace_id, parent_id, start, attributes)
+
+
+def activate(span: Optional[Span]):
+    """Make ``span`` current; returns a token for ``deactivate``."""
+    return _current.set(span)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the enclosed block as a child of the current span."""
+    s = start_span(name, **attributes)
+    if s is None:
+        yield None
+        return
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        _current.reset(token)
+        s.end()
+
+
+def traced(name: str):
+    """Decorator form of ``span`` (keeps the signature, so FastAPI routes work)."""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class _Exporter:
+    """Appends span lines to ``TRACE_FILE``; one descriptor per process."""
+
+    def __init__(self):
+        self._fd = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        os.makedirs(os.path.dirname(os.path.abspath(TRACE_FILE)), exist_ok=True)
+        self._fd = os.open(TRACE_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._pid = os.getpid()
+
+    def write(self, record: dict):
+        line = (json.dumps(record, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            try:
+                # Forked workers inherit the parent's descriptor; reopen
+                # rather than share its file offset and rotation state
+                if self._fd is None or self._pid != os.getpid():
+                    self._open()
+                # A single O_APPEND write per line, so lines don't interleave
+                os.write(self._fd, line)
+                size = os.fstat(self._fd).st_size
+                try:
+                    rotated = os.stat(TRACE_FILE).st_ino != os.fstat(self._fd).st_ino
+                except FileNotFoundError:
+                    rotated = True
+                if size > TRACE_MAX_BYTES and not rotated:
+                    os.replace(TRACE_FILE, f"{TRACE_FILE}.1")
+                    rotated = True
+                if rotated:
+                    self._open()
+            except OSError as e:
+                print(f"[TRACE] could not export span: {e}")
+
+
+_exporter = _Exporter()
+
+
+# ── Reading traces back ───────────────────────────────────────────────────────
+
+
+def read_spans(path: Optional[str] = None) -> Iterable[dict]:
+    """Every exported span, oldest file first; unreadable lines are skipped."""
+    path = path or TRACE_FILE
+    for name in (f"{path}.1", path):
+        try:
+            with open(name, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def job_trace(job_id: int, path: Optional[str] = None) -> list:
+    """All spans of every trace that touched ``job_id``, ordered by start."""
+    spans = list(read_spans(path))
+    traces = {s["trace_id"] for s in spans if s["attributes"].get("job_id") == job_id}
+    return sorted((s for s in spans if s["trace_id"] in traces), key=lambda s: s["start"])
+
+
+def breakdown(spans: list) -> dict:
+    """Wall time from the first span's start to the last span's end, and the
+    time and share of it spent in each span name.
+
+    Nested spans overlap their parents, so the shares don't add up to 100%.
+    """
+    if not spans:
+        return {"total_seconds": 0.0, "phases": []}
+    total = max(s["end"] for s in spans) - min(s["start"] for s in spans)
+    phases = {}
+    for s in spans:
+        phase = phases.setdefault(s["name"], {"name": s["name"], "count": 0, "seconds": 0.0})
+        phase["count"] += 1
+        phase["seconds"] += s["duration"]
+    for phase in phases.values():
+        phase["percent"] = 100 * phase["seconds"] / total if total else 0.0
+    return {
+        "total_seconds": total,
+        "phases": sorted(phases.values(), key=lambda p: p["seconds"], reverse=True),
+    }
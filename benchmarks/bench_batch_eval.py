@@ -0,0 +1,70 @@
+"""
+bench_batch_eval.py
+
+Evaluations per second for the SMD problems, one candidate at a time (the
+loop population-based algorithms run without the batch_evaluator hook) and
+as a single population-matrix call through backend.batch_problems.
+
+"per-candidate" uses the same NumPy formulas on 1-row matrices, so the gap
+is the per-call interpreter overhead the batched path removes.
+
+Run from the repo root:
+
+    python -m benchmarks.bench_batch_eval [--pop 100] [--p 5 --q 5 --r 5] [--repeat 20]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from backend.batch_problems import BATCH_PROBLEMS, batch_function
+
+
+def per_candidate(evaluate, XU, XL):
+    F = np.empty(len(XU))
+    f = np.empty(len(XU))
+    for i in range(len(XU)):
+        Fi, fi = evaluate(XU[i], XL[i])
+        F[i], f[i] = Fi[0], fi[0]
+    return F, f
+
+
+def rate(fn, evaluate, XU, XL, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(evaluate, XU, XL)
+    return repeat * len(XU) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--pop", type=int, default=100, help="population size")
+    parser.add_argument("--p", type=int, default=5)
+    parser.add_argument("--q", type=int, default=5)
+    parser.add_argument("--r", type=int, default=5)
+    parser.add_argument("--s", type=int, default=2, help="extra LL variables (SMD6 only)")
+    parser.add_argument("--repeat", type=int, default=20, help="populations per measurement")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"population {args.pop}, p={args.p} q={args.q} r={args.r} (s={args.s} for smd6)")
+    print(f"{'problem':8} {'per-candidate':>16} {'batched':>16} {'speed-up':>9}")
+    for problem in BATCH_PROBLEMS:
+        s = args.s if problem == "smd6" else 0
+        evaluate = batch_function(problem, args.p, args.q, args.r, s)
+        # Positive points keep the log-based problems inside their domain
+        XU = rng.uniform(0.1, 1.0, (args.pop, args.p + args.r))
+        XL = rng.uniform(0.1, 1.0, (args.pop, args.q + s + args.r))
+
+        F_loop, f_loop = per_candidate(evaluate, XU, XL)
+        F_batch, f_batch = evaluate(XU, XL)
+        assert np.allclose(F_loop, F_batch) and np.allclose(f_loop, f_batch), problem
+
+        loop = rate(per_candidate, evaluate, XU, XL, args.repeat)
+        batched = rate(lambda fn, a, b: fn(a, b), evaluate, XU, XL, args.repeat)
+        print(f"{problem:8} {loop:12,.0f} ev/s {batched:12,.0f} ev/s {batched / loop:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+bench_compression.py
+
+Bytes on the wire and end-to-end latency for the API's large payloads, with
+and without Content-Encoding. Latency is modelled as
+
+    server compress time + transfer time at --bandwidth + client decompress
+
+"precompressed" rows are what /job_results costs now that the worker stores
+compressed bodies at completion (no per-request compression).
+
+Run from the repo root:
+
+    python -m benchmarks.bench_compression [--bandwidth 10] [--repeat 20]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from backend.compression import AVAILABLE_ENCODINGS, compress, decompress
+
+
+def make_job_log(generations: int = 400, seed: int = 0) -> str:
+    """Synthetic SACE stdout: tqdm bursts plus a per-generation summary."""
+    rng = random.Random(seed)
+    lines = []
+    best = 10.0
+    for g in range(generations):
+        for pct in range(0, 101, 10):
+            lines.append(
+                f"Gen {g:4d}: {pct:3d}%|{'#' * (pct // 10):<10}| "
+                f"{pct}/100 [00:0{pct % 7}<00:0{(100 - pct) % 9}, {rng.uniform(50, 90):.2f}it/s]"
+            )
+        best *= rng.uniform(0.95, 1.0)
+        lines.append(
+            f"Generation {g}: best_fitness={best:.6e} avg_fitness={best * 1.7:.6e} "
+            f"ul_nfe={g * 50} ll_nfe={16000 + g * 2730}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def make_results_csv(runs: int = 30, problems: int = 6, dim: int = 10, seed: int = 0) -> str:
+    """Results CSV in the shape SACE writes (one row per run, vectors quoted)."""
+    rng = random.Random(seed)
+    rows = [
+        "run_id,problem_name,algorithm_name,final_ul_fitness,total_ul_nfe,"
+        "total_ll_nfe,best_ul_solution,corresponding_ll_solution"
+    ]
+    for p in range(1, problems + 1):
+        for run in range(1, runs + 1):
+            ul = ",".join(f"{rng.gauss(0, 0.05): .8f}" for _ in range(dim))
+            ll = ",".join(f"{rng.gauss(0, 0.05): .8f}" for _ in range(dim))
+            rows.append(
+                f'{run},SMD{p},SACE_ES,{rng.uniform(0, 0.02):.6e},0,54600,"[{ul}]","[{ll}]"'
+            )
+    return "\n".join(rows) + "\n"
+
+
+def make_my_jobs(n_jobs: int = 200) -> str:
+    """The /my_jobs body for a user with ``n_jobs`` stored configs."""
+    config = {
+        "experiment_name": "SACE_User_someone@example.com",
+        "settings": {"independent_runs": 30, "seed": None},
+        "problems": [
+            {"name": f"smd{i}", "params": {"ul_dim": 5, "ll_dim": 5, "p": 1, "q": 2, "r": 1}}
+            for i in range(1, 7)
+        ],
+        "algorithms": [
+            {"name": "sace_es", "params": {"ul_pop_size": 50, "ll_pop_size": 50, "generations": 100}}
+        ],
+    }
+    jobs = [
+        {
+            "id": i,
+            "type": "json",
+            "data": config,
+            "status": "complete",
+            "created_at": "2026-03-03 16:19:20",
+            "result_hash": f"{i:064x}",
+            "hash_algorithm": "sha256",
+        }
+        for i in range(n_jobs, 0, -1)
+    ]
+    return json.dumps({"version": n_jobs, "jobs": jobs})
+
+
+def _median_seconds(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bench_payload(
+    name: str, body: bytes, bandwidth_bps: float, repeat: int, precompressed: bool = False
+) -> list:
+    rows = [
+        {
+            "payload": name,
+            "encoding": "identity",
+            "bytes": len(body),
+            "ratio": 1.0,
+            "compress_ms": 0.0,
+            "decompress_ms": 0.0,
+            "latency_ms": len(body) * 8 / bandwidth_bps * 1000,
+        }
+    ]
+    for enc in AVAILABLE_ENCODINGS:
+        encoded = compress(body, enc)
+        stored = compress(body, enc, precompute=True)
+        c_ms = _median_seconds(lambda: compress(body, enc), repeat) * 1000
+        d_ms = _median_seconds(lambda: decompress(encoded, enc), repeat) * 1000
+        d_stored_ms = _median_seconds(lambda: decompress(stored, enc), repeat) * 1000
+        rows.append(
+            {
+                "payload": name,
+                "encoding": enc,
+                "bytes": len(encoded),
+                "ratio": len(body) / len(encoded),
+                "compress_ms": c_ms,
+                "decompress_ms": d_ms,
+                "latency_ms": c_ms + len(encoded) * 8 / bandwidth_bps * 1000 + d_ms,
+            }
+        )
+        if not precompressed:
+            continue
+        rows.append(
+            {
+                "payload": name,
+                "encoding": f"{enc} (precompressed)",
+                "bytes": len(stored),
+                "ratio": len(body) / len(stored),
+                "compress_ms": 0.0,
+                "decompress_ms": d_stored_ms,
+                "latency_ms": len(stored) * 8 / bandwidth_bps * 1000 + d_stored_ms,
+            }
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--bandwidth", type=float, default=10.0, help="link speed in Mbit/s")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="emit raw rows as JSON")
+    args = parser.parse_args()
+
+    bandwidth_bps = args.bandwidth * 1_000_000
+    # (body, whether the worker stores it precompressed)
+    payloads = {
+        "job_output (log)": (json.dumps({"output": make_job_log(), "status": "running"}), False),
+        "job_results (csv)": (json.dumps({"data": make_results_csv()}), True),
+        "my_jobs (200 jobs)": (make_my_jobs(), False),
+    }
+
+    rows = []
+    for name, (text, stored) in payloads.items():
+        rows.extend(
+            bench_payload(name, text.encode("utf-8"), bandwidth_bps, args.repeat, stored)
+        )
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"Link: {args.bandwidth:g} Mbit/s, median of {args.repeat} runs\n")
+    header = f"{'payload':<20} {'encoding':<22} {'bytes':>10} {'ratio':>7} {'comp ms':>9} {'decomp ms':>10} {'latency ms':>11}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(
+            f"{r['payload']:<20} {r['encoding']:<22} {r['bytes']:>10,} {r['ratio']:>7.1f} "
+            f"{r['compress_ms']:>9.2f} {r['decompress_ms']:>10.2f} {r['latency_ms']:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
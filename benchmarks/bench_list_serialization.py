@@ -0,0 +1,120 @@
+"""
+bench_list_serialization.py
+
+Serialisation time for the /my_jobs body at 10k rows: the old path
+(``json.loads`` per row, then FastAPI's ``jsonable_encoder`` + ``json.dumps``)
+against splicing the stored config text straight into the response.
+
+Rows come from an in-memory SQLite table so ``sqlite3.Row`` access costs are
+included, but the query itself is not timed.
+
+Run from the repo root:
+
+    python -m benchmarks.bench_list_serialization [--rows 10000] [--repeat 5]
+"""
+
+import argparse
+import json
+import sqlite3
+import statistics
+import time
+
+from backend.serialization import splice_json_array
+
+try:
+    from fastapi.encoders import jsonable_encoder
+except ImportError:
+    jsonable_encoder = None
+
+FIELDS = ("id", "type", "status", "created_at", "result_hash", "hash_algorithm")
+
+CONFIG = {
+    "experiment_name": "SACE_User_someone@example.com",
+    "settings": {"independent_runs": 30, "seed": 42},
+    "problems": [
+        {"name": f"smd{i}", "params": {"ul_dim": 5, "ll_dim": 5, "p": 1, "q": 2, "r": 1}}
+        for i in range(1, 7)
+    ],
+    "algorithms": [
+        {"name": "sace_es", "params": {"ul_pop_size": 50, "ll_pop_size": 50, "generations": 100}},
+        {"name": "sace_pso", "params": {"ul_pop_size": 40, "surrogate_type": "gp"}},
+    ],
+    "data": {"email": "someone@example.com"},
+}
+
+
+def load_rows(n: int) -> list:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute(
+        "CREATE TABLE submissions (id INTEGER PRIMARY KEY, type TEXT, data TEXT, status TEXT, "
+        "created_at TEXT, result_hash TEXT, hash_algorithm TEXT)"
+    )
+    data = json.dumps(CONFIG)
+    conn.executemany(
+        "INSERT INTO submissions VALUES (?, 'json', ?, 'complete', '2026-03-03 16:19:20', ?, 'sha256')",
+        [(i, data, f"{i:064x}") for i in range(1, n + 1)],
+    )
+    rows = conn.execute(
+        "SELECT id, type, data, status, created_at, result_hash, hash_algorithm FROM submissions"
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def parse_and_dump(rows) -> bytes:
+    """The previous path: parse each config, let FastAPI re-encode everything."""
+    payload = {
+        "version": 0,
+        "jobs": [
+            {
+                "id": r["id"],
+                "type": r["type"],
+                "data": json.loads(r["data"]),
+                "status": r["status"],
+                "created_at": r["created_at"],
+                "result_hash": r["result_hash"],
+                "hash_algorithm": r["hash_algorithm"],
+            }
+            for r in rows
+        ],
+    }
+    if jsonable_encoder is not None:
+        payload = jsonable_encoder(payload)
+    # Same settings as starlette's JSONResponse.render
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def splice(rows) -> bytes:
+    jobs = splice_json_array(rows, FIELDS, ("data",))
+    return f'{{"version":0,"jobs":{jobs}}}'.encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = load_rows(args.rows)
+    assert json.loads(parse_and_dump(rows)) == json.loads(splice(rows))
+
+    print(f"{args.rows:,} rows, median of {args.repeat} runs")
+    if jsonable_encoder is None:
+        print("(fastapi not installed: old path measured without jsonable_encoder)")
+    results = {}
+    for name, fn in (("json.loads + re-encode", parse_and_dump), ("splice stored JSON", splice)):
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            body = fn(rows)
+            samples.append(time.perf_counter() - start)
+        results[name] = statistics.median(samples)
+        print(f"  {name:<24} {results[name] * 1000:9.1f} ms   {len(body):>12,} bytes")
+
+    old, new = results.values()
+    print(f"  speed-up: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
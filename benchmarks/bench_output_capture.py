@@ -0,0 +1,282 @@
+"""
+bench_output_capture.py
+
+Cost of the worker's non-optimiser path in run_sace_job. Streaming
+SACE-like output through RedisOutputCapture.write and
+RedisLoggingHandler.emit, then persisting the result:
+- find_result_file: the regex scan of the transcript, plus a listing of
+  a results/history directory holding --history-files files
+- reading the CSV
+- sha256
+- precompressing the /job_results body
+- the SQLite update in store_job_result
+
+The streams are synthetic:
+- tqdm: carriage-return progress bursts, one write per update
+- prints: per-generation print() lines, each the text write plus "\\n"
+- logging: per-generation logging.info records
+
+Every write is timed, and the report gives the p50/p99 latency, the
+total, and the overhead over writing the same stream straight to the
+original stdout. That overhead plus persistence is also shown as a share
+of a run whose optimiser time is --run-seconds.
+
+Redis is --redis-url, or else a fakeredis server over TCP (as in
+load_api), so each APPEND/PUBLISH pays a real localhost round trip. The
+SQLite database and history directory live in a scratch directory.
+
+Run from the repo root:
+
+    python -m benchmarks.bench_output_capture [--generations 200] [--run-seconds 60] [--json]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_compression import make_results_csv
+from benchmarks.load_api import STUB_SACE_DIR, start_fakeredis
+
+
+# ── Synthetic SACE output ─────────────────────────────────────────────────────
+
+
+def tqdm_writes(generations: int, updates: int) -> list:
+    writes = []
+    for g in range(generations):
+        for i in range(1, updates + 1):
+            pct = 100 * i // updates
+            writes.append(
+                f"\rGen {g:4d}: {pct:3d}%|{'#' * (pct // 10):<10}| {i}/{updates} "
+                f"[00:01<00:02, 71.3{i % 10}it/s]"
+            )
+        writes.append("\n")
+    return writes
+
+
+def print_writes(generations: int) -> list:
+    writes = []
+    best = 10.0
+    for g in range(generations):
+        best *= 0.97
+        # print() writes the text and the newline separately
+        writes.append(
+            f"Generation {g}: best_fitness={best:.6e} avg_fitness={best * 1.7:.6e} "
+            f"ul_nfe={g * 50} ll_nfe={16000 + g * 2730}"
+        )
+        writes.append("\n")
+    return writes
+
+
+def log_messages(generations: int) -> list:
+    return [f"Generation {g} LL solve converged in {40 + g % 13} iterations" for g in range(generations)]
+
+
+# ── Measurements ──────────────────────────────────────────────────────────────
+
+
+def summarise(samples: list, baseline_total: float = 0.0) -> dict:
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "writes": len(ordered),
+        "p50_us": statistics.median(ordered) * 1e6,
+        "p99_us": ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] * 1e6,
+        "total_ms": total * 1000,
+        "overhead_ms": (total - baseline_total) * 1000,
+    }
+
+
+def time_writes(stream, writes: list) -> list:
+    samples = []
+    for s in writes:
+        start = time.perf_counter()
+        stream.write(s)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_stream(worker, name: str, writes: list, sink) -> dict:
+    # Baseline: the same writes straight to the process's stdout, as without capture
+    baseline = []
+    for s in writes:
+        start = time.perf_counter()
+        sink.write(s)
+        sink.flush()
+        baseline.append(time.perf_counter() - start)
+    capture = worker.RedisOutputCapture(1, worker.redis_client, sink, [])
+    row = summarise(time_writes(capture, writes), sum(baseline))
+    row["stream"] = name
+    row["bytes"] = sum(len(s) for s in writes)
+    return row
+
+
+def bench_logging(worker, messages: list) -> dict:
+    handler = worker.RedisLoggingHandler(1, worker.redis_client, [])
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.getLogger("bench_output_capture")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    samples = []
+    try:
+        for message in messages:
+            start = time.perf_counter()
+            logger.info(message)
+            samples.append(time.perf_counter() - start)
+    finally:
+        logger.removeHandler(handler)
+    row = summarise(samples)
+    row["stream"] = "logging"
+    row["bytes"] = sum(len(m) + 1 for m in messages)
+    return row
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, (time.perf_counter() - start) * 1000
+
+
+def bench_persistence(worker, transcript: str, csv_rows: int, history_files: int) -> dict:
+    os.makedirs("results/csv", exist_ok=True)
+    os.makedirs("results/history", exist_ok=True)
+    for i in range(history_files):
+        open(f"results/history/history_SMD{i % 12 + 1}_SACE_ES_20260101-{i:06d}.csv", "w").close()
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = f"results/csv/Bench_{stamp}.csv"
+    content = make_results_csv(runs=max(csv_rows // 6, 1))
+    with open(path, "w") as f:
+        f.write(content)
+    transcript += f"All results have been saved to: {path}\n"
+
+    conn = worker.get_db()
+    job_ids = [
+        conn.execute(
+            "INSERT INTO submissions (user_id, type, data, status) VALUES (0, 'json', '{}', 'running')"
+        ).lastrowid
+        for _ in range(2)
+    ]
+    conn.commit()
+    conn.close()
+
+    def sqlite_update():
+        # The statements store_job_result runs once the body is hashed and compressed
+        conn = worker.get_db()
+        conn.execute(
+            "UPDATE submissions SET status='complete', result_data=?, result_hash=?, hash_algorithm=? WHERE id=?",
+            (result, digest, "sha256", job_ids[0]),
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO result_blobs (result_hash, encoding, body) VALUES (?, ?, ?)",
+            [(digest, enc, body) for enc, body in blobs.items()],
+        )
+        conn.commit()
+        conn.close()
+
+    found, find_ms = timed(lambda: worker.find_result_file(transcript))
+    result, read_ms = timed(lambda: open(found).read())
+    digest, sha_ms = timed(lambda: hashlib.sha256(result.encode("utf-8")).hexdigest())
+    blobs, compress_ms = timed(
+        lambda: worker.precompress(worker.render_result_body(result, digest, "sha256"))
+    )
+    _, sqlite_ms = timed(sqlite_update)
+    _, store_ms = timed(lambda: worker.store_job_result(job_ids[1], result))
+    return {
+        "transcript_bytes": len(transcript),
+        "result_bytes": len(result),
+        "history_files": history_files,
+        "find_result_file_ms": find_ms,
+        "read_result_ms": read_ms,
+        "sha256_ms": sha_ms,
+        "precompress_ms": compress_ms,
+        "sqlite_update_ms": sqlite_ms,
+        "store_job_result_ms": store_ms,
+        "total_ms": find_ms + read_ms + store_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--generations", type=int, default=200)
+    parser.add_argument("--tqdm-updates", type=int, default=20, help="progress updates per generation")
+    parser.add_argument("--csv-rows", type=int, default=180, help="rows in the final results CSV")
+    parser.add_argument("--history-files", type=int, default=2000, help="files in results/history")
+    parser.add_argument("--run-seconds", type=float, default=60.0,
+                        help="optimiser time of the modelled run, for the overhead share")
+    parser.add_argument("--redis-url", help="Redis to stream to (default: fakeredis over TCP)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_output_capture_")
+    # The worker reads these at import time
+    os.environ["DB_PATH"] = os.path.join(workdir, "submissions.db")
+    os.environ["REDIS_URL"] = args.redis_url or start_fakeredis()
+    # Nothing here runs SACE, but the worker imports it; the real one wins if present
+    sys.path.append(STUB_SACE_DIR)
+    from backend import celery_worker as worker
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    sink = open(os.devnull, "w")
+    try:
+        tqdm = tqdm_writes(args.generations, args.tqdm_updates)
+        prints = print_writes(args.generations)
+        streams = [
+            bench_stream(worker, "tqdm", tqdm, sink),
+            bench_stream(worker, "prints", prints, sink),
+            bench_logging(worker, log_messages(args.generations)),
+        ]
+        persistence = bench_persistence(
+            worker, "".join(tqdm + prints), args.csv_rows, args.history_files
+        )
+    finally:
+        sink.close()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    overhead_ms = sum(s["overhead_ms"] for s in streams) + persistence["total_ms"]
+    report = {
+        "redis": args.redis_url or "fakeredis (tcp)",
+        "streams": streams,
+        "persistence": persistence,
+        "run_seconds": args.run_seconds,
+        "overhead_ms": overhead_ms,
+        "overhead_pct": 100 * overhead_ms / (args.run_seconds * 1000 + overhead_ms),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.generations} generations, Redis: {report['redis']}")
+    print(f"{'stream':8} {'writes':>7} {'bytes':>9} {'p50 us':>8} {'p99 us':>8} {'total ms':>9} {'overhead ms':>12}")
+    for s in streams:
+        print(
+            f"{s['stream']:8} {s['writes']:7d} {s['bytes']:9d} {s['p50_us']:8.1f} {s['p99_us']:8.1f} "
+            f"{s['total_ms']:9.1f} {s['overhead_ms']:12.1f}"
+        )
+    p = persistence
+    print(
+        f"persistence ({p['result_bytes']:,} B result, {p['transcript_bytes']:,} B transcript, "
+        f"{p['history_files']} history files):"
+    )
+    for key in (
+        "find_result_file_ms", "read_result_ms", "sha256_ms", "precompress_ms",
+        "sqlite_update_ms", "store_job_result_ms",
+    ):
+        print(f"  {key[:-3]:18} {p[key]:9.2f} ms")
+    print(
+        f"overhead {overhead_ms:,.0f} ms = {report['overhead_pct']:.2f}% of a "
+        f"{args.run_seconds:g}s run"
+    )
+
+
+if __name__ == "__main__":
+    main()
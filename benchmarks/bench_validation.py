@@ -0,0 +1,85 @@
+"""
+bench_validation.py
+
+Validation throughput with and without the canonical-hash memo cache, and the
+worker-side cost of checking a signed hash instead of re-validating.
+
+Run from the repo root:
+
+    CONFIG_SIGNING_KEY=bench python -m benchmarks.bench_validation [--n 2000]
+"""
+
+import argparse
+import time
+
+from backend import config_validator
+from backend.config_validator import (
+    _ValidationCache,
+    sign_config,
+    validate_config,
+    verify_config_signature,
+)
+
+
+def make_config(i: int) -> dict:
+    return {
+        "experiment_name": f"Study_{i}",
+        "settings": {"independent_runs": 10, "seed": i},
+        "problems": [
+            {"name": f"smd{p}", "params": {"ul_dim": 5, "ll_dim": 5, "p": 1, "q": 2, "r": 1}}
+            for p in range(1, 7)
+        ],
+        "algorithms": [
+            {"name": "sace_es", "params": {"ul_pop_size": 50, "ll_pop_size": 50, "generations": 100}},
+            {"name": "sace_pso", "params": {"ul_pop_size": 40, "surrogate_type": "gp"}},
+        ],
+    }
+
+
+def rate(fn, configs) -> float:
+    start = time.perf_counter()
+    for c in configs:
+        fn(c)
+    return len(configs) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--n", type=int, default=2000, help="validations per scenario")
+    parser.add_argument("--distinct", type=int, default=20, help="distinct configs resubmitted")
+    args = parser.parse_args()
+
+    repeated = [make_config(i % args.distinct) for i in range(args.n)]
+
+    config_validator._cache = _ValidationCache(0)
+    uncached = rate(validate_config, repeated)
+
+    config_validator._cache = _ValidationCache(512)
+    cached = rate(validate_config, repeated)
+    stats = config_validator.validation_cache_stats()
+
+    print(f"{args.n:,} validations over {args.distinct} distinct configs")
+    print(f"  uncached (Pydantic every time)   {uncached:10,.0f} configs/s")
+    print(f"  memoised ({stats['hits']} hits / {stats['misses']} misses)  {cached:10,.0f} configs/s")
+    print(f"  speed-up: {cached / uncached:.1f}x")
+
+    validated = [validate_config(c) for c in repeated[: args.distinct]]
+    pairs = [(v, sign_config(v)) for v in validated] * (args.n // args.distinct)
+    if pairs[0][1] is None:
+        print("\n(CONFIG_SIGNING_KEY unset: worker-side signature check not measured)")
+        return
+
+    config_validator._cache = _ValidationCache(0)
+    worker_validate = rate(validate_config, [v for v, _ in pairs])
+    start = time.perf_counter()
+    for v, sig in pairs:
+        assert verify_config_signature(v, sig)
+    worker_verify = len(pairs) / (time.perf_counter() - start)
+    print("\nWorker re-validation of dispatched payloads")
+    print(f"  full re-validation               {worker_validate:10,.0f} configs/s")
+    print(f"  signed-hash check                {worker_verify:10,.0f} configs/s")
+    print(f"  speed-up: {worker_verify / worker_validate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,451 @@
+"""
+load_api.py
+
+Load test of the HTTP API under a realistic mix of traffic. Virtual users
+log in, submit jobs, poll ``/my_jobs`` and job output, watch jobs over SSE
+and WebSocket, and download results. The report gives throughput, status
+codes and latency percentiles per endpoint. Save it with ``--out`` and pass
+an older report as ``--baseline`` to diff two commits.
+
+By default the script starts its own stack in a temporary directory:
+- uvicorn
+- a Celery worker
+- the stub SACE in benchmarks/stub_sace, whose runtime and output volume
+  are set with --sace-seconds/--sace-lines/--sace-line-bytes
+
+Redis is the server at ``--redis-url`` or, if that is not given, an
+in-process fakeredis TCP server (needs ``pip install fakeredis lupa``;
+lupa runs the Lua scripts Celery's Redis transport uses). Use
+``--api-url`` instead to drive a stack you started yourself. Streams are
+timed to the response headers (SSE) or the accepted handshake (WebSocket),
+then held open for up to ``--viewer-seconds``.
+
+    python -m benchmarks.load_api --users 20 --seconds 30 --out load.json
+    python -m benchmarks.load_api --users 20 --seconds 30 --baseline load.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+import requests
+from websockets.sync.client import connect as ws_connect
+
+from benchmarks.load_login_storm import percentiles
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_SACE_DIR = os.path.join(REPO_ROOT, "benchmarks", "stub_sace")
+
+ENDPOINTS = {
+    "login": "POST /login",
+    "submit": "POST /submit_json",
+    "my_jobs": "GET /my_jobs",
+    "job_output": "GET /job_output/{job_id}",
+    "results": "GET /job_results/{job_id}",
+    "sse": "SSE /job_stream/{job_id}",
+    "ws": "WS /ws/job/{job_id}",
+}
+DEFAULT_MIX = "login=1,submit=2,my_jobs=10,job_output=4,results=3,sse=1,ws=1"
+JOB_CONFIG = {
+    "experiment_name": "LoadTest",
+    "problems": [{"name": "smd1"}],
+    "algorithms": [{"name": "sace_es"}],
+    "settings": {"independent_runs": 1},
+}
+
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise SystemExit(f"unknown action {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.stream_bytes = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, action: str, seconds: float, status):
+        with self._lock:
+            self.statuses[action][str(status)] += 1
+            if isinstance(status, int) and status < 400:
+                self.latencies[action].append(seconds)
+
+    def report(self, elapsed: float) -> dict:
+        out = {}
+        for action, route in ENDPOINTS.items():
+            statuses = self.statuses.get(action)
+            if not statuses:
+                continue
+            ok = len(self.latencies[action])
+            out[route] = {
+                "requests": sum(statuses.values()),
+                "ok": ok,
+                "throughput_per_s": ok / elapsed,
+                "status": dict(statuses),
+                **percentiles(self.latencies[action]),
+            }
+            if action in self.stream_bytes:
+                out[route]["stream_bytes"] = self.stream_bytes[action]
+        return out
+
+
+class VirtualUser:
+    def __init__(self, api: str, index: int, run_id: str, recorder: Recorder, args):
+        self.api = api
+        self.ws_api = "ws" + api[len("http"):]
+        self.recorder = recorder
+        self.args = args
+        self.username = f"load_{run_id}_{index}"
+        self.password = "load-test-password"
+        self.session = requests.Session()
+        # Spreads per-IP login limits when the API runs with TRUST_FORWARDED_FOR=1
+        self.session.headers["X-Forwarded-For"] = f"10.{index // 250}.{index % 250}.2"
+        self.token = None
+        self.jobs = []
+        self.completed = []
+
+    def timed(self, action: str, fn):
+        start = time.perf_counter()
+        try:
+            status = fn()
+        except (requests.exceptions.RequestException, OSError) as e:
+            status = type(e).__name__
+        self.recorder.record(action, time.perf_counter() - start, status)
+        return status
+
+    @property
+    def auth(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def setup(self):
+        self.session.post(
+            f"{self.api}/register",
+            json={"username": self.username, "password": self.password},
+            timeout=60,
+        )
+        self.login()
+        if self.token is None:
+            raise RuntimeError(f"{self.username} could not log in")
+
+    def login(self):
+        def call():
+            r = self.session.post(
+                f"{self.api}/login",
+                json={"username": self.username, "password": self.password},
+                timeout=60,
+            )
+            if r.ok:
+                self.token = r.json()["token"]
+            return r.status_code
+
+        return self.timed("login", call)
+
+    def submit(self):
+        def call():
+            r = self.session.post(
+                f"{self.api}/submit_json", json={"data": JOB_CONFIG}, headers=self.auth, timeout=60
+            )
+            if r.ok:
+                self.jobs.append(r.json()["job_id"])
+            return r.status_code
+
+        return self.timed("submit", call)
+
+    def my_jobs(self):
+        def call():
+            r = self.session.get(f"{self.api}/my_jobs", headers=self.auth, timeout=60)
+            if r.ok:
+                self.completed = [j["id"] for j in r.json()["jobs"] if j["status"] == "complete"]
+            return r.status_code
+
+        return self.timed("my_jobs", call)
+
+    def job_output(self):
+        if not self.jobs:
+            return self.submit()
+        return self.timed("job_output", lambda: self.session.get(
+            f"{self.api}/job_output/{self.jobs[-1]}", headers=self.auth, timeout=60
+        ).status_code)
+
+    def results(self):
+        if not self.completed:
+            return self.my_jobs()
+        job_id = random.choice(self.completed)
+        return self.timed("results", lambda: self.session.get(
+            f"{self.api}/job_results/{job_id}", headers=self.auth, timeout=60
+        ).status_code)
+
+    def sse(self):
+        if not self.jobs:
+            return self.submit()
+        start = time.perf_counter()
+        try:
+            r = self.session.get(
+                f"{self.api}/job_stream/{self.jobs[-1]}", headers=self.auth, stream=True, timeout=60
+            )
+        except requests.exceptions.RequestException as e:
+            self.recorder.record("sse", time.perf_counter() - start, type(e).__name__)
+            return
+        self.recorder.record("sse", time.perf_counter() - start, r.status_code)
+        deadline = time.monotonic() + self.args.viewer_seconds
+        received = 0
+        with r:
+            for line in r.iter_lines():
+                received += len(line)
+                if b'"done"' in line or b'"cancelled"' in line or time.monotonic() > deadline:
+                    break
+        self.recorder.stream_bytes["sse"] += received
+
+    def ws(self):
+        if not self.jobs:
+            return self.submit()
+        start = time.perf_counter()
+        try:
+            ws = ws_connect(
+                f"{self.ws_api}/ws/job/{self.jobs[-1]}?token={self.token}", open_timeout=60
+            )
+        except Exception as e:
+            self.recorder.record("ws", time.perf_counter() - start, type(e).__name__)
+            return
+        self.recorder.record("ws", time.perf_counter() - start, 101)
+        deadline = time.monotonic() + self.args.viewer_seconds
+        received = 0
+        with ws:
+            try:
+                while True:
+                    message = ws.recv(timeout=max(deadline - time.monotonic(), 0))
+                    received += len(message)
+                    if message.startswith("{") and '"status"' in message:
+                        break
+            except Exception:
+                # Timed out, or the server closed the socket: this viewer is done
+                pass
+        self.recorder.stream_bytes["ws"] += received
+
+    def run(self, mix: dict, deadline: float):
+        actions = list(mix)
+        weights = [mix[a] for a in actions]
+        while time.monotonic() < deadline:
+            getattr(self, random.choices(actions, weights)[0])()
+            time.sleep(random.expovariate(1 / self.args.think) if self.args.think else 0)
+
+
+# ── Local stack ───────────────────────────────────────────────────────────────
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(check, timeout: float, what: str):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if check():
+            return
+        time.sleep(0.2)
+    raise SystemExit(f"timed out waiting for {what}")
+
+
+def start_fakeredis() -> str:
+    try:
+        from fakeredis import TcpFakeServer
+    except ImportError:
+        raise SystemExit("no --redis-url given and fakeredis is not installed (pip install fakeredis lupa)")
+    port = free_port()
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    # Connection threads must not keep the process alive at exit
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}/0"
+
+
+@contextmanager
+def local_stack(args):
+    """API + Celery worker (stub SACE) in a scratch directory; yields the API URL."""
+    workdir = tempfile.mkdtemp(prefix="load_api_")
+    port = free_port()
+    env = {
+        **os.environ,
+        "REDIS_URL": args.redis_url or start_fakeredis(),
+        "DB_PATH": os.path.join(workdir, "submissions.db"),
+        "PYTHONPATH": os.pathsep.join([STUB_SACE_DIR, REPO_ROOT]),
+        "TRUST_FORWARDED_FOR": "1",
+        "WORKER_SLOTS": str(args.workers),
+        "STUB_SACE_SECONDS": str(args.sace_seconds),
+        "STUB_SACE_LINES": str(args.sace_lines),
+        "STUB_SACE_LINE_BYTES": str(args.sace_line_bytes),
+    }
+    api_log = open(os.path.join(workdir, "api.log"), "w")
+    worker_log = open(os.path.join(workdir, "worker.log"), "w")
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port),
+             "--workers", str(args.api_workers), "--log-level", "warning"],
+            cwd=workdir, env=env, stdout=api_log, stderr=subprocess.STDOUT,
+        ),
+        subprocess.Popen(
+            [sys.executable, "-m", "celery", "-A", "backend.celery_worker", "worker",
+             "--concurrency", str(args.workers), "--loglevel", "info"],
+            cwd=workdir, env=env, stdout=worker_log, stderr=subprocess.STDOUT,
+        ),
+    ]
+    api = f"http://127.0.0.1:{port}"
+
+    def api_up():
+        try:
+            return requests.get(f"{api}/my_jobs", timeout=1).status_code == 401
+        except requests.exceptions.RequestException:
+            return False
+
+    def worker_ready():
+        with open(os.path.join(workdir, "worker.log")) as f:
+            return " ready." in f.read()
+
+    try:
+        wait_for(api_up, 60, "the API")
+        wait_for(worker_ready, 60, "the Celery worker")
+        yield api
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=20)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        api_log.close()
+        worker_log.close()
+        if args.keep:
+            print(f"stack logs and database kept in {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ── Reporting ─────────────────────────────────────────────────────────────────
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(report: dict, baseline: dict = None):
+    base = (baseline or {}).get("endpoints", {})
+    print(
+        f"{report['users']} users for {report['seconds']:g}s at {report['commit']} "
+        f"({report['jobs_submitted']} jobs submitted)"
+    )
+    header = f"{'endpoint':30} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  status"
+    print(header + ("   p95 vs baseline" if base else ""))
+    for route, e in report["endpoints"].items():
+        if not e.get("n"):
+            print(f"{route:30} {0:7.1f} {'-':>8} {'-':>8} {'-':>8} {'-':>8}  {e['status']}")
+            continue
+        line = (
+            f"{route:30} {e['throughput_per_s']:7.1f} {e['p50_ms']:8.1f} {e['p95_ms']:8.1f} "
+            f"{e['p99_ms']:8.1f} {e['max_ms']:8.1f}  {e['status']}"
+        )
+        old = base.get(route)
+        if old and old.get("p95_ms"):
+            line += f"   {100 * (e['p95_ms'] - old['p95_ms']) / old['p95_ms']:+.0f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--api-url", help="drive this running API instead of starting a stack")
+    parser.add_argument("--redis-url", help="Redis for the local stack (default: fakeredis)")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--seconds", type=float, default=30.0, help="length of the measured run")
+    parser.add_argument("--think", type=float, default=0.5, help="mean pause between actions (s)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="action weights, e.g. " + DEFAULT_MIX)
+    parser.add_argument("--viewer-seconds", type=float, default=5.0, help="max time a stream stays open")
+    parser.add_argument("--workers", type=int, default=2, help="Celery worker processes (local stack)")
+    parser.add_argument("--api-workers", type=int, default=1, help="uvicorn workers (local stack)")
+    parser.add_argument("--sace-seconds", type=float, default=0.5, help="stub SACE time per run")
+    parser.add_argument("--sace-lines", type=int, default=50, help="stub SACE output lines per run")
+    parser.add_argument("--sace-line-bytes", type=int, default=80)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="keep the local stack's directory")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to compare p95 latency against")
+    parser.add_argument("--json", action="store_true", help="print the JSON report")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    random.seed(args.seed)
+    stack = nullcontext(args.api_url) if args.api_url else local_stack(args)
+    with stack as api:
+        api = api.rstrip("/")
+        run_id = uuid.uuid4().hex[:8]
+        users = [VirtualUser(api, i, run_id, Recorder(), args) for i in range(args.users)]
+        for user in users:
+            user.setup()
+        # Setup logins aren't part of the measured mix
+        recorder = Recorder()
+        for user in users:
+            user.recorder = recorder
+        start = time.monotonic()
+        threads = [
+            threading.Thread(target=user.run, args=(mix, start + args.seconds)) for user in users
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - start
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": args.api_url or "local stack",
+        "users": args.users,
+        "seconds": elapsed,
+        "mix": mix,
+        "stub_sace": None if args.api_url else {
+            "seconds": args.sace_seconds, "lines": args.sace_lines, "line_bytes": args.sace_line_bytes,
+        },
+        "jobs_submitted": sum(len(u.jobs) for u in users),
+        "endpoints": recorder.report(elapsed),
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+load_login_storm.py
+
+Load test: does a burst of logins (a class signing in at once) hurt other
+endpoints? Polls ``/my_jobs`` at a steady rate, first alone and then while
+``--concurrency`` clients hammer ``/login``, and reports latency percentiles
+for both phases plus the login outcomes (200 / 429 rate-limited / 503 busy).
+
+Runs against a live API (e.g. ``uvicorn backend.main:app``). Storm clients
+send distinct X-Forwarded-For addresses, which only spread across per-IP
+limits when the API runs with TRUST_FORWARDED_FOR=1.
+
+    python -m benchmarks.load_login_storm --api-url http://localhost:8000
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+    return {
+        "n": len(ordered),
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1] * 1000,
+        "mean_ms": statistics.mean(ordered) * 1000,
+    }
+
+
+def register_and_login(api: str, username: str, password: str) -> str:
+    requests.post(f"{api}/register", json={"username": username, "password": password}, timeout=30)
+    r = requests.post(f"{api}/login", json={"username": username, "password": password}, timeout=30)
+    r.raise_for_status()
+    return r.json()["token"]
+
+
+def poll_my_jobs(api: str, token: str, seconds: float, interval: float) -> list:
+    session = requests.Session()
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        session.get(f"{api}/my_jobs", headers=headers, timeout=30).raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(interval)
+    return latencies
+
+
+def login_storm(api: str, username: str, password: str, seconds: float, concurrency: int):
+    outcomes = Counter()
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(i: int):
+        session = requests.Session()
+        headers = {"X-Forwarded-For": f"10.{i // 250}.{i % 250}.1"}
+        while time.monotonic() < deadline:
+            try:
+                r = session.post(
+                    f"{api}/login",
+                    json={"username": username, "password": password},
+                    headers=headers,
+                    timeout=60,
+                )
+                code = r.status_code
+            except requests.exceptions.RequestException:
+                code = "error"
+            with lock:
+                outcomes[code] += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--api-url", default="http://localhost:8000")
+    parser.add_argument("--seconds", type=float, default=10.0, help="length of each phase")
+    parser.add_argument("--concurrency", type=int, default=40, help="concurrent login clients")
+    parser.add_argument("--interval", type=float, default=0.1, help="/my_jobs poll interval")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    api = args.api_url.rstrip("/")
+    password = "storm-password"
+    poller = f"poller_{uuid.uuid4().hex[:8]}"
+    stormer = f"storm_{uuid.uuid4().hex[:8]}"
+    token = register_and_login(api, poller, password)
+    register_and_login(api, stormer, password)
+
+    baseline = poll_my_jobs(api, token, args.seconds, args.interval)
+
+    storm_result = {}
+    storm = threading.Thread(
+        target=lambda: storm_result.update(
+            login_storm(api, stormer, password, args.seconds, args.concurrency)
+        )
+    )
+    storm.start()
+    during = poll_my_jobs(api, token, args.seconds, args.interval)
+    storm.join()
+
+    report = {
+        "my_jobs_baseline": percentiles(baseline),
+        "my_jobs_during_storm": percentiles(during),
+        "logins": {str(k): v for k, v in storm_result.items()},
+        "login_rate_per_s": storm_result.get(200, 0) / args.seconds,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"/my_jobs latency (ms), {args.concurrency} concurrent login clients for {args.seconds:g}s")
+    for phase in ("my_jobs_baseline", "my_jobs_during_storm"):
+        p = report[phase]
+        print(
+            f"  {phase:<22} n={p['n']:<5} p50={p['p50_ms']:7.1f} p95={p['p95_ms']:7.1f} "
+            f"p99={p['p99_ms']:7.1f} max={p['max_ms']:7.1f}"
+        )
+    print(f"  login outcomes: {report['logins']}  ({report['login_rate_per_s']:.1f} ok/s)")
+
+
+if __name__ == "__main__":
+    main()
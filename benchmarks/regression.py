@@ -0,0 +1,331 @@
+"""
+regression.py
+
+Performance and quality regression check for the SACE algorithms. A pinned
+matrix of problems x algorithms x seeds (benchmarks/regression_matrix.json
+by default) is run one cell at a time through the worker's own task. Each
+cell is a ``run_sace_job`` with one independent run, including output
+capture, result discovery and storage. For every cell the script records
+the wall and CPU time the worker measured, the UL/LL function evaluations
+and the final UL fitness.
+
+Against a ``--baseline`` (the ``--out`` of an earlier run), each
+(problem, algorithm) pair is tested for two kinds of regression, with
+runs paired by seed:
+- slower: a one-sided Wilcoxon signed-rank test on wall time
+- worse: a one-sided Wilcoxon signed-rank test on final UL fitness
+  (minimised)
+When the two runs don't share seeds, the Mann-Whitney U test is used
+instead. Each kind of change is one family of tests, one per pair, and
+its p-values are Holm-corrected across the pairs; a change is flagged
+only when the corrected p is below --alpha and the median change exceeds
+the tolerance (--time-tolerance, relative; --fitness-tolerance,
+absolute). A wall-time change must also exceed --spread-factor times the
+baseline's own seed-to-seed spread (the scaled median absolute
+deviation), which is mostly timing noise. Fitness has no such floor:
+its spread comes from the seeds themselves, and pairing removes it. A
+changed NFE count means the budgets differ, so the pair is flagged as
+not comparable. The exit status is 1 if anything regressed.
+
+With n seeds the smallest attainable p is 1/2^n, and Holm's strictest
+threshold is --alpha divided by the number of pairs, so the 9 pairs of
+the default matrix need at least 8 seeds to flag anything at 0.05.
+
+Calibrate before trusting a new machine, matrix or tolerance: run the
+matrix twice on the same commit and compare the second run against the
+first. That must exit 0; if it doesn't, raise --time-tolerance or
+--spread-factor, or add seeds, until it does. Redis is --redis-url, or
+else an in-process fakeredis server, as in load_api. Everything else
+goes to a scratch directory.
+
+    python -m benchmarks.regression --out baseline.json
+    python -m benchmarks.regression --baseline baseline.json --out current.json
+
+    # calibration: same commit, must pass
+    python -m benchmarks.regression --out self.json
+    python -m benchmarks.regression --baseline self.json
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from scipy import stats
+
+from benchmarks.load_api import REPO_ROOT, git_commit, start_fakeredis
+
+DEFAULT_MATRIX = os.path.join(REPO_ROOT, "benchmarks", "regression_matrix.json")
+
+
+# ── Running the matrix ────────────────────────────────────────────────────────
+
+
+def cell_config(problem: dict, algorithm: dict, seed: int) -> dict:
+    return {
+        "experiment_name": "Regression",
+        "problems": [problem],
+        "algorithms": [algorithm],
+        "settings": {"independent_runs": 1, "seed": seed},
+    }
+
+
+def final_fitness(result_content: str):
+    values = []
+    for row in csv.DictReader(io.StringIO(result_content)):
+        try:
+            values.append(float(row["final_ul_fitness"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return min(values) if values else None
+
+
+def run_matrix(matrix: dict, args) -> list:
+    """Run every cell through ``run_sace_job``; returns one dict per cell."""
+    workdir = tempfile.mkdtemp(prefix="regression_")
+    # The worker reads these at import time
+    os.environ["DB_PATH"] = os.path.join(workdir, "submissions.db")
+    os.environ["REDIS_URL"] = args.redis_url or start_fakeredis()
+    if args.sace_path:
+        sys.path.insert(0, os.path.abspath(args.sace_path))
+    from backend import celery_worker as worker
+
+    cells = []
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        # The first job pays for imports and cold caches; keep it out of the timings
+        for _ in range(args.warmup):
+            run_cell(worker, matrix["problems"][0], matrix["algorithms"][0], matrix["seeds"][0], args.verbose)
+        for problem in matrix["problems"]:
+            for algorithm in matrix["algorithms"]:
+                for seed in matrix["seeds"]:
+                    cell = run_cell(worker, problem, algorithm, seed, args.verbose)
+                    cells.append(cell)
+                    print(
+                        f"{cell['problem']:>8} {cell['algorithm']:>22} seed {seed:<4} "
+                        f"{cell['status']:>9} {cell['wall_seconds']:8.2f}s "
+                        f"fitness={cell['final_ul_fitness']}",
+                        file=sys.stderr,
+                    )
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return cells
+
+
+def run_cell(worker, problem: dict, algorithm: dict, seed: int, verbose: bool) -> dict:
+    config = cell_config(problem, algorithm, seed)
+    conn = worker.get_db()
+    job_id = conn.execute(
+        "INSERT INTO submissions (user_id, type, data, status, created_at) "
+        "VALUES (0, 'json', ?, 'pending', CURRENT_TIMESTAMP)",
+        (json.dumps(config),),
+    ).lastrowid
+    conn.commit()
+    conn.close()
+
+    start = time.perf_counter()
+    sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+    with sink:
+        worker.run_sace_job.apply(args=(config, job_id))
+    elapsed = time.perf_counter() - start
+
+    conn = worker.get_db()
+    job = conn.execute("SELECT status, result_data FROM submissions WHERE id=?", (job_id,)).fetchone()
+    metrics = conn.execute("SELECT * FROM job_metrics WHERE job_id=?", (job_id,)).fetchone()
+    conn.close()
+    result = (job["result_data"] or "") if job["status"] == "complete" else ""
+    ul_nfe, ll_nfe = worker.nfe_totals(result)
+    return {
+        "problem": problem["name"].lower(),
+        "algorithm": algorithm["name"].lower(),
+        "seed": seed,
+        "status": job["status"],
+        "wall_seconds": metrics["wall_seconds"] if metrics else elapsed,
+        "cpu_seconds": (
+            metrics["user_cpu_seconds"] + metrics["system_cpu_seconds"] if metrics else None
+        ),
+        "ul_nfe": ul_nfe,
+        "ll_nfe": ll_nfe,
+        "final_ul_fitness": final_fitness(result),
+    }
+
+
+# ── Comparing against a baseline ──────────────────────────────────────────────
+
+
+def one_sided_p(current: list, baseline: list, paired: bool, alternative: str) -> float:
+    """p-value for "current is ``alternative`` than baseline"."""
+    if paired:
+        diffs = [c - b for c, b in zip(current, baseline)]
+        if not any(diffs):
+            return 1.0
+        return float(stats.wilcoxon(diffs, alternative=alternative).pvalue)
+    if len(set(current) | set(baseline)) == 1:
+        return 1.0
+    return float(stats.mannwhitneyu(current, baseline, alternative=alternative).pvalue)
+
+
+def holm(pvalues: list) -> list:
+    """Holm-Bonferroni adjusted p-values, in the order given."""
+    m = len(pvalues)
+    adjusted = [1.0] * m
+    running = 0.0
+    for rank, i in enumerate(sorted(range(m), key=lambda i: pvalues[i])):
+        running = max(running, min(1.0, (m - rank) * pvalues[i]))
+        adjusted[i] = running
+    return adjusted
+
+
+def spread(values: list) -> float:
+    """Scaled median absolute deviation (a robust standard deviation)."""
+    med = statistics.median(values)
+    return 1.4826 * statistics.median(abs(v - med) for v in values)
+
+
+METRICS = (
+    ("wall_seconds", "time_tolerance", True, "slower", "faster"),
+    ("final_ul_fitness", "fitness_tolerance", False, "worse", "better"),
+)
+
+
+def compare(cells: list, baseline_cells: list, args) -> list:
+    def by_pair(rows):
+        pairs = {}
+        for row in rows:
+            if row["status"] == "complete" and row["final_ul_fitness"] is not None:
+                pairs.setdefault((row["problem"], row["algorithm"]), {})[row["seed"]] = row
+        return pairs
+
+    current, baseline = by_pair(cells), by_pair(baseline_cells)
+    rows = []
+    for pair in sorted(set(current) | set(baseline)):
+        cur, base = current.get(pair, {}), baseline.get(pair, {})
+        row = {"problem": pair[0], "algorithm": pair[1], "flags": []}
+        rows.append(row)
+        if len(cur) < 2 or len(base) < 2:
+            row["flags"].append("missing" if not cur or not base else "too few runs")
+            continue
+        shared = sorted(set(cur) & set(base))
+        paired = len(shared) >= 2 and len(shared) == len(cur) == len(base)
+        seeds_cur = shared if paired else sorted(cur)
+        seeds_base = shared if paired else sorted(base)
+
+        for metric, _, relative, _, _ in METRICS:
+            c = [cur[s][metric] for s in seeds_cur]
+            b = [base[s][metric] for s in seeds_base]
+            c_med, b_med = statistics.median(c), statistics.median(b)
+            row[metric] = {
+                "current_median": c_med, "baseline_median": b_med,
+                "change": (c_med - b_med) / b_med if relative and b_med else c_med - b_med,
+                "baseline_spread": spread(b) / b_med if relative and b_med else spread(b),
+                "p_worse": one_sided_p(c, b, paired, "greater"),
+                "p_better": one_sided_p(c, b, paired, "less"),
+                "test": "wilcoxon" if paired else "mannwhitneyu",
+            }
+
+        for level in ("ul_nfe", "ll_nfe"):
+            c = [cur[s][level] for s in seeds_cur if cur[s][level] is not None]
+            b = [base[s][level] for s in seeds_base if base[s][level] is not None]
+            if c and b and statistics.median(c) != statistics.median(b):
+                row["flags"].append(f"{level} changed")
+
+    # One family per metric and direction, corrected across the pairs
+    tested = [row for row in rows if "wall_seconds" in row]
+    for metric, tolerance, relative, worse, better in METRICS:
+        tolerance = getattr(args, tolerance)
+        for direction, flag in (("worse", worse), ("better", better)):
+            adjusted = holm([row[metric][f"p_{direction}"] for row in tested])
+            for row, p in zip(tested, adjusted):
+                result = row[metric]
+                result[f"p_{direction}_holm"] = p
+                threshold = tolerance
+                if relative:
+                    threshold = max(threshold, args.spread_factor * result["baseline_spread"])
+                change = result["change"] if direction == "worse" else -result["change"]
+                if p < args.alpha and change > threshold:
+                    row["flags"].append(flag)
+    return rows
+
+
+REGRESSIONS = ("slower", "worse", "missing", "ul_nfe changed", "ll_nfe changed")
+
+
+def print_comparison(rows: list):
+    print(
+        f"{'problem':8} {'algorithm':22} {'wall p50':>9} {'change':>8} {'p':>7}"
+        f" {'fitness p50':>12} {'change':>10} {'p':>7}  flags"
+    )
+    for row in rows:
+        wall, fit = row.get("wall_seconds"), row.get("final_ul_fitness")
+        if not wall:
+            print(f"{row['problem']:8} {row['algorithm']:22} {'':>57}  {', '.join(row['flags'])}")
+            continue
+        print(
+            f"{row['problem']:8} {row['algorithm']:22} "
+            f"{wall['current_median']:8.2f}s {100 * wall['change']:+7.1f}% "
+            f"{min(wall['p_worse_holm'], wall['p_better_holm']):7.3f} "
+            f"{fit['current_median']:12.4g} {fit['change']:+10.3g} "
+            f"{min(fit['p_worse_holm'], fit['p_better_holm']):7.3f}  {', '.join(row['flags']) or 'ok'}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--matrix", default=DEFAULT_MATRIX, help="problems/algorithms/seeds JSON")
+    parser.add_argument("--baseline", help="earlier --out report to compare against")
+    parser.add_argument("--out", help="write this run's report here")
+    parser.add_argument("--alpha", type=float, default=0.05,
+                        help="significance level, after Holm correction across pairs")
+    parser.add_argument("--time-tolerance", type=float, default=0.10,
+                        help="relative median wall-time change to ignore")
+    parser.add_argument("--spread-factor", type=float, default=2.0,
+                        help="wall-time change must also exceed this many baseline spreads")
+    parser.add_argument("--fitness-tolerance", type=float, default=1e-6,
+                        help="absolute median fitness change to ignore")
+    parser.add_argument("--redis-url", help="Redis for output capture (default: fakeredis)")
+    parser.add_argument("--sace-path", help="directory to import SACEProject from (e.g. benchmarks/stub_sace)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed jobs run before the matrix")
+    parser.add_argument("--verbose", action="store_true", help="show SACE's output")
+    args = parser.parse_args()
+
+    with open(args.matrix) as f:
+        matrix = json.load(f)
+    cells = run_matrix(matrix, args)
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "matrix": matrix,
+        "cells": cells,
+    }
+
+    regressed = False
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("matrix") != matrix:
+            print("note: baseline was run with a different matrix", file=sys.stderr)
+        rows = compare(cells, baseline["cells"], args)
+        report["baseline_commit"] = baseline.get("commit")
+        report["comparison"] = rows
+        print(f"{report['commit']} vs baseline {baseline.get('commit')}")
+        print_comparison(rows)
+        regressed = any(flag in REGRESSIONS for row in rows for flag in row["flags"])
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
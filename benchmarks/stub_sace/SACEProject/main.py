@@ -0,0 +1,65 @@
+"""
+Stand-in for SACE's ``main`` used by the load-test benchmarks.
+
+It takes the same config file and prints progress, then writes a results
+CSV and reports its path the way SACE does, so the worker runs its real
+capture, discovery and storage path. Fitness is pseudo-random but fixed
+by (settings.seed, problem, algorithm, run), so seeds differ and reruns
+agree. The runtime, output volume and fitness are synthetic and set
+through the environment:
+
+    STUB_SACE_SECONDS      wall time per (problem, algorithm, run)  [0.5]
+    STUB_SACE_LINES        progress lines printed per run           [50]
+    STUB_SACE_LINE_BYTES   length of each progress line             [80]
+    STUB_SACE_FITNESS_SCALE  factor on the final fitness, to fake a
+                             quality regression                     [1.0]
+"""
+
+import json
+import os
+import random
+import time
+import uuid
+
+SECONDS = float(os.environ.get("STUB_SACE_SECONDS", 0.5))
+LINES = int(os.environ.get("STUB_SACE_LINES", 50))
+LINE_BYTES = int(os.environ.get("STUB_SACE_LINE_BYTES", 80))
+FITNESS_SCALE = float(os.environ.get("STUB_SACE_FITNESS_SCALE", 1.0))
+
+
+def main(config_path: str):
+    with open(config_path) as f:
+        config = json.load(f)
+    settings = config.get("settings", {})
+    runs = settings.get("independent_runs", 1)
+    seed = settings.get("seed")
+    rows = [
+        "run_id,problem_name,algorithm_name,final_ul_fitness,total_ul_nfe,"
+        "total_ll_nfe,best_ul_solution,corresponding_ll_solution"
+    ]
+    for problem in config["problems"]:
+        for algorithm in config["algorithms"]:
+            for run in range(1, runs + 1):
+                rng = random.Random(f"{seed}/{problem['name']}/{algorithm['name']}/{run}")
+                best = 100.0
+                for line in range(LINES):
+                    time.sleep(SECONDS / max(LINES, 1))
+                    best *= rng.uniform(0.9, 1.0)
+                    prefix = f"Generation {line}: best_fitness={best:.6f} "
+                    print(prefix + "." * max(LINE_BYTES - len(prefix), 0))
+                if not LINES:
+                    time.sleep(SECONDS)
+                best *= FITNESS_SCALE
+                solution = "[" + ", ".join(f"{rng.random():.5f}" for _ in range(5)) + "]"
+                rows.append(
+                    f"{run},{problem['name'].upper()},{algorithm['name'].upper()},{best},"
+                    f"{100 * LINES},{10_000 * LINES},\"{solution}\",\"{solution}\""
+                )
+
+    os.makedirs("results/csv", exist_ok=True)
+    # Jobs finishing in the same second must not overwrite each other's CSV
+    name = f"{config.get('experiment_name', 'stub')}_{time.strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    path = f"results/csv/{name}.csv"
+    with open(path, "w") as f:
+        f.write("\n".join(rows) + "\n")
+    print(f"All results have been saved to: {path}")
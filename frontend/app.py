@@ -1,10 +1,20 @@
-import requests, json, streamlit as st, os, time
+import requests, json, streamlit as st, os, time, threading
 import pandas as pd
 from io import StringIO
 
 # FastAPI endpoint
 API_URL = os.environ.get("API_URL", "http://localhost:8000")
 
+# The job list is re-fetched when the backend says it changed: a daemon
+# thread per session holds a /my_jobs/changes long-poll open and flags each
+# change, and a small fragment checks that flag (no request) every
+# JOBS_WATCH_TICK_SECONDS, rerunning the page when it is set.
+JOBS_POLL_TIMEOUT = 25
+JOBS_POLL_RETRY_SECONDS = 5
+JOBS_WATCH_TICK_SECONDS = 1
+# A watcher whose page stopped ticking this long ago (tab closed) exits
+JOBS_WATCH_IDLE_SECONDS = 60
+
 
 def auth_headers() -> dict:
     """Return Authorization header using the stored session token."""
@@ -14,6 +24,74 @@ def auth_headers() -> dict:
     return {}
 
 
+class JobsWatcher:
+    """Long-polls /my_jobs/changes for one session on a daemon thread and
+    sets ``changed`` whenever the job-list version moves past ``version``."""
+
+    def __init__(self, token: str, version: int):
+        self.token = token
+        self.version = version
+        self.changed = threading.Event()
+        self.stopped = threading.Event()
+        self.last_seen = time.monotonic()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while (
+            not self.stopped.is_set()
+            and time.monotonic() - self.last_seen < JOBS_WATCH_IDLE_SECONDS
+        ):
+            try:
+                res = requests.get(
+                    f"{API_URL}/my_jobs/changes",
+                    params={"since": self.version, "timeout": JOBS_POLL_TIMEOUT},
+                    headers={"Authorization": f"Bearer {self.token}"},
+                    timeout=JOBS_POLL_TIMEOUT + 10,
+                )
+            except requests.exceptions.RequestException:
+                self.stopped.wait(JOBS_POLL_RETRY_SECONDS)
+                continue
+            if res.status_code == 401:
+                # Logged out or expired; the page finds out on its next request
+                return
+            if res.status_code != 200:
+                self.stopped.wait(JOBS_POLL_RETRY_SECONDS)
+                continue
+            body = res.json()
+            if body.get("changed"):
+                self.version = max(self.version, body.get("version", 0))
+                self.changed.set()
+
+
+def client_ip_headers() -> dict:
+    """Forward the browser's address (set by nginx) for per-IP login rate limits."""
+    headers = getattr(getattr(st, "context", None), "headers", None) or {}
+    ip = headers.get("X-Real-Ip") or headers.get("X-Forwarded-For")
+    return {"X-Forwarded-For": ip} if ip else {}
+
+
+def fetch_job_results(job_id: int):
+    """Return a completed job's result CSV, revalidating any cached copy by ETag."""
+    cache = st.session_state.setdefault("job_results_cache", {})
+    cached = cache.get(job_id)
+    headers = auth_headers()
+    if cached:
+        headers["If-None-Match"] = cached["etag"]
+
+    res = requests.get(f"{API_URL}/job_results/{job_id}", headers=headers)
+    if res.status_code == 304 and cached:
+        return cached["data"]
+    if res.status_code != 200:
+        return None
+
+    result_csv = res.json().get("data", "")
+    etag = res.headers.get("ETag")
+    if result_csv and etag:
+        cache[job_id] = {"etag": etag, "data": result_csv}
+    return result_csv
+
+
 def auth_ui():
     if st.session_state.get("logged_in"):
         user = st.session_state.get("user", {})
@@ -28,6 +106,9 @@ def auth_ui():
                 )
             except requests.exceptions.RequestException:
                 pass
+            watcher = st.session_state.get("jobs_watcher")
+            if watcher is not None:
+                watcher.stopped.set()
             st.session_state.clear()
             st.rerun()
         return True
@@ -59,6 +140,7 @@ def auth_ui():
                             "email": (new_email.strip() or None),
                             "password": new_password,
                         },
+                        headers=client_ip_headers(),
                         timeout=10,
                     )
                     if r.status_code == 200:
@@ -81,6 +163,7 @@ def auth_ui():
             r = requests.post(
                 f"{API_URL}/login",
                 json={"username": username, "password": password},
+                headers=client_ip_headers(),
                 timeout=10,
             )
             if r.status_code == 200:
@@ -89,6 +172,8 @@ def auth_ui():
                 st.session_state["user"] = data.get("user", {})
                 st.session_state["token"] = data.get("token", "")
                 st.rerun()
+            elif r.status_code in (429, 503):
+                st.error(r.json().get("detail", "Too many attempts. Try again shortly."))
             else:
                 st.error("Invalid username or password.")
         except requests.exceptions.RequestException:
@@ -127,6 +212,9 @@ def main():
             "Email", key="signup_email", placeholder="you@example.com"
         )
         problem_file = st.file_uploader("Upload your problem file here", type=["json"])
+        dry_run = st.checkbox(
+            "Dry run — time a few generations and estimate cost/ETA instead of running"
+        )
         submitted_job = st.form_submit_button("Submit Job", use_container_width=True)
 
     if submitted_job:
@@ -139,11 +227,34 @@ def main():
 
                 response = requests.post(
                     f"{API_URL}/submit_json",
+                    params={"dry_run": "true"} if dry_run else None,
                     json={"data": json_data},
                     headers=auth_headers(),
                 )
 
-                if response.status_code == 200:
+                if response.status_code == 202:
+                    result_url = response.json()["result_url"]
+                    with st.spinner("Calibrating..."):
+                        for _ in range(120):  # Up to ~4 minutes
+                            time.sleep(2)
+                            calibration = requests.get(
+                                f"{API_URL}{result_url}", headers=auth_headers()
+                            ).json()
+                            if calibration.get("status") in ("complete", "failed"):
+                                break
+                    if calibration.get("status") == "complete":
+                        estimate = calibration["estimate"]
+                        st.success(
+                            f"Estimated worker time: {estimate['worker_seconds']:,} s — "
+                            f"ETA {estimate['eta_seconds']:,} s"
+                        )
+                        st.dataframe(pd.DataFrame(calibration["pairs"]))
+                    elif calibration.get("status") == "failed":
+                        st.error(f"Calibration failed: {calibration.get('error')}")
+                    else:
+                        st.info(f"Calibration still running; check {result_url} later.")
+
+                elif response.status_code == 200:
                     result = response.json()
                     job_id = result["job_id"]
                     st.success(f"Job {job_id} submitted successfully!")
@@ -168,12 +279,8 @@ def main():
                                 if data["status"] == "complete":
                                     status_container.success("Job Complete!")
                                     # Fetch result CSV and save for plotting
-                                    res = requests.get(
-                                        f"{API_URL}/job_results/{job_id}",
-                                        headers=auth_headers(),
-                                    )
-                                    if res.status_code == 200:
-                                        result_csv = res.json().get("data", "")
+                                    result_csv = fetch_job_results(job_id)
+                                    if result_csv is not None:
                                         if result_csv:
                                             st.session_state["plot_data"] = result_csv
                                         else:
@@ -244,119 +351,156 @@ def main():
 
     fragment_fn = getattr(st, "fragment", None) or getattr(st, "experimental_fragment")
 
-    @fragment_fn(run_every=3)
+    @fragment_fn(run_every=JOBS_WATCH_TICK_SECONDS)
+    def watch_jobs():
+        """Keep this session's JobsWatcher alive and rerun on its changes."""
+        watcher = st.session_state.get("jobs_watcher")
+        token = st.session_state.get("token")
+        if watcher is None or watcher.token != token or not watcher.thread.is_alive():
+            if watcher is not None:
+                watcher.stopped.set()
+            watcher = st.session_state["jobs_watcher"] = JobsWatcher(
+                token, st.session_state.get("my_jobs_version", 0)
+            )
+        watcher.last_seen = time.monotonic()
+        if watcher.changed.is_set():
+            watcher.changed.clear()
+            st.session_state["my_jobs_stale"] = True
+            st.rerun()
+
+    @fragment_fn()
     def my_jobs_section():
         st.subheader("My Jobs")
 
         try:
-            response = requests.get(
-                f"{API_URL}/my_jobs",
-                headers=auth_headers(),
-            )
-            if response.status_code == 200:
-                jobs = response.json()["jobs"]
-
-                if jobs:
-                    # Results table + CSV download (includes timestamps)
-                    table_rows = []
-                    for job in jobs:
-                        job_data = job.get("data", {}).get("data", {})
-                        table_rows.append(
-                            {
-                                "id": job.get("id"),
-                                "email": job_data.get("email", ""),
-                                "type": job.get("type", ""),
-                                "status": job.get("status", ""),
-                                "created_at": job.get("created_at", ""),
-                            }
-                        )
-
-                    jobs_df = pd.DataFrame(table_rows)
-                    csv_bytes = jobs_df.to_csv(index=False).encode("utf-8")
-                    st.download_button(
-                        label="Download DB results (CSV)",
-                        data=csv_bytes,
-                        file_name="my_jobs.csv",
-                        mime="text/csv",
-                        use_container_width=True,
+            # Re-fetched only when the watcher (or a cancel/delete) says so
+            stale = st.session_state.pop("my_jobs_stale", False) or "my_jobs" not in st.session_state
+            if stale:
+                response = requests.get(
+                    f"{API_URL}/my_jobs",
+                    headers=auth_headers(),
+                )
+                if response.status_code == 200:
+                    payload = response.json()
+                    st.session_state["my_jobs"] = payload["jobs"]
+                    st.session_state["my_jobs_version"] = payload.get("version", 0)
+                    watcher = st.session_state.get("jobs_watcher")
+                    if watcher is not None:
+                        watcher.version = max(watcher.version, payload.get("version", 0))
+                elif response.status_code == 401:
+                    st.error("Session expired. Please log in again.")
+                    st.session_state.clear()
+                    st.rerun()
+                else:
+                    st.error("Failed to fetch jobs.")
+                    return
+
+            jobs = st.session_state["my_jobs"]
+            output_cache = st.session_state.setdefault("job_output_cache", {})
+
+            if jobs:
+                # Results table + CSV download (includes timestamps)
+                table_rows = []
+                for job in jobs:
+                    job_data = job.get("data", {}).get("data", {})
+                    table_rows.append(
+                        {
+                            "id": job.get("id"),
+                            "email": job_data.get("email", ""),
+                            "type": job.get("type", ""),
+                            "status": job.get("status", ""),
+                            "created_at": job.get("created_at", ""),
+                        }
                     )
-                    st.dataframe(jobs_df, use_container_width=True, hide_index=True)
-
-                    for job in jobs:
-                        job_data = job["data"].get("data", {})
-                        job_email = job_data.get("email", "Unknown")
-                        job_status = job.get("status", "unknown")
-
-                        with st.expander(
-                            f"Job {job['id']} — {job_email} — [{job_status.upper()}]",
-                            expanded=job_status in ("running", "pending"),
-                        ):
-                            # --- UI FIX: Use columns to align buttons horizontally ---
-                            col1, col2 = st.columns([1, 5]) # 1:5 ratio keeps buttons neat and flush left
-                            
-                            with col1:
-                                if job_status in ("running", "pending"):
-                                    if st.button("Cancel Job", key=f"cancel_btn_{job['id']}"):
-                                        try:
-                                            cancel_req = requests.post(
-                                                f"{API_URL}/cancel_job/{job['id']}",
-                                                headers=auth_headers()
-                                            )
-                                            if cancel_req.status_code == 200:
-                                                st.toast(f"Job {job['id']} cancelled!")
-                                                time.sleep(0.5)
-                                                st.rerun()
-                                            else:
-                                                st.error("Failed to cancel job.")
-                                        except requests.exceptions.RequestException:
-                                            st.error("Could not reach backend to cancel.")
-                                else:
-                                    if st.button("Delete Job", key=f"delete_btn_{job['id']}"):
-                                        try:
-                                            delete_req = requests.delete(
-                                                f"{API_URL}/my_jobs/{job['id']}",
-                                                headers=auth_headers(),
-                                            )
-                                            if delete_req.status_code == 200:
-                                                st.toast(f"Job {job['id']} deleted.")
-                                                time.sleep(0.3)
-                                                st.rerun()
-                                            elif delete_req.status_code == 404:
-                                                st.error("Job not found.")
-                                            elif delete_req.status_code == 409:
-                                                st.error("Active jobs must be cancelled before deletion.")
-                                            else:
-                                                st.error("Failed to delete job.")
-                                        except requests.exceptions.RequestException:
-                                            st.error("Could not reach backend to delete job.")
-                            # ---------------------------------------------------------
-                            
-                            # Fetch and display the job output
-                            try:
+
+                jobs_df = pd.DataFrame(table_rows)
+                csv_bytes = jobs_df.to_csv(index=False).encode("utf-8")
+                st.download_button(
+                    label="Download DB results (CSV)",
+                    data=csv_bytes,
+                    file_name="my_jobs.csv",
+                    mime="text/csv",
+                    use_container_width=True,
+                )
+                st.dataframe(jobs_df, use_container_width=True, hide_index=True)
+
+                for job in jobs:
+                    job_data = job["data"].get("data", {})
+                    job_email = job_data.get("email", "Unknown")
+                    job_status = job.get("status", "unknown")
+
+                    with st.expander(
+                        f"Job {job['id']} — {job_email} — [{job_status.upper()}]",
+                        expanded=job_status in ("running", "pending"),
+                    ):
+                        # --- UI FIX: Use columns to align buttons horizontally ---
+                        col1, col2 = st.columns([1, 5]) # 1:5 ratio keeps buttons neat and flush left
+                        
+                        with col1:
+                            if job_status in ("running", "pending"):
+                                if st.button("Cancel Job", key=f"cancel_btn_{job['id']}"):
+                                    try:
+                                        cancel_req = requests.post(
+                                            f"{API_URL}/cancel_job/{job['id']}",
+                                            headers=auth_headers()
+                                        )
+                                        if cancel_req.status_code == 200:
+                                            st.toast(f"Job {job['id']} cancelled!")
+                                            st.session_state["my_jobs_stale"] = True
+                                            time.sleep(0.5)
+                                            st.rerun()
+                                        else:
+                                            st.error("Failed to cancel job.")
+                                    except requests.exceptions.RequestException:
+                                        st.error("Could not reach backend to cancel.")
+                            else:
+                                if st.button("Delete Job", key=f"delete_btn_{job['id']}"):
+                                    try:
+                                        delete_req = requests.delete(
+                                            f"{API_URL}/my_jobs/{job['id']}",
+                                            headers=auth_headers(),
+                                        )
+                                        if delete_req.status_code == 200:
+                                            st.toast(f"Job {job['id']} deleted.")
+                                            st.session_state["my_jobs_stale"] = True
+                                            time.sleep(0.3)
+                                            st.rerun()
+                                        elif delete_req.status_code == 404:
+                                            st.error("Job not found.")
+                                        elif delete_req.status_code == 409:
+                                            st.error("Active jobs must be cancelled before deletion.")
+                                        else:
+                                            st.error("Failed to delete job.")
+                                    except requests.exceptions.RequestException:
+                                        st.error("Could not reach backend to delete job.")
+                        # ---------------------------------------------------------
+                        
+                        # Fetch and display the job output (finished jobs are cached)
+                        try:
+                            out_data = output_cache.get(job["id"])
+                            if out_data is None:
                                 out_resp = requests.get(
                                     f"{API_URL}/job_output/{job['id']}",
                                     headers=auth_headers(),
                                 )
                                 if out_resp.status_code == 200:
                                     out_data = out_resp.json()
-                                    if out_data["output"]:
-                                        st.code(out_data["output"], language="text")
-                                    else:
-                                        st.info("No output yet.")
-                            except requests.exceptions.RequestException:
-                                st.warning("Could not fetch job output.")
-                else:
-                    st.info("No jobs submitted yet.")
-            elif response.status_code == 401:
-                st.error("Session expired. Please log in again.")
-                st.session_state.clear()
-                st.rerun()
+                                    if out_data["status"] in ("complete", "failed", "cancelled"):
+                                        output_cache[job["id"]] = out_data
+                            if out_data is not None:
+                                if out_data["output"]:
+                                    st.code(out_data["output"], language="text")
+                                else:
+                                    st.info("No output yet.")
+                        except requests.exceptions.RequestException:
+                            st.warning("Could not fetch job output.")
             else:
-                st.error("Failed to fetch jobs.")
+                st.info("No jobs submitted yet.")
         except requests.exceptions.RequestException:
             st.error("Could not connect to backend. Make sure the server is running.")
 
     my_jobs_section()
+    watch_jobs()
 
 
 main()